@@ -3,13 +3,17 @@ from django.dispatch import receiver
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
-from django.template import Template, Context
+
+from utils.template_cache import invalidate_on_change, template_cache
 
 from .models import (
     Hospital, Department, SystemConfiguration, SystemLog,
     AuditLog, Notification, EmailTemplate
 )
 
+# Templates compilados em cache deixam de valer quando o template é alterado
+invalidate_on_change(EmailTemplate)
+
 
 @receiver(post_save, sender=Hospital)
 def create_default_departments(sender, instance, created, **kwargs):
@@ -94,9 +98,10 @@ def send_email_notification(sender, instance, created, **kwargs):
                 'site_url': settings.SITE_URL if hasattr(settings, 'SITE_URL') else '',
             }
             
-            subject = Template(email_template.subject).render(Context(context))
-            body_html = Template(email_template.body_html).render(Context(context))
-            body_text = Template(email_template.body_text).render(Context(context))
+            rendered = template_cache.render(email_template, ('subject', 'body_html', 'body_text'), context)
+            subject = rendered['subject'] or ''
+            body_html = rendered['body_html'] or ''
+            body_text = rendered['body_text'] or ''
             
             # Envia o e-mail
             send_mail(
@@ -156,9 +161,8 @@ def validate_email_template(sender, instance, created, **kwargs):
             'site_url': 'https://exemplo.com',
         }
         
-        Template(instance.subject).render(Context(context))
-        Template(instance.body_html).render(Context(context))
-        Template(instance.body_text).render(Context(context))
+        # A compilação já deixa a nova versão no cache de templates
+        template_cache.render(instance, ('subject', 'body_html', 'body_text'), context)
         
         # Se chegou aqui, o template é válido
         if not created:
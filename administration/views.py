@@ -45,6 +45,7 @@ from .permissions import (
 from .signals import log_system_event, create_audit_log, send_notification
 
 from django.contrib.admin.views.decorators import staff_member_required
+from utils.decorators import async_staff_member_required
 
 
 # Views para interface web
@@ -2012,18 +2013,22 @@ def profile(request):
     return render(request, 'dashboard/profile.html', context)
 
 # API endpoints para dados do dashboard
-@staff_member_required
-def dashboard_stats(request):
+@async_staff_member_required
+async def dashboard_stats(request):
     """
     Retorna estatísticas para o dashboard via AJAX
     """
+    from applications.models import Application
+    from interviews.models import Interview
+    from users.models import User
+    from vacancies.models import Vacancy
+    
     try:
-        # Exemplo de dados - você deve adaptar para seus modelos
         stats = {
-            'total_candidates': 0,  # Candidate.objects.count()
-            'total_vacancies': 0,   # Vacancy.objects.count()
-            'total_applications': 0, # Application.objects.count()
-            'total_interviews': 0,   # Interview.objects.count()
+            'total_candidates': await User.objects.filter(role=User.CANDIDATE).acount(),
+            'total_vacancies': await Vacancy.objects.acount(),
+            'total_applications': await Application.objects.acount(),
+            'total_interviews': await Interview.objects.acount(),
             'recent_applications': [],
             'upcoming_interviews': [],
             'chart_data': {
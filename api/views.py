@@ -18,6 +18,8 @@ from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from utils.pagination import CachedCountPaginator, KeysetCursorPagination
+
 from .serializers import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer,
     PasswordChangeSerializer, TokenSerializer, LoginSerializer,
@@ -36,10 +38,31 @@ User = get_user_model()
 class StandardResultsSetPagination(PageNumberPagination):
     """
     Paginação padrão para API.
+
+    Por número de página, com o total em cache. Com ``?cursor=`` (ou
+    ``?pagination=cursor`` para a primeira página) passa a usar keyset,
+    ordenado pelo ``keyset_ordering`` da view e sem contagem.
     """
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    django_paginator_class = CachedCountPaginator
+    keyset_paginator = None
+
+    def use_keyset(self, request):
+        return 'cursor' in request.query_params or request.query_params.get('pagination') == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset_paginator = KeysetCursorPagination()
+            self.keyset_paginator.page_size = self.page_size
+            return self.keyset_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
 
 
 class StandardUserRateThrottle(UserRateThrottle):
@@ -227,6 +250,7 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ['username', 'email', 'first_name', 'last_name']
     ordering_fields = ['username', 'email', 'first_name', 'last_name', 'date_joined']
     ordering = ['username']
+    keyset_ordering = ('-date_joined', '-id')
     
     def get_serializer_class(self):
         """
@@ -23,10 +23,10 @@ class ApplicationEvaluationInline(admin.TabularInline):
 
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
-    list_display = ('candidate_name', 'vacancy_title', 'status', 'created_at', 'updated_at')
+    list_display = ('candidate_name', 'vacancy_title', 'status', 'avg_score', 'created_at', 'updated_at')
     list_filter = ('status', 'created_at', 'vacancy__hospital', 'vacancy__department')
     search_fields = ('candidate__user__first_name', 'candidate__user__last_name', 'vacancy__title')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('avg_score', 'evaluation_count', 'created_at', 'updated_at')
     fieldsets = (
         (_('Informações Básicas'), {
             'fields': ('candidate', 'vacancy', 'status')
@@ -35,7 +35,7 @@ class ApplicationAdmin(admin.ModelAdmin):
             'fields': ('cover_letter', 'resume')
         }),
         (_('Informações Adicionais'), {
-            'fields': ('recruiter_notes', 'created_at', 'updated_at')
+            'fields': ('recruiter_notes', 'avg_score', 'evaluation_count', 'created_at', 'updated_at')
         }),
     )
     inlines = [ApplicationEvaluationInline]
@@ -0,0 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from .services import FavoriteService
+
+
+def favorites(request):
+    """
+    Disponibiliza ``favorite_application_ids`` aos templates: o conjunto de
+    candidaturas favoritas do recrutador, carregado apenas se for usado.
+    """
+    return {
+        'favorite_application_ids': SimpleLazyObject(lambda: FavoriteService.for_request(request)),
+    }
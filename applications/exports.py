@@ -0,0 +1,196 @@
+"""
+Exportação de candidaturas em streaming (CSV) e com memória constante (Excel)
+"""
+import csv
+import tempfile
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import FileResponse, StreamingHttpResponse
+
+from utils.db import chunked_iterator
+from utils.export_import import write_excel_rows
+
+from .services import ApplicationListService
+
+# Quantidade de linhas lidas do banco por vez
+EXPORT_CHUNK_SIZE = 2000
+# Linhas do CSV geradas por chamada à thread síncrona quando servido por ASGI
+ASYNC_STREAM_BATCH = 500
+
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _candidate_profile(user):
+    """Retorna o CandidateProfile já carregado pelo select_related, se existir."""
+    try:
+        return user.candidate_profile
+    except ObjectDoesNotExist:
+        return None
+
+
+def _profile_value(user, candidate_profile, field):
+    """Prioriza o valor do CandidateProfile quando disponível."""
+    if candidate_profile is not None and getattr(candidate_profile, field, None):
+        return getattr(candidate_profile, field)
+    return getattr(user, field)
+
+
+# (cabeçalho, largura da coluna no Excel)
+EXPORT_COLUMNS = (
+    ('Nome Completo', 30),
+    ('Email', 32),
+    ('Telefone', 18),
+    ('WhatsApp', 18),
+    ('CPF', 16),
+    ('Data de Nascimento', 18),
+    ('Endereço', 40),
+    ('Cidade', 20),
+    ('Estado', 8),
+    ('CEP', 12),
+    ('Vaga', 35),
+    ('Hospital', 30),
+    ('Localização', 25),
+    ('Status', 14),
+    ('Score', 8),
+    ('Data da Candidatura', 18),
+    ('Carta de Apresentação', 50),
+    ('Notas do Recrutador', 50),
+)
+
+
+def export_queryset(queryset, score_sort='', search=''):
+    """
+    Prepara o queryset de exportação com todas as relações na mesma consulta,
+    na mesma ordenação da listagem.
+    """
+    queryset = queryset.select_related(
+        'candidate__user__candidate_profile',
+        'vacancy__hospital',
+    )
+    return ApplicationListService.order_by_score(queryset, score_sort, search)
+
+
+def application_row(application):
+    """
+    Converte uma candidatura em uma linha de exportação (na ordem de EXPORT_COLUMNS).
+    """
+    user = application.candidate.user
+    candidate_profile = _candidate_profile(user)
+    vacancy = application.vacancy
+    hospital = vacancy.hospital
+
+    def value(field):
+        return _profile_value(user, candidate_profile, field) or 'N/A'
+
+    return [
+        user.get_full_name(),
+        user.email,
+        value('phone'),
+        value('whatsapp'),
+        value('cpf'),
+        user.date_of_birth.strftime('%d/%m/%Y') if user.date_of_birth else 'N/A',
+        value('address'),
+        value('city'),
+        value('state'),
+        value('zip_code'),
+        vacancy.title,
+        hospital.name if hospital else 'N/A',
+        f"{hospital.city}, {hospital.state}" if hospital else 'N/A',
+        str(application.get_status_display()),
+        float(application.avg_score) if application.avg_score is not None else 'N/A',
+        application.created_at.strftime('%d/%m/%Y %H:%M'),
+        application.cover_letter or 'N/A',
+        application.recruiter_notes or 'N/A',
+    ]
+
+
+def iter_rows(queryset):
+    """
+    Itera as linhas de exportação lendo o banco em blocos.
+
+    ``queryset`` deve ter sido preparado por ``export_queryset``.
+    """
+    for application in chunked_iterator(queryset, EXPORT_CHUNK_SIZE):
+        yield application_row(application)
+
+
+class Echo:
+    """Pseudo-buffer que devolve o que recebe, usado pelo csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+class SyncStreamingHttpResponse(StreamingHttpResponse):
+    """
+    Streaming de um iterador síncrono que também é enviado aos poucos sob ASGI.
+
+    No Django 4.2 o ``StreamingHttpResponse`` consome um iterador síncrono,
+    sob ASGI, com ``sync_to_async(list)``: a exportação inteira seria montada
+    em memória antes do primeiro byte. Aqui o iterador é consumido em blocos
+    de ASYNC_STREAM_BATCH partes, na mesma thread das consultas da view.
+    """
+
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+
+        iterator = iter(self.streaming_content)
+        next_batch = sync_to_async(lambda: list(islice(iterator, ASYNC_STREAM_BATCH)), thread_sensitive=True)
+        while True:
+            parts = await next_batch()
+            if not parts:
+                break
+            for part in parts:
+                yield part
+
+
+def stream_csv(queryset, filename):
+    """
+    Exporta candidaturas para CSV em streaming; o primeiro byte sai imediatamente.
+    """
+    writer = csv.writer(Echo())
+
+    def content():
+        # BOM para que o Excel reconheça UTF-8
+        yield '\ufeff'
+        yield writer.writerow([header for header, _width in EXPORT_COLUMNS])
+        for row in iter_rows(queryset):
+            yield writer.writerow(row)
+
+    response = SyncStreamingHttpResponse(content(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def write_excel(queryset, output):
+    """
+    Escreve as candidaturas em ``output`` (caminho ou arquivo) com memória constante.
+    """
+    return write_excel_rows(
+        output,
+        EXPORT_COLUMNS,
+        iter_rows(queryset),
+        sheet_name='Candidaturas',
+        empty_message='Nenhuma candidatura encontrada',
+    )
+
+
+def stream_excel(queryset, filename):
+    """
+    Exporta candidaturas para Excel gerando o arquivo em disco temporário
+    e enviando-o em blocos, sem manter a planilha em memória.
+    """
+    output = tempfile.TemporaryFile()
+    write_excel(queryset, output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type=EXCEL_CONTENT_TYPE,
+    )
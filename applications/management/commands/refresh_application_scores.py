@@ -0,0 +1,54 @@
+"""
+Comando para preencher ou corrigir o score desnormalizado das candidaturas
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from applications.models import Application
+from applications.services import ApplicationScoreService
+
+
+class Command(BaseCommand):
+    help = 'Recalcula avg_score e evaluation_count das candidaturas a partir das avaliações'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Número de candidaturas atualizadas por transação (padrão: 1000)'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcula todas as candidaturas, e não apenas as divergentes'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas informa quantas candidaturas estão divergentes'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['all']:
+            queryset = Application.objects.all()
+        else:
+            queryset = ApplicationScoreService.stale_applications()
+
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(ids)} candidaturas com score divergente.')
+            return
+
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            with transaction.atomic():
+                updated += ApplicationScoreService.refresh(Application.objects.filter(pk__in=batch))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{updated} candidaturas atualizadas.')
+        )
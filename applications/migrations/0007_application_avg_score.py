@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:35
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Round
+
+
+def backfill_scores(apps, schema_editor):
+    Application = apps.get_model('applications', 'Application')
+    ApplicationEvaluation = apps.get_model('applications', 'ApplicationEvaluation')
+
+    evaluations = ApplicationEvaluation.objects.filter(
+        application=OuterRef('pk')
+    ).order_by().values('application')
+    scores = evaluations.annotate(
+        score=Round((Avg('technical_score') + Avg('experience_score') + Avg('cultural_fit_score')) / 3, 1)
+    ).values('score')
+    counts = evaluations.annotate(total=Count('id')).values('total')
+
+    Application.objects.filter(pk__in=ApplicationEvaluation.objects.values('application')).update(
+        avg_score=Subquery(scores[:1]),
+        evaluation_count=Coalesce(Subquery(counts[:1]), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0006_add_12x60_availability_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='avg_score',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=1, editable=False, max_digits=3, null=True, verbose_name='Score Médio'),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='evaluation_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Número de Avaliações'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(models.OrderBy(models.F('avg_score'), descending=True, nulls_last=True), models.OrderBy(models.F('created_at'), descending=True), name='application_score_desc_idx'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0008_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='applicationfavorite',
+            constraint=models.UniqueConstraint(fields=('recruiter', 'application'), name='application_favorite_unique'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='applicationfavorite',
+            unique_together=set(),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -62,12 +62,39 @@ class Application(models.Model):
         null=True,
         verbose_name=_('Notas do Recrutador')
     )
+    # Mantidos por ApplicationScoreService a cada avaliação salva ou removida
+    avg_score = models.DecimalField(
+        max_digits=3,
+        decimal_places=1,
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+        verbose_name=_('Score Médio')
+    )
+    evaluation_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_('Número de Avaliações')
+    )
     
     class Meta:
         verbose_name = _('Candidatura')
         verbose_name_plural = _('Candidaturas')
         ordering = ['-created_at']
         unique_together = ('candidate', 'vacancy')
+        indexes = [
+            # Listagens do recrutador: filtro por status/vaga e ordenação por data
+            models.Index(fields=['status', '-created_at'], name='application_status_created_idx'),
+            models.Index(fields=['vacancy', 'status'], name='application_vacancy_status_idx'),
+            models.Index(fields=['-created_at', '-id'], name='application_created_idx'),
+            # Ordenação "maior score primeiro" (DESC NULLS LAST) da listagem
+            models.Index(
+                models.F('avg_score').desc(nulls_last=True),
+                models.F('created_at').desc(),
+                name='application_score_desc_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.candidate.user.get_full_name()} - {self.vacancy.title}"
@@ -136,6 +163,11 @@ class ApplicationEvaluation(models.Model):
     def __str__(self):
         return f"Avaliação: {self.application} por {self.evaluator.user.get_full_name()}"
     
+    def save(self, *args, **kwargs):
+        # O score da candidatura é recalculado no post_save, na mesma transação
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     @property
     def total_score(self):
         """Calcula a pontuação total da avaliação."""
@@ -501,8 +533,15 @@ class ApplicationFavorite(models.Model):
     class Meta:
         verbose_name = _('Candidatura Favorita')
         verbose_name_plural = _('Candidaturas Favoritas')
-        unique_together = ('application', 'recruiter')
         ordering = ['-created_at']
+        constraints = [
+            # O recrutador vem primeiro para que o índice atenda à leitura
+            # dos favoritos de um recrutador
+            models.UniqueConstraint(
+                fields=['recruiter', 'application'],
+                name='application_favorite_unique',
+            ),
+        ]
     
     def __str__(self):
         return f"Favorito: {self.application} por {self.recruiter.user.get_full_name()}"
@@ -67,12 +67,17 @@ class ApplicationSerializer(serializers.ModelSerializer):
     status_display = serializers.SerializerMethodField()
     evaluations = ApplicationEvaluationSerializer(many=True, read_only=True)
     resume_url = serializers.SerializerMethodField()
+    is_favorite = serializers.SerializerMethodField()
     
     class Meta:
         model = Application
         fields = '__all__'
         read_only_fields = ('candidate', 'created_at', 'updated_at')
     
+    def get_is_favorite(self, obj):
+        # Conjunto de favoritos do recrutador, carregado uma vez pela view
+        return obj.pk in self.context.get('favorite_ids', ())
+    
     def get_candidate_name(self, obj):
         return obj.candidate.user.get_full_name()
     
@@ -0,0 +1,595 @@
+"""
+Serviços para consultas de candidaturas
+"""
+import logging
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from utils.pagination import KeysetPaginator, cached_query_value
+from utils.search import CandidateSearch
+
+from .models import Application, ApplicationComplementaryInfo, ApplicationEvaluation, ApplicationFavorite
+
+logger = logging.getLogger(__name__)
+
+
+class FavoriteService:
+    """
+    Candidaturas favoritas de cada recrutador.
+
+    Os IDs favoritos de um recrutador são carregados de uma vez (e mantidos
+    em cache até a próxima alteração), e as telas verificam se uma
+    candidatura é favorita consultando esse conjunto.
+    """
+
+    CACHE_TIMEOUT = 60 * 60
+
+    @staticmethod
+    def cache_key(recruiter_id) -> str:
+        return f'applications:favorites:{recruiter_id}'
+
+    @staticmethod
+    def get_ids(recruiter_profile) -> frozenset:
+        """
+        IDs das candidaturas favoritas do recrutador
+        """
+        key = FavoriteService.cache_key(recruiter_profile.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(
+                ApplicationFavorite.objects.filter(recruiter=recruiter_profile).values_list('application_id', flat=True)
+            )
+            cache.set(key, ids, FavoriteService.CACHE_TIMEOUT)
+        return ids
+
+    @staticmethod
+    def for_request(request) -> frozenset:
+        """
+        Favoritos do usuário da requisição, carregados uma única vez por requisição
+        (conjunto vazio para quem não é recrutador)
+        """
+        if not hasattr(request, '_favorite_application_ids'):
+            user = request.user
+            ids = frozenset()
+            if user.is_authenticated and user.role in ['recruiter', 'recrutador', 'admin']:
+                ids = FavoriteService.get_ids(user.profile)
+            request._favorite_application_ids = ids
+        return request._favorite_application_ids
+
+    @staticmethod
+    def invalidate(recruiter_id):
+        cache.delete(FavoriteService.cache_key(recruiter_id))
+
+    @staticmethod
+    def mark(applications, favorite_ids):
+        """
+        Define ``is_favorite`` nas candidaturas já carregadas
+        """
+        for application in applications:
+            application.is_favorite = application.pk in favorite_ids
+        return applications
+
+    @staticmethod
+    def add(recruiter_profile, application_ids) -> int:
+        """
+        Marca as candidaturas como favoritas (as já favoritas são ignoradas).
+        Retorna quantas candidaturas existentes foram informadas.
+        """
+        existing = Application.objects.filter(pk__in=application_ids).values_list('pk', flat=True)
+        favorites = [
+            ApplicationFavorite(application_id=application_id, recruiter=recruiter_profile)
+            for application_id in existing
+        ]
+        ApplicationFavorite.objects.bulk_create(favorites, ignore_conflicts=True)
+        FavoriteService.invalidate(recruiter_profile.pk)
+        return len(favorites)
+
+    @staticmethod
+    def remove(recruiter_profile, application_ids) -> int:
+        """
+        Remove as candidaturas dos favoritos. Retorna quantas foram removidas.
+        """
+        deleted, _details = ApplicationFavorite.objects.filter(
+            recruiter=recruiter_profile, application_id__in=application_ids
+        ).delete()
+        FavoriteService.invalidate(recruiter_profile.pk)
+        return deleted
+
+    @staticmethod
+    def set_favorite(recruiter_profile, application_id, is_favorite: bool):
+        """
+        Define o estado de favorito; repetir a chamada não altera o resultado
+        """
+        if is_favorite:
+            FavoriteService.add(recruiter_profile, [application_id])
+        else:
+            FavoriteService.remove(recruiter_profile, [application_id])
+
+    @staticmethod
+    def toggle(recruiter_profile, application_id) -> bool:
+        """
+        Inverte o estado de favorito com um único DELETE (ou INSERT, se não
+        havia o que remover). Retorna o novo estado.
+
+        O INSERT usa ON CONFLICT DO NOTHING: se outro toggle simultâneo já
+        criou o favorito, não há IntegrityError. A candidatura deve existir
+        (a view a verifica antes).
+        """
+        if FavoriteService.remove(recruiter_profile, [application_id]):
+            return False
+        ApplicationFavorite.objects.bulk_create(
+            [ApplicationFavorite(application_id=application_id, recruiter=recruiter_profile)],
+            ignore_conflicts=True,
+        )
+        FavoriteService.invalidate(recruiter_profile.pk)
+        return True
+
+
+class ApplicationFilterService:
+    """
+    Filtros das telas de candidaturas do recrutador (listagem e exportação)
+    """
+
+    FILTER_PARAMS = ('status', 'vacancy', 'hospital', 'date', 'search', 'favorites', 'score_sort')
+
+    @staticmethod
+    def get_filters(params) -> dict:
+        """
+        Extrai os filtros suportados de ``request.GET`` (ou de um dict)
+        """
+        return {name: params.get(name, '') or '' for name in ApplicationFilterService.FILTER_PARAMS}
+
+    @staticmethod
+    def filter_queryset(queryset, filters: dict, recruiter_profile):
+        """
+        Aplica os filtros de status, vaga, hospital, data, busca e favoritos
+        """
+        if filters.get('status'):
+            queryset = queryset.filter(status=filters['status'])
+
+        if filters.get('vacancy'):
+            queryset = queryset.filter(vacancy_id=filters['vacancy'])
+
+        if filters.get('hospital'):
+            queryset = queryset.filter(vacancy__hospital_id=filters['hospital'])
+
+        date_filter = filters.get('date')
+        if date_filter:
+            today = timezone.now().date()
+            if date_filter == 'today':
+                queryset = queryset.filter(created_at__date=today)
+            elif date_filter == 'week':
+                queryset = queryset.filter(created_at__date__gte=today - timedelta(days=7))
+            elif date_filter == 'month':
+                queryset = queryset.filter(created_at__date__gte=today - timedelta(days=30))
+
+        if filters.get('search'):
+            queryset = CandidateSearch.filter(
+                queryset, filters['search'], user_path='candidate__user', vacancy_path='vacancy'
+            )
+
+        if filters.get('favorites') == 'true':
+            queryset = queryset.filter(pk__in=FavoriteService.get_ids(recruiter_profile))
+
+        return queryset
+
+
+class ApplicationListService:
+    """
+    Pipeline de listagem de candidaturas para recrutadores.
+
+    Candidato, vaga e hospital são resolvidos em SQL, o score médio é uma
+    coluna da própria candidatura e os favoritos vêm do conjunto do
+    ``FavoriteService``, de forma que o número de
+    consultas por página não depende da quantidade de candidaturas.
+    """
+
+    PAGE_SIZE = 10
+    KEYSET_ORDERING = ('-created_at', '-id')
+
+    @staticmethod
+    def status_counts(queryset) -> dict:
+        """
+        Conta as candidaturas por status com uma única consulta
+        """
+        aggregates = {'total': Count('id')}
+        for status, _label in Application.STATUS_CHOICES:
+            aggregates[status] = Count('id', filter=Q(status=status))
+        return queryset.order_by().aggregate(**aggregates)
+
+    @staticmethod
+    def with_listing_data(queryset):
+        """
+        Carrega as relações exibidas na listagem
+        """
+        return queryset.select_related(
+            'candidate__user',
+            'vacancy__hospital',
+            'vacancy__department',
+        )
+
+    @staticmethod
+    def order_by_score(queryset, score_sort: str, search: str = ''):
+        """
+        Ordena pelo score médio (coluna indexada), pela relevância da busca ou,
+        por padrão, pela data de criação
+        """
+        if score_sort == 'high_to_low':
+            return queryset.order_by(F('avg_score').desc(nulls_last=True), '-created_at', '-id')
+        if score_sort == 'low_to_high':
+            return queryset.order_by(F('avg_score').asc(nulls_last=True), '-created_at', '-id')
+        if search:
+            queryset = CandidateSearch.annotate_rank(queryset, search, 'candidate__user', 'vacancy')
+            return queryset.order_by('-search_rank', '-created_at', '-id')
+        return queryset.order_by('-created_at', '-id')
+
+    @staticmethod
+    def build_page(queryset, recruiter_profile, page_number=None, score_sort: str = '', per_page: int = None,
+                   search: str = '', cursor: str = None):
+        """
+        Monta a página da listagem e as contagens por status.
+
+        Na ordenação padrão (por data), ``cursor`` pede a página por keyset,
+        usada pelo scroll infinito; as contagens então vêm do cache.
+
+        Retorna uma tupla ``(page, status_counts)``.
+        """
+        per_page = per_page or ApplicationListService.PAGE_SIZE
+        keyset = not score_sort and not search
+
+        applications = ApplicationListService.with_listing_data(queryset)
+        favorite_ids = FavoriteService.get_ids(recruiter_profile)
+
+        if keyset and cursor:
+            status_counts = cached_query_value(
+                queryset, 'status_counts', lambda: ApplicationListService.status_counts(queryset)
+            )
+            page = KeysetPaginator(applications, per_page, ApplicationListService.KEYSET_ORDERING).get_page(cursor)
+            FavoriteService.mark(page.object_list, favorite_ids)
+            return page, status_counts
+
+        status_counts = ApplicationListService.status_counts(queryset)
+        applications = ApplicationListService.order_by_score(applications, score_sort, search)
+
+        paginator = Paginator(applications, per_page)
+        paginator.count = status_counts['total']
+        page = paginator.get_page(page_number)
+        page.object_list = FavoriteService.mark(list(page.object_list), favorite_ids)
+
+        page.next_cursor = ''
+        if keyset and page.has_next():
+            page.next_cursor = KeysetPaginator.cursor_for(
+                page.object_list[-1], ApplicationListService.KEYSET_ORDERING
+            )
+
+        return page, status_counts
+
+
+class ApplicationDetailService:
+    """
+    Carregamento e gravação da página de detalhes da candidatura.
+
+    O agregado (candidato, usuário, perfil de candidato, currículo com
+    formações e experiências, informações complementares e avaliações com
+    os avaliadores) é obtido em quatro consultas, independentemente da
+    quantidade de avaliações ou itens do currículo.
+    """
+
+    @staticmethod
+    def queryset():
+        return Application.objects.select_related(
+            'candidate__user__candidate_profile',
+            'candidate__detailed_resume',
+            'vacancy__hospital',
+            'complementary_info',
+        ).prefetch_related(
+            'candidate__detailed_resume__education',
+            'candidate__detailed_resume__work_experiences',
+            Prefetch('evaluations', queryset=ApplicationEvaluation.objects.select_related('evaluator__user')),
+        )
+
+    @staticmethod
+    def related_or_none(obj, name):
+        """
+        Relação one-to-one já carregada, ou ``None`` quando não existe
+        """
+        try:
+            return getattr(obj, name)
+        except ObjectDoesNotExist:
+            return None
+
+    @staticmethod
+    def evaluation_by(application, evaluator_profile):
+        """
+        Avaliação do recrutador, procurada entre as avaliações já carregadas
+        """
+        for evaluation in application.evaluations.all():
+            if evaluation.evaluator_id == evaluator_profile.pk:
+                return evaluation
+        return None
+
+    @staticmethod
+    @transaction.atomic
+    def save(application, recruiter_profile, data, evaluation=None):
+        """
+        Grava status, notas, favorito e a avaliação do recrutador em uma
+        única transação. A candidatura é salva uma vez, apenas com os campos
+        alterados, e o favorito só é escrito se mudou.
+        """
+        update_fields = []
+        if 'status' in data and data['status'] != application.status:
+            application.status = data['status']
+            update_fields.append('status')
+        if 'recruiter_notes' in data:
+            recruiter_notes = data.get('recruiter_notes', '')
+            if recruiter_notes != (application.recruiter_notes or ''):
+                application.recruiter_notes = recruiter_notes
+                update_fields.append('recruiter_notes')
+        if update_fields:
+            application.save(update_fields=update_fields + ['updated_at'])
+
+        is_favorite = data.get('is_favorite') == 'on'
+        if is_favorite != getattr(application, 'is_favorite', not is_favorite):
+            FavoriteService.set_favorite(recruiter_profile, application.pk, is_favorite)
+            application.is_favorite = is_favorite
+
+        if evaluation is None:
+            evaluation = ApplicationEvaluation(application=application, evaluator=recruiter_profile)
+        evaluation.technical_score = data.get('technical_score', 0)
+        evaluation.experience_score = data.get('experience_score', 0)
+        evaluation.cultural_fit_score = data.get('cultural_fit_score', 0)
+        evaluation.comments = data.get('comments', '')
+        evaluation.save()
+        return evaluation
+
+
+class ApplicationSubmissionService:
+    """
+    Envio da candidatura pelo formulário completo da vaga (``candidatura_view``).
+
+    Tudo é gravado em uma única transação. A restrição única
+    (candidato, vaga) torna o envio idempotente: um segundo envio simultâneo
+    espera o primeiro e devolve a candidatura já criada, sem alterar nada.
+    O arquivo do atestado PCD só é armazenado após o commit.
+    """
+
+    # Campo do formulário -> campo do usuário
+    USER_TEXT_FIELDS = {
+        'cpf': 'cpf',
+        'pis': 'pis',
+        'rg': 'rg',
+        'rg_orgao': 'rg_orgao',
+        'whatsapp': 'whatsapp',
+        'cep': 'zip_code',
+    }
+    USER_CHOICE_FIELDS = {
+        'nome_social': 'nome_social',
+        'raca_cor': 'raca_cor',
+        'sexo': 'sexo',
+        'genero': 'genero',
+        'estado_civil': 'estado_civil',
+        'endereco': 'address',
+        'numero': 'numero',
+        'complemento': 'complemento',
+        'bairro': 'bairro',
+        'cidade': 'city',
+        'estado': 'state',
+    }
+    USER_DATE_FIELDS = {
+        'data_nascimento': 'date_of_birth',
+        'rg_emissao': 'rg_emissao',
+    }
+
+    @staticmethod
+    def user_values(user, data) -> dict:
+        """
+        Valores do usuário preenchidos pelo formulário
+        """
+        values = {}
+        nome_completo = (data.get('nome_completo') or '').strip()
+        if nome_completo:
+            partes = nome_completo.split()
+            values['first_name'] = ' '.join(partes[:-1]) if len(partes) > 1 else nome_completo
+            values['last_name'] = partes[-1] if len(partes) > 1 else ''
+        for source, field in ApplicationSubmissionService.USER_TEXT_FIELDS.items():
+            values[field] = (data.get(source) or '').strip()
+        for source, field in ApplicationSubmissionService.USER_CHOICE_FIELDS.items():
+            values[field] = data.get(source) or ''
+        for source, field in ApplicationSubmissionService.USER_DATE_FIELDS.items():
+            values[field] = data.get(source) or None
+        values['bio'] = data.get('bio') or user.bio
+        values['email'] = (data.get('email') or user.email).strip()
+        return values
+
+    @staticmethod
+    def apply_user_changes(user, data) -> list:
+        """
+        Atribui ao usuário os valores do formulário e retorna apenas os
+        campos que de fato mudaram (vazio e nulo são considerados iguais)
+        """
+        changed = []
+        for field, value in ApplicationSubmissionService.user_values(user, data).items():
+            if value not in (None, ''):
+                value = user._meta.get_field(field).to_python(value)
+            current = getattr(user, field)
+            if current in (None, '') and value in (None, ''):
+                continue
+            if current != value:
+                setattr(user, field, value)
+                changed.append(field)
+        return changed
+
+    @staticmethod
+    def complementary_info_values(data) -> dict:
+        """
+        Campos de ``ApplicationComplementaryInfo`` preenchidos pelo formulário
+        """
+        return {
+            'trabalha_atualmente': data.get('trabalha_atualmente', ''),
+            'funcao_atual': data.get('funcao_atual', ''),
+            'experiencia_area': data.get('experiencia_area', ''),
+            'descricao_experiencia': data.get('descricao_experiencia', ''),
+            'ultima_funcao': data.get('ultima_funcao', ''),
+            'tempo_experiencia': data.get('tempo_experiencia', ''),
+            'disponibilidade_manha': data.get('disponibilidade_manha') == 'manha',
+            'disponibilidade_tarde': data.get('disponibilidade_tarde') == 'tarde',
+            'disponibilidade_noite': data.get('disponibilidade_noite') == 'noite',
+            'disponibilidade_comercial': data.get('disponibilidade_comercial') == 'comercial',
+            'disponibilidade_plantao_dia': data.get('disponibilidade_plantao_dia') == 'plantao_dia',
+            'disponibilidade_plantao_noite': data.get('disponibilidade_plantao_noite') == 'plantao_noite',
+            'disponibilidade_plantao_12x60_dia': data.get('disponibilidade_plantao_12x60_dia') == 'plantao_12x60_dia',
+            'disponibilidade_plantao_12x60_noite': data.get('disponibilidade_plantao_12x60_noite') == 'plantao_12x60_noite',
+            'inicio_imediato': data.get('inicio_imediato', ''),
+            'trabalhou_acqua': data.get('trabalhou_acqua', ''),
+            'area_cargo_acqua': data.get('area_cargo_acqua', ''),
+            'data_desligamento': data.get('data_desligamento') or None,
+            'parentes_instituicao': data.get('parentes_instituicao', ''),
+            'grau_parentesco': data.get('grau_parentesco') or None,
+            'nome_parente_setor': data.get('nome_parente_setor', ''),
+            'declaracao_veracidade': data.get('declaracao_veracidade') == 'sim',
+            'declaracao_edital': data.get('declaracao_edital') == 'sim',
+            'autorizacao_dados': data.get('autorizacao_dados') == 'sim',
+            'data_declaracao': (
+                f"{data.get('dia_declaracao', '')}/{data.get('mes_declaracao', '')}/{data.get('ano_declaracao', '')}"
+            ),
+            'is_pcd': data.get('is_pcd') or None,
+            'cid': data.get('cid') or None,
+            'necessita_adaptacoes': data.get('necessita_adaptacoes') or None,
+            'descricao_adaptacoes': data.get('descricao_adaptacoes') or None,
+            'conselho_regional': data.get('conselho_regional') or None,
+            'numero_registro': data.get('numero_registro') or None,
+            'validade_registro': data.get('validade_registro') or None,
+        }
+
+    @staticmethod
+    def store_attachment(complementary_info_id, upload):
+        """
+        Armazena o atestado PCD e grava apenas o nome do arquivo.
+
+        Roda após o commit da candidatura, que já foi criada: uma falha do
+        storage é registrada no log e não muda a resposta do envio.
+        """
+        complementary_info = ApplicationComplementaryInfo(pk=complementary_info_id)
+        try:
+            complementary_info.atestado_pcd.save(upload.name, upload, save=False)
+            ApplicationComplementaryInfo.objects.filter(pk=complementary_info_id).update(
+                atestado_pcd=complementary_info.atestado_pcd.name
+            )
+        except Exception:
+            logger.exception(f"Erro ao armazenar o atestado PCD das informações complementares {complementary_info_id}")
+
+    @staticmethod
+    def submit(user_profile, vacancy, data, files=None):
+        """
+        Cria a candidatura com as informações complementares e atualiza os
+        dados do usuário.
+
+        Retorna ``(application, created)``; ``created`` é falso quando o
+        candidato já havia se candidatado à vaga.
+        """
+        with transaction.atomic():
+            try:
+                # Savepoint: um envio concorrente viola a restrição única
+                with transaction.atomic():
+                    application = Application.objects.create(
+                        candidate=user_profile,
+                        vacancy=vacancy,
+                        status='pending',
+                    )
+            except IntegrityError:
+                return Application.objects.get(candidate=user_profile, vacancy=vacancy), False
+
+            user = user_profile.user
+            changed = ApplicationSubmissionService.apply_user_changes(user, data)
+            if changed:
+                user.save(update_fields=changed)
+
+            complementary_info = ApplicationComplementaryInfo.objects.create(
+                application=application,
+                **ApplicationSubmissionService.complementary_info_values(data)
+            )
+
+            upload = (files or {}).get('atestado_pcd')
+            if upload:
+                transaction.on_commit(
+                    lambda: ApplicationSubmissionService.store_attachment(complementary_info.pk, upload)
+                )
+
+        return application, True
+
+
+class ApplicationScoreService:
+    """
+    Manutenção das colunas desnormalizadas ``avg_score`` e ``evaluation_count``.
+
+    O score é a média das médias de cada critério entre todas as avaliações,
+    arredondada em uma casa decimal.
+    """
+
+    @staticmethod
+    def score_subquery() -> Subquery:
+        """
+        Subconsulta com o score médio de todas as avaliações da candidatura
+        """
+        scores = ApplicationEvaluation.objects.filter(
+            application=OuterRef('pk')
+        ).order_by().values('application').annotate(
+            score=Round(
+                (Avg('technical_score') + Avg('experience_score') + Avg('cultural_fit_score')) / 3,
+                1
+            )
+        ).values('score')
+        return Subquery(scores[:1])
+
+    @staticmethod
+    def count_subquery() -> Coalesce:
+        """
+        Subconsulta com o número de avaliações da candidatura
+        """
+        counts = ApplicationEvaluation.objects.filter(
+            application=OuterRef('pk')
+        ).order_by().values('application').annotate(
+            total=Count('id')
+        ).values('total')
+        return Coalesce(Subquery(counts[:1]), 0)
+
+    @staticmethod
+    def refresh(queryset) -> int:
+        """
+        Recalcula score e contagem das candidaturas do queryset em um único
+        UPDATE, que bloqueia as linhas até o fim da transação corrente.
+        """
+        return queryset.update(
+            avg_score=ApplicationScoreService.score_subquery(),
+            evaluation_count=ApplicationScoreService.count_subquery(),
+        )
+
+    @staticmethod
+    def refresh_application(application_id) -> int:
+        """
+        Recalcula o score de uma candidatura
+        """
+        return ApplicationScoreService.refresh(Application.objects.filter(pk=application_id))
+
+    @staticmethod
+    def stale_applications(queryset=None):
+        """
+        Candidaturas cujas colunas desnormalizadas divergem das avaliações
+        """
+        queryset = Application.objects.all() if queryset is None else queryset
+        return queryset.annotate(
+            expected_score=ApplicationScoreService.score_subquery(),
+            expected_count=ApplicationScoreService.count_subquery(),
+        ).filter(
+            ~Q(evaluation_count=F('expected_count')) |
+            Q(avg_score__isnull=True, expected_score__isnull=False) |
+            Q(avg_score__isnull=False, expected_score__isnull=True) |
+            ~Q(avg_score=F('expected_score'))
+        )
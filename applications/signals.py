@@ -1,8 +1,9 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
-from .models import Application, Resume, Education, WorkExperience
+from .models import Application, ApplicationEvaluation, ApplicationFavorite, Resume, Education, WorkExperience
+from .services import ApplicationScoreService, FavoriteService
 
 
 @receiver(post_save, sender=Application)
@@ -31,6 +32,24 @@ def update_vacancy_status(sender, instance, created, **kwargs):
                 vacancy.save()
 
 
+@receiver(post_save, sender=ApplicationEvaluation)
+@receiver(post_delete, sender=ApplicationEvaluation)
+def update_application_score(sender, instance, **kwargs):
+    """
+    Mantém o score médio e o número de avaliações da candidatura atualizados.
+    """
+    ApplicationScoreService.refresh_application(instance.application_id)
+
+
+@receiver(post_save, sender=ApplicationFavorite)
+@receiver(post_delete, sender=ApplicationFavorite)
+def invalidate_favorites_cache(sender, instance, **kwargs):
+    """
+    Descarta o conjunto de favoritos em cache do recrutador.
+    """
+    FavoriteService.invalidate(instance.recruiter_id)
+
+
 @receiver(post_save, sender=Education)
 def update_education_dates(sender, instance, **kwargs):
     """
@@ -0,0 +1,532 @@
+import json
+import tempfile
+import warnings
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+from urllib.parse import quote
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from vacancies.models import Vacancy, Hospital, Department
+from .models import Application, ApplicationEvaluation, ApplicationFavorite, Education, Resume, WorkExperience
+from .services import ApplicationScoreService, ApplicationSubmissionService, FavoriteService
+from utils.pagination import KeysetPaginator
+
+User = get_user_model()
+
+
+class ApplicationTestDataMixin:
+    """Dados comuns para os testes de candidaturas."""
+
+    def create_base_data(self):
+        # Os favoritos ficam no cache compartilhado, que não é desfeito com a
+        # transação de cada teste
+        cache.clear()
+        self.recruiter = User.objects.create_user(
+            email="recrutador@teste.com",
+            password="testpass123",
+            first_name="Maria",
+            last_name="Recrutadora",
+            role='recruiter',
+        )
+        self.hospital = Hospital.objects.create(
+            name="Hospital Teste",
+            address="Rua Teste, 123",
+            city="São Paulo",
+            state="SP",
+            zip_code="01234-567",
+        )
+        self.department = Department.objects.create(
+            name="Centro Cirúrgico",
+            hospital=self.hospital,
+        )
+        self.vacancy = Vacancy.objects.create(
+            title="Enfermeiro",
+            description="Descrição",
+            requirements="Requisitos",
+            hospital=self.hospital,
+            department=self.department,
+            location="São Paulo, SP",
+            recruiter=self.recruiter,
+            status="published",
+        )
+
+    def create_applications(self, count, start=0):
+        applications = []
+        for index in range(start, start + count):
+            candidate = User.objects.create_user(
+                email=f"candidato{index}@teste.com",
+                password="testpass123",
+                first_name="Candidato",
+                last_name=str(index),
+            )
+            applications.append(
+                Application.objects.create(candidate=candidate.profile, vacancy=self.vacancy)
+            )
+        return applications
+
+
+class CandidaturasListingTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.client.login(email="recrutador@teste.com", password="testpass123")
+        self.url = reverse("applications:candidaturas")
+
+    def count_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        """O número de consultas é o mesmo para uma página com 1 ou 10 linhas."""
+        applications = self.create_applications(1)
+        ApplicationFavorite.objects.create(application=applications[0], recruiter=self.recruiter.profile)
+        # A primeira requisição coloca os favoritos do recrutador em cache
+        self.count_queries()
+        single_row = self.count_queries()
+
+        applications += self.create_applications(24, start=1)
+        for application in applications[:5]:
+            ApplicationEvaluation.objects.create(
+                application=application,
+                evaluator=self.recruiter.profile,
+                technical_score=8,
+                experience_score=7,
+                cultural_fit_score=6,
+            )
+        full_page = self.count_queries()
+        sorted_page = self.count_queries({'score_sort': 'high_to_low', 'page': 2})
+
+        self.assertEqual(single_row, full_page)
+        self.assertEqual(full_page, sorted_page)
+        self.assertLessEqual(full_page, 10)
+
+    def test_annotations_and_status_counts(self):
+        """Favorito, score médio e contagens por status vêm anotados na página."""
+        first, second, third = self.create_applications(3)
+        Application.objects.filter(pk=second.pk).update(status='approved')
+        ApplicationFavorite.objects.create(application=first, recruiter=self.recruiter.profile)
+        other = User.objects.create_user(email="outro@teste.com", password="testpass123", role='recruiter')
+        for evaluator, score in ((self.recruiter.profile, 9), (other.profile, 6)):
+            ApplicationEvaluation.objects.create(
+                application=first,
+                evaluator=evaluator,
+                technical_score=score,
+                experience_score=score,
+                cultural_fit_score=score,
+            )
+
+        response = self.client.get(self.url, {'score_sort': 'high_to_low'})
+
+        page = response.context['applications']
+        self.assertEqual([application.pk for application in page][0], first.pk)
+        self.assertTrue(page[0].is_favorite)
+        self.assertEqual(page[0].avg_score, 7.5)
+        self.assertFalse(any(application.is_favorite for application in page[1:]))
+        self.assertIsNone(page[1].avg_score)
+
+        counts = response.context['status_counts']
+        self.assertEqual(counts['total'], 3)
+        self.assertEqual(counts['pending'], 2)
+        self.assertEqual(counts['approved'], 1)
+        self.assertEqual(page.paginator.count, 3)
+
+
+class KeysetPaginationTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.client.login(email="recrutador@teste.com", password="testpass123")
+        self.applications = self.create_applications(12)
+        # Mesma data para todas: o desempate é feito pelo id
+        Application.objects.update(created_at=timezone.now())
+        self.expected = sorted(application.pk for application in self.applications)[::-1]
+
+    def test_pages_cover_all_rows_in_both_directions(self):
+        """Avançar e voltar por cursor percorre todas as linhas, sem repetições."""
+        paginator = KeysetPaginator(Application.objects.all(), 3)
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_cursor))
+
+        self.assertEqual([application.pk for page in pages for application in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        previous = paginator.get_page(pages[-1].previous_cursor)
+        self.assertEqual([application.pk for application in previous], [a.pk for a in pages[-2]])
+        self.assertTrue(previous.has_next())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Cursores adulterados são ignorados."""
+        page = KeysetPaginator(Application.objects.all(), 3).get_page('invalido')
+        self.assertEqual([application.pk for application in page], self.expected[:3])
+
+    def test_candidaturas_continues_from_cursor(self):
+        """A listagem informa o cursor da próxima página e a atende por keyset."""
+        url = reverse("applications:candidaturas")
+        first = self.client.get(url).context['applications']
+        self.assertTrue(first.next_cursor)
+
+        response = self.client.get(url, {'cursor': first.next_cursor})
+
+        page = response.context['applications']
+        self.assertEqual([application.pk for application in page], self.expected[10:])
+        self.assertContains(response, 'data-infinite-scroll="candidaturas"')
+        # A navegação da página por cursor usa os cursores, não números de página
+        self.assertContains(response, f'?cursor={quote(page.previous_cursor)}')
+        self.assertNotContains(response, '?page=')
+
+
+class FavoriteTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.client.login(email="recrutador@teste.com", password="testpass123")
+        self.applications = self.create_applications(3)
+        self.profile = self.recruiter.profile
+
+    def test_toggle_and_explicit_state(self):
+        """O toggle alterna o favorito e o estado explícito é idempotente."""
+        application = self.applications[0]
+        url = reverse("applications:toggle_favorite", args=[application.pk])
+
+        self.assertTrue(self.client.post(url).json()['is_favorite'])
+        self.assertIn(application.pk, FavoriteService.get_ids(self.profile))
+        self.assertFalse(self.client.post(url).json()['is_favorite'])
+        self.assertNotIn(application.pk, FavoriteService.get_ids(self.profile))
+
+        for _attempt in range(2):
+            self.assertTrue(self.client.post(url, {'is_favorite': 'true'}).json()['is_favorite'])
+        self.assertEqual(ApplicationFavorite.objects.filter(recruiter=self.profile).count(), 1)
+
+    def test_bulk_favorite(self):
+        """Favorita e remove várias candidaturas de uma vez."""
+        url = reverse("applications:bulk_favorite")
+        ids = [application.pk for application in self.applications]
+
+        response = self.client.post(url, {'action': 'add', 'application_ids': ids + [999999]})
+        self.assertEqual(response.json()['favorite_ids'], sorted(ids))
+
+        response = self.client.post(
+            url,
+            data=json.dumps({'action': 'remove', 'application_ids': ids[:2]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual(FavoriteService.get_ids(self.profile), frozenset(ids[2:]))
+
+    def test_cached_set_is_invalidated(self):
+        """Alterações fora do serviço (admin, cascata) também invalidam o cache."""
+        self.assertEqual(FavoriteService.get_ids(self.profile), frozenset())
+        favorite = ApplicationFavorite.objects.create(application=self.applications[0], recruiter=self.profile)
+        self.assertEqual(FavoriteService.get_ids(self.profile), frozenset([self.applications[0].pk]))
+        favorite.delete()
+        self.assertEqual(FavoriteService.get_ids(self.profile), frozenset())
+
+
+class ApplicationDetailTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.client.login(email="recrutador@teste.com", password="testpass123")
+        self.application = self.create_applications(1)[0]
+        self.url = reverse("applications:application_detail", args=[self.application.pk])
+
+    def add_details(self, index):
+        evaluator = User.objects.create_user(
+            email=f"avaliador{index}@teste.com", password="testpass123", role='recruiter'
+        )
+        ApplicationEvaluation.objects.create(
+            application=self.application,
+            evaluator=evaluator.profile,
+            technical_score=7,
+            experience_score=7,
+            cultural_fit_score=7,
+        )
+        resume, _created = Resume.objects.get_or_create(candidate=self.application.candidate)
+        Education.objects.create(
+            resume=resume, institution="USP", degree="Graduação", field_of_study="Enfermagem",
+            start_date=date(2010, 1, 1),
+        )
+        WorkExperience.objects.create(
+            resume=resume, company=f"Hospital {index}", position="Enfermeiro", start_date=date(2015, 1, 1),
+        )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_bounded(self):
+        """O número de consultas não depende de avaliações e itens do currículo."""
+        self.add_details(0)
+        self.count_queries()
+        few = self.count_queries()
+
+        for index in range(1, 5):
+            self.add_details(index)
+        many = self.count_queries()
+
+        self.assertEqual(few, many)
+        # Sessão, usuário, perfil, candidatura e três prefetches
+        self.assertLessEqual(many, 7)
+
+    def test_post_saves_once_with_changed_fields(self):
+        """O POST grava a candidatura uma única vez e só com os campos alterados."""
+        data = {
+            'save_all': '1',
+            'status': 'under_review',
+            'recruiter_notes': '',
+            'is_favorite': 'on',
+            'technical_score': 8,
+            'experience_score': 6,
+            'cultural_fit_score': 7,
+            'comments': 'Boa candidata',
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data)
+
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        saves = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "applications_application" SET "status"')
+        ]
+        self.assertEqual(len(saves), 1)
+        self.assertNotIn('recruiter_notes', saves[0])
+
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'under_review')
+        self.assertEqual(self.application.avg_score, Decimal('7.0'))
+        self.assertIn(self.application.pk, FavoriteService.get_ids(self.recruiter.profile))
+
+
+class ApplicationSubmissionTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.candidate = User.objects.create_user(
+            email="candidata@teste.com",
+            password="testpass123",
+            first_name="Ana",
+            last_name="Souza",
+            city="Recife",
+        )
+        self.data = {
+            'nome_completo': 'Ana Souza',
+            'cidade': 'Recife',
+            'whatsapp': '81999990000',
+            'data_nascimento': '1990-05-10',
+            'trabalha_atualmente': 'nao',
+            'is_pcd': 'sim',
+            'declaracao_veracidade': 'sim',
+        }
+
+    def test_saves_only_changed_user_fields(self):
+        """Apenas os campos alterados do usuário entram no UPDATE."""
+        with CaptureQueriesContext(connection) as queries:
+            application, created = ApplicationSubmissionService.submit(
+                self.candidate.profile, self.vacancy, self.data
+            )
+
+        self.assertTrue(created)
+        self.assertTrue(application.complementary_info.declaracao_veracidade)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "users_user"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"whatsapp"', updates[0])
+        self.assertIn('"date_of_birth"', updates[0])
+        self.assertNotIn('"city"', updates[0])
+        self.assertNotIn('"first_name"', updates[0])
+
+    def test_repeated_submission_is_idempotent(self):
+        """Um segundo envio devolve a candidatura existente sem duplicar nada."""
+        first, _created = ApplicationSubmissionService.submit(self.candidate.profile, self.vacancy, self.data)
+        second, created = ApplicationSubmissionService.submit(
+            self.candidate.profile, self.vacancy, dict(self.data, cidade='Olinda')
+        )
+
+        self.assertFalse(created)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Application.objects.filter(vacancy=self.vacancy).count(), 1)
+        self.candidate.refresh_from_db()
+        self.assertEqual(self.candidate.city, 'Recife')
+
+    def test_attachment_is_stored_after_commit(self):
+        """O atestado PCD só é gravado no storage após o commit."""
+        upload = SimpleUploadedFile('atestado.pdf', b'%PDF-1.4 teste', content_type='application/pdf')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                application, _created = ApplicationSubmissionService.submit(
+                    self.candidate.profile, self.vacancy, self.data, {'atestado_pcd': upload}
+                )
+            self.assertFalse(application.complementary_info.atestado_pcd)
+
+            for callback in callbacks:
+                callback()
+
+            application.complementary_info.refresh_from_db()
+            self.assertTrue(application.complementary_info.atestado_pcd.name.startswith('pcd_atestados/'))
+
+    def test_attachment_storage_failure_keeps_submission(self):
+        """Uma falha do storage após o commit é registrada e não quebra o envio."""
+        upload = SimpleUploadedFile('atestado.pdf', b'%PDF-1.4 teste', content_type='application/pdf')
+        with patch('django.core.files.storage.FileSystemStorage.save', side_effect=OSError('disco cheio')):
+            with self.assertLogs('applications.services', level='ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    application, created = ApplicationSubmissionService.submit(
+                        self.candidate.profile, self.vacancy, self.data, {'atestado_pcd': upload}
+                    )
+
+        self.assertTrue(created)
+        application.complementary_info.refresh_from_db()
+        self.assertFalse(application.complementary_info.atestado_pcd)
+
+
+class ExportCandidaturasTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.client.login(email="recrutador@teste.com", password="testpass123")
+        self.url = reverse("applications:export_candidaturas")
+
+    def test_csv_is_streamed_with_all_rows(self):
+        """O CSV é enviado em streaming com uma linha por candidatura."""
+        self.create_applications(3)
+        response = self.client.get(self.url, {'format': 'csv'})
+
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        lines = content.lstrip('\ufeff').strip().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('Nome Completo,Email'))
+        self.assertIn('Hospital Teste', lines[1])
+
+    def test_csv_is_streamed_in_batches_under_asgi(self):
+        """Sob ASGI o CSV é gerado aos poucos, sem montar a exportação inteira em memória."""
+        from applications import exports
+
+        self.create_applications(3)
+        response = self.client.get(self.url, {'format': 'csv'})
+        expected_lines = 4
+
+        async def consume():
+            content = response.__aiter__()
+            first = await content.__anext__()
+            rows_before_first_part = row.call_count
+            rest = [part async for part in content]
+            return first, rows_before_first_part, rest
+
+        with patch.object(exports, 'ASYNC_STREAM_BATCH', 1), \
+                patch.object(exports, 'application_row', wraps=exports.application_row) as row, \
+                warnings.catch_warnings():
+            # O Django avisa quando consome um iterador síncrono de uma vez
+            warnings.simplefilter('error')
+            first, rows_before_first_part, rest = async_to_sync(consume)()
+
+        self.assertEqual(rows_before_first_part, 0)
+        content = b''.join([first] + rest).decode('utf-8')
+        self.assertEqual(len(content.lstrip('\ufeff').strip().splitlines()), expected_lines)
+        self.assertEqual(row.call_count, 3)
+
+    def test_query_count_does_not_depend_on_row_count(self):
+        """Os dados relacionados são obtidos na mesma consulta das candidaturas."""
+        self.create_applications(1)
+        with CaptureQueriesContext(connection) as single:
+            b''.join(self.client.get(self.url).streaming_content)
+
+        self.create_applications(10, start=1)
+        with CaptureQueriesContext(connection) as many:
+            b''.join(self.client.get(self.url).streaming_content)
+
+        self.assertEqual(len(single), len(many))
+
+    def test_csv_without_server_side_cursors(self):
+        """Com PgBouncer (sem cursores no servidor) a exportação lê em blocos e mantém a ordem."""
+        from unittest import mock
+
+        self.create_applications(5)
+        expected = b''.join(self.client.get(self.url, {'format': 'csv'}).streaming_content)
+
+        with mock.patch.dict(connection.settings_dict, {'DISABLE_SERVER_SIDE_CURSORS': True}), \
+                mock.patch('applications.exports.EXPORT_CHUNK_SIZE', 2), \
+                CaptureQueriesContext(connection) as queries:
+            content = b''.join(self.client.get(self.url, {'format': 'csv'}).streaming_content)
+
+        self.assertEqual(content, expected)
+        self.assertEqual(sum('"id" IN' in query['sql'] for query in queries), 3)
+
+    def test_excel_export(self):
+        """A planilha Excel é gerada com cabeçalho e linhas."""
+        import io
+        import openpyxl
+
+        self.create_applications(2)
+        response = self.client.get(self.url, {'format': 'excel'})
+
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        rows = list(workbook['Candidaturas'].values)
+        self.assertEqual(rows[0][0], 'Nome Completo')
+        self.assertEqual(len(rows), 3)
+
+
+class ApplicationScoreTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.application = self.create_applications(1)[0]
+
+    def evaluate(self, evaluator, technical, experience, cultural_fit):
+        return ApplicationEvaluation.objects.create(
+            application=self.application,
+            evaluator=evaluator,
+            technical_score=technical,
+            experience_score=experience,
+            cultural_fit_score=cultural_fit,
+        )
+
+    def test_score_follows_evaluation_changes(self):
+        """Score e contagem acompanham avaliações criadas, alteradas e removidas."""
+        other = User.objects.create_user(email="outro@teste.com", password="testpass123", role='recruiter')
+        first = self.evaluate(self.recruiter.profile, 9, 8, 7)
+        self.evaluate(other.profile, 6, 6, 6)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.avg_score, Decimal('7.0'))
+        self.assertEqual(self.application.evaluation_count, 2)
+
+        first.technical_score = 10
+        first.save()
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.avg_score, Decimal('7.2'))
+
+        ApplicationEvaluation.objects.filter(application=self.application).delete()
+        self.application.refresh_from_db()
+        self.assertIsNone(self.application.avg_score)
+        self.assertEqual(self.application.evaluation_count, 0)
+
+    def test_command_repairs_stale_scores(self):
+        """O comando recalcula apenas as candidaturas divergentes."""
+        self.evaluate(self.recruiter.profile, 8, 8, 8)
+        Application.objects.filter(pk=self.application.pk).update(avg_score=None, evaluation_count=0)
+        self.assertEqual(ApplicationScoreService.stale_applications().count(), 1)
+
+        out = StringIO()
+        call_command('refresh_application_scores', stdout=out)
+
+        self.assertIn('1 candidaturas atualizadas', out.getvalue())
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.avg_score, Decimal('8.0'))
+        self.assertEqual(self.application.evaluation_count, 1)
+        self.assertFalse(ApplicationScoreService.stale_applications().exists())
@@ -23,6 +23,7 @@ urlpatterns = [
     path('recruiter/candidaturas/', views.candidaturas, name='candidaturas'),
     path('export/', views.export_candidaturas, name='export_candidaturas'),
     path('toggle-favorite/<int:application_id>/', views.toggle_favorite, name='toggle_favorite'),
+    path('favorites/bulk/', views.bulk_favorite, name='bulk_favorite'),
     
     # APIs
     path('api/available-for-interview/', views.available_for_interview, name='available_for_interview'),
@@ -1,8 +1,9 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Avg, Count, Q
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
@@ -19,7 +20,7 @@ from rest_framework.permissions import IsAuthenticated
 
 from users.models import UserProfile, TechnicalSkill, SoftSkill, Certification, Language, Education as UserEducation, Experience as UserExperience
 from vacancies.models import Vacancy, Hospital
-from .models import Application, ApplicationEvaluation, Resume, Education, WorkExperience, ApplicationFavorite, ApplicationComplementaryInfo
+from .models import Application, ApplicationEvaluation, Resume, Education, WorkExperience, ApplicationComplementaryInfo
 from .forms import (
     ApplicationForm, ApplicationEvaluationForm, ResumeForm, 
     EducationForm, WorkExperienceForm, ApplicationStatusForm
@@ -31,15 +32,12 @@ from .serializers import (
     WorkExperienceSerializer, WorkExperienceCreateUpdateSerializer
 )
 from .permissions import IsOwnerOrRecruiter, IsRecruiterOrAdmin, IsResumeOwner, IsEducationOrExperienceOwner
+from utils.pagination import OptionalKeysetPagination
+from utils.search import CandidateSearch
+from .services import ApplicationDetailService, ApplicationFilterService, ApplicationListService, FavoriteService
+from .exports import export_queryset, stream_csv, stream_excel
 
-import csv
-import openpyxl
-from openpyxl.utils.dataframe import dataframe_to_rows
-import pandas as pd
-from io import BytesIO
-from django.http import HttpResponse
 from django.utils import timezone
-from datetime import timedelta
 
 
 # Views para interface web
@@ -86,61 +84,29 @@ def application_list(request):
                 applications = applications.filter(created_at__gte=timezone.now() - timezone.timedelta(days=90))
                 
         if search_query:
-            applications = applications.filter(
-                Q(candidate__user__first_name__icontains=search_query) |
-                Q(candidate__user__last_name__icontains=search_query) |
-                Q(candidate__user__email__icontains=search_query) |
-                Q(vacancy__title__icontains=search_query)
+            applications = CandidateSearch.filter(
+                applications, search_query, user_path='candidate__user', vacancy_path='vacancy'
             )
             
         if favorites_filter:
             # Filtro para favoritos
             if favorites_filter == 'true':
-                applications = applications.filter(favorites__recruiter=user_profile)
-            
-        # Ordenação por score
-        if score_sort == 'high_to_low':
-            applications = applications.annotate(
-                avg_score=(Avg('evaluations__technical_score') + 
-                         Avg('evaluations__experience_score') + 
-                         Avg('evaluations__cultural_fit_score')) / 3
-            ).order_by('-avg_score')
-        elif score_sort == 'low_to_high':
-            applications = applications.annotate(
-                avg_score=(Avg('evaluations__technical_score') + 
-                         Avg('evaluations__experience_score') + 
-                         Avg('evaluations__cultural_fit_score')) / 3
-            ).order_by('avg_score')
-        else:
-            # Ordenação padrão por data de criação
-            applications = applications.order_by('-created_at')
+                applications = applications.filter(pk__in=FavoriteService.for_request(request))
             
         template = 'applications/recruiter_application_list.html'
     
     # Contagem de candidaturas por status
     status_counts = {}
     if request.user.role in ['recruiter', 'recrutador', 'admin']:
-        # Adiciona informações sobre favoritos e score médio
-        for application in applications:
-            application.is_favorite = application.favorites.filter(recruiter=user_profile).exists()
-            
-            # Calcula o score médio se houver avaliações
-            if application.evaluations.exists():
-                evaluation = application.evaluations.first()
-                total_score = evaluation.technical_score + evaluation.experience_score + evaluation.cultural_fit_score
-                application.avg_score = round(total_score / 3, 1)
-            else:
-                application.avg_score = None
-        
-        status_counts = {
-            'total': applications.count(),
-            'pending': applications.filter(status='pending').count(),
-            'under_review': applications.filter(status='under_review').count(),
-            'interview': applications.filter(status='interview').count(),
-            'approved': applications.filter(status='approved').count(),
-            'rejected': applications.filter(status='rejected').count(),
-            'withdrawn': applications.filter(status='withdrawn').count(),
-        }
+        # Pagina antes de carregar os dados; favorito e score vêm anotados em SQL
+        applications, status_counts = ApplicationListService.build_page(
+            applications,
+            user_profile,
+            page_number=request.GET.get('page'),
+            score_sort=score_sort,
+            search=search_query,
+            cursor=request.GET.get('cursor'),
+        )
     
     context = {
         'applications': applications,
@@ -163,7 +129,7 @@ def application_detail(request, pk):
     """
     Exibe os detalhes de uma candidatura específica.
     """
-    application = get_object_or_404(Application, pk=pk)
+    application = get_object_or_404(ApplicationDetailService.queryset(), pk=pk)
     
     # Verifica se o usuário tem perfil, se não tiver, cria um
     try:
@@ -172,29 +138,17 @@ def application_detail(request, pk):
         user_profile = UserProfile.objects.create(user=request.user)
     
     # Verifica permissões
-    if request.user.role == 'candidate' and application.candidate != user_profile:
+    if request.user.role == 'candidate' and application.candidate_id != user_profile.pk:
         messages.error(request, _('Você não tem permissão para acessar esta candidatura.'))
         return redirect('applications:application_list')
     
     # Verifica se é favorito
-    application.is_favorite = False
-    if request.user.role in ['recruiter', 'recrutador', 'admin']:
-        application.is_favorite = application.favorites.filter(recruiter=user_profile).exists()
+    application.is_favorite = application.pk in FavoriteService.for_request(request)
     
-    # Busca todas as informações do candidato
+    # Candidato, currículo detalhado e informações complementares já vêm carregados
     candidate = application.candidate
-    
-    # Busca currículo detalhado se existir
-    try:
-        detailed_resume = Resume.objects.get(candidate=candidate)
-    except Resume.DoesNotExist:
-        detailed_resume = None
-    
-    # Busca informações complementares se existir
-    try:
-        complementary_info = ApplicationComplementaryInfo.objects.get(application=application)
-    except ApplicationComplementaryInfo.DoesNotExist:
-        complementary_info = None
+    detailed_resume = ApplicationDetailService.related_or_none(candidate, 'detailed_resume')
+    complementary_info = ApplicationDetailService.related_or_none(application, 'complementary_info')
     
     # Formulário de avaliação para recrutadores
     evaluation_form = None
@@ -202,57 +156,11 @@ def application_detail(request, pk):
     
     if request.user.role in ['recruiter', 'recrutador', 'admin']:
         # Verifica se já existe uma avaliação deste recrutador
-        try:
-            existing_evaluation = ApplicationEvaluation.objects.get(
-                application=application, 
-                evaluator=user_profile
-            )
-        except ApplicationEvaluation.DoesNotExist:
-            existing_evaluation = None
+        existing_evaluation = ApplicationDetailService.evaluation_by(application, user_profile)
         
         # Processa o formulário único de salvar todas as informações
         if request.method == 'POST' and 'save_all' in request.POST:
-            # Atualiza status se fornecido
-            if 'status' in request.POST:
-                application.status = request.POST['status']
-                application.save()
-            
-            # Atualiza notas do recrutador
-            if 'recruiter_notes' in request.POST:
-                application.recruiter_notes = request.POST.get('recruiter_notes', '')
-                application.save()
-            
-            # Processa favoritar
-            is_favorite = request.POST.get('is_favorite') == 'on'
-            if is_favorite:
-                ApplicationFavorite.objects.get_or_create(
-                    application=application,
-                    recruiter=user_profile
-                )
-            else:
-                ApplicationFavorite.objects.filter(
-                    application=application,
-                    recruiter=user_profile
-                ).delete()
-            
-            # Processa avaliação
-            if existing_evaluation:
-                # Atualiza avaliação existente
-                existing_evaluation.technical_score = request.POST.get('technical_score', 0)
-                existing_evaluation.experience_score = request.POST.get('experience_score', 0)
-                existing_evaluation.cultural_fit_score = request.POST.get('cultural_fit_score', 0)
-                existing_evaluation.comments = request.POST.get('comments', '')
-                existing_evaluation.save()
-            else:
-                # Cria nova avaliação
-                evaluation = ApplicationEvaluation.objects.create(
-                    application=application,
-                    evaluator=user_profile,
-                    technical_score=request.POST.get('technical_score', 0),
-                    experience_score=request.POST.get('experience_score', 0),
-                    cultural_fit_score=request.POST.get('cultural_fit_score', 0),
-                    comments=request.POST.get('comments', '')
-                )
+            ApplicationDetailService.save(application, user_profile, request.POST, existing_evaluation)
             
             messages.success(request, _('Todas as informações foram salvas com sucesso!'))
             return redirect('applications:application_detail', pk=pk)
@@ -657,113 +565,38 @@ def candidaturas(request):
     
     user_profile = request.user.profile
     
-    # Obtém todas as candidaturas
-    applications = Application.objects.all()
-    
     # Filtros
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        applications = applications.filter(status=status_filter)
-    
-    vacancy_filter = request.GET.get('vacancy', '')
-    if vacancy_filter:
-        applications = applications.filter(vacancy_id=vacancy_filter)
-    
-    hospital_filter = request.GET.get('hospital', '')
-    if hospital_filter:
-        applications = applications.filter(vacancy__hospital_id=hospital_filter)
-    
-    date_filter = request.GET.get('date', '')
-    if date_filter:
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        today = timezone.now().date()
-        if date_filter == 'today':
-            applications = applications.filter(created_at__date=today)
-        elif date_filter == 'week':
-            week_ago = today - timedelta(days=7)
-            applications = applications.filter(created_at__date__gte=week_ago)
-        elif date_filter == 'month':
-            month_ago = today - timedelta(days=30)
-            applications = applications.filter(created_at__date__gte=month_ago)
-    
-    search_query = request.GET.get('search', '')
-    if search_query:
-        applications = applications.filter(
-            Q(candidate__user__first_name__icontains=search_query) |
-            Q(candidate__user__last_name__icontains=search_query) |
-            Q(candidate__user__email__icontains=search_query)
-        )
-    
-    # Filtro de favoritos
-    favorites_filter = request.GET.get('favorites', '')
-    if favorites_filter == 'true':
-        applications = applications.filter(favorites__recruiter=user_profile)
-    
-    # Ordenação por score
-    score_sort = request.GET.get('score_sort', '')
-    if score_sort == 'high_to_low':
-        applications = applications.annotate(
-            avg_score=(Avg('evaluations__technical_score') + 
-                     Avg('evaluations__experience_score') + 
-                     Avg('evaluations__cultural_fit_score')) / 3
-        ).order_by('-avg_score')
-    elif score_sort == 'low_to_high':
-        applications = applications.annotate(
-            avg_score=(Avg('evaluations__technical_score') + 
-                     Avg('evaluations__experience_score') + 
-                     Avg('evaluations__cultural_fit_score')) / 3
-        ).order_by('avg_score')
-    else:
-        # Ordenação padrão por data de criação
-        applications = applications.order_by('-created_at')
-    
-    # Adiciona informações sobre favoritos
-    for application in applications:
-        application.is_favorite = application.favorites.filter(recruiter=user_profile).exists()
-        
-        # Calcula o score médio se houver avaliações
-        if application.evaluations.exists():
-            evaluation = application.evaluations.first()
-            total_score = evaluation.technical_score + evaluation.experience_score + evaluation.cultural_fit_score
-            application.avg_score = round(total_score / 3, 1)
-        else:
-            application.avg_score = None
+    filters = ApplicationFilterService.get_filters(request.GET)
+    applications = ApplicationFilterService.filter_queryset(
+        Application.objects.all(), filters, user_profile
+    )
     
-    # Contagem de candidaturas por status
-    status_counts = {
-        'total': applications.count(),
-        'pending': applications.filter(status='pending').count(),
-        'under_review': applications.filter(status='under_review').count(),
-        'interview': applications.filter(status='interview').count(),
-        'approved': applications.filter(status='approved').count(),
-        'rejected': applications.filter(status='rejected').count(),
-        'withdrawn': applications.filter(status='withdrawn').count(),
-    }
+    # Paginação primeiro; favorito, score e contagens por status vêm do SQL
+    applications, status_counts = ApplicationListService.build_page(
+        applications,
+        user_profile,
+        page_number=request.GET.get('page'),
+        score_sort=filters['score_sort'],
+        search=filters['search'],
+        cursor=request.GET.get('cursor'),
+    )
     
     # Obtém dados para os filtros - todas as vagas e hospitais
     vacancies = Vacancy.objects.all()
     hospitals = Hospital.objects.all()
     
-    # Paginação
-    from django.core.paginator import Paginator
-    paginator = Paginator(applications, 10)
-    page_number = request.GET.get('page')
-    applications = paginator.get_page(page_number)
-    
     context = {
         'applications': applications,
         'vacancies': vacancies,
         'hospitals': hospitals,
         'status_counts': status_counts,
-        'status_filter': status_filter,
-        'vacancy_filter': vacancy_filter,
-        'hospital_filter': hospital_filter,
-        'date_filter': date_filter,
-        'search_query': search_query,
-        'score_sort': score_sort,
-        'favorites_filter': favorites_filter,
+        'status_filter': filters['status'],
+        'vacancy_filter': filters['vacancy'],
+        'hospital_filter': filters['hospital'],
+        'date_filter': filters['date'],
+        'search_query': filters['search'],
+        'score_sort': filters['score_sort'],
+        'favorites_filter': filters['favorites'],
         'page_title': _('Candidaturas'),
     }
     
@@ -890,39 +723,29 @@ def minhas_candidaturas(request):
 def toggle_favorite(request, application_id):
     """
     Adiciona ou remove uma candidatura dos favoritos.
+
+    Com ``is_favorite`` (``true``/``false``) no POST o estado é definido
+    explicitamente, e repetir a requisição não o altera.
     """
     if request.user.role not in ['recruiter', 'recrutador', 'admin']:
         return JsonResponse({'error': 'Permissão negada'}, status=403)
     
     try:
-        application = Application.objects.get(pk=application_id)
+        if not Application.objects.filter(pk=application_id).exists():
+            raise Application.DoesNotExist
         user_profile = request.user.profile
         
-        # Verifica se já é favorito
-        try:
-            favorite = ApplicationFavorite.objects.get(
-                application=application,
-                recruiter=user_profile
-            )
-            is_favorite = True
-        except ApplicationFavorite.DoesNotExist:
-            favorite = None
-            is_favorite = False
+        requested = request.POST.get('is_favorite')
+        if requested in ('true', 'false'):
+            is_favorite = requested == 'true'
+            FavoriteService.set_favorite(user_profile, application_id, is_favorite)
+        else:
+            is_favorite = FavoriteService.toggle(user_profile, application_id)
         
-        # Processa a ação baseada no estado atual
         if is_favorite:
-            # Remove dos favoritos
-            favorite.delete()
-            is_favorite = False
-            message = 'Candidatura removida dos favoritos'
-        else:
-            # Adiciona aos favoritos
-            ApplicationFavorite.objects.create(
-                application=application,
-                recruiter=user_profile
-            )
-            is_favorite = True
             message = 'Candidatura adicionada aos favoritos'
+        else:
+            message = 'Candidatura removida dos favoritos'
         
         return JsonResponse({
             'success': True,
@@ -936,6 +759,51 @@ def toggle_favorite(request, application_id):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@require_http_methods(["POST"])
+@login_required
+def bulk_favorite(request):
+    """
+    Adiciona (``action=add``) ou remove (``action=remove``) várias
+    candidaturas dos favoritos. Os IDs vêm em ``application_ids``, no POST
+    ou em um corpo JSON.
+    """
+    if request.user.role not in ['recruiter', 'recrutador', 'admin']:
+        return JsonResponse({'error': 'Permissão negada'}, status=403)
+    
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'JSON inválido'}, status=400)
+        action_name = data.get('action')
+        application_ids = data.get('application_ids') or []
+    else:
+        action_name = request.POST.get('action')
+        application_ids = request.POST.getlist('application_ids')
+    
+    try:
+        application_ids = {int(application_id) for application_id in application_ids}
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'IDs de candidatura inválidos'}, status=400)
+    
+    user_profile = request.user.profile
+    if action_name == 'add':
+        count = FavoriteService.add(user_profile, application_ids)
+        message = f'{count} candidatura(s) adicionada(s) aos favoritos'
+    elif action_name == 'remove':
+        count = FavoriteService.remove(user_profile, application_ids)
+        message = f'{count} candidatura(s) removida(s) dos favoritos'
+    else:
+        return JsonResponse({'error': 'Ação inválida'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'count': count,
+        'favorite_ids': sorted(FavoriteService.get_ids(user_profile)),
+        'message': message
+    })
+
+
 @login_required
 def export_candidaturas(request):
     """
@@ -949,242 +817,21 @@ def export_candidaturas(request):
     # Obtém o formato de exportação
     export_format = request.GET.get('format', 'csv')
     
-    # Aplica os mesmos filtros da view de candidaturas
-    applications = Application.objects.all()
-    
-    # Filtros
-    status_filter = request.GET.get('status', '')
-    if status_filter:
-        applications = applications.filter(status=status_filter)
-    
-    vacancy_filter = request.GET.get('vacancy', '')
-    if vacancy_filter:
-        applications = applications.filter(vacancy_id=vacancy_filter)
-    
-    hospital_filter = request.GET.get('hospital', '')
-    if hospital_filter:
-        applications = applications.filter(vacancy__hospital_id=hospital_filter)
-    
-    date_filter = request.GET.get('date', '')
-    if date_filter:
-        today = timezone.now().date()
-        if date_filter == 'today':
-            applications = applications.filter(created_at__date=today)
-        elif date_filter == 'week':
-            week_ago = today - timedelta(days=7)
-            applications = applications.filter(created_at__date__gte=week_ago)
-        elif date_filter == 'month':
-            month_ago = today - timedelta(days=30)
-            applications = applications.filter(created_at__date__gte=month_ago)
-    
-    search_filter = request.GET.get('search', '')
-    if search_filter:
-        applications = applications.filter(
-            Q(candidate__user__first_name__icontains=search_filter) |
-            Q(candidate__user__last_name__icontains=search_filter) |
-            Q(candidate__user__email__icontains=search_filter)
-        )
-    
-    # Filtro de favoritos
-    favorites_filter = request.GET.get('favorites', '')
-    if favorites_filter == 'true':
-        applications = applications.filter(favorites__recruiter=request.user.profile)
-    
-    # Ordenação por score
-    score_sort = request.GET.get('score_sort', '')
-    if score_sort == 'high_to_low':
-        applications = applications.annotate(
-            avg_score=(Avg('evaluations__technical_score') + 
-                     Avg('evaluations__experience_score') + 
-                     Avg('evaluations__cultural_fit_score')) / 3
-        ).order_by('-avg_score')
-    elif score_sort == 'low_to_high':
-        applications = applications.annotate(
-            avg_score=(Avg('evaluations__technical_score') + 
-                     Avg('evaluations__experience_score') + 
-                     Avg('evaluations__cultural_fit_score')) / 3
-        ).order_by('avg_score')
-    else:
-        # Ordenação padrão por data de criação
-        applications = applications.order_by('-created_at')
-    
-    # Prepara os dados para exportação
-    data = []
-    for application in applications:
-        # Calcula o score médio se houver avaliações
-        avg_score = None
-        if application.evaluations.exists():
-            evaluation = application.evaluations.first()
-            total_score = evaluation.technical_score + evaluation.experience_score + evaluation.cultural_fit_score
-            avg_score = round(total_score / 3, 1)
-        
-        # Obtém informações do candidato
-        candidate = application.candidate
-        user = candidate.user
-        
-        # Tenta obter o perfil de candidato se existir
-        candidate_profile = None
-        try:
-            candidate_profile = user.candidate_profile
-        except:
-            pass
-        
-        # Obtém informações da vaga e hospital
-        vacancy = application.vacancy
-        hospital_name = vacancy.hospital.name if vacancy.hospital else "N/A"
-        hospital_location = f"{vacancy.hospital.city}, {vacancy.hospital.state}" if vacancy.hospital else "N/A"
-        
-        # Status em português
-        status_map = {
-            'pending': 'Pendente',
-            'under_review': 'Em Análise',
-            'interview': 'Entrevista',
-            'approved': 'Aprovado',
-            'rejected': 'Rejeitado',
-            'withdrawn': 'Desistência'
-        }
-        
-        # Obtém dados priorizando CandidateProfile quando disponível
-        telefone = user.phone
-        if candidate_profile and candidate_profile.phone:
-            telefone = candidate_profile.phone
-        
-        whatsapp = user.whatsapp
-        if candidate_profile and candidate_profile.whatsapp:
-            whatsapp = candidate_profile.whatsapp
-            
-        cpf = user.cpf
-        if candidate_profile and candidate_profile.cpf:
-            cpf = candidate_profile.cpf
-            
-        endereco = user.address
-        if candidate_profile and candidate_profile.address:
-            endereco = candidate_profile.address
-            
-        cidade = user.city
-        if candidate_profile and candidate_profile.city:
-            cidade = candidate_profile.city
-            
-        estado = user.state
-        if candidate_profile and candidate_profile.state:
-            estado = candidate_profile.state
-            
-        cep = user.zip_code
-        if candidate_profile and candidate_profile.zip_code:
-            cep = candidate_profile.zip_code
-        
-        row = {
-            'Nome Completo': user.get_full_name(),
-            'Email': user.email,
-            'Telefone': telefone or 'N/A',
-            'WhatsApp': whatsapp or 'N/A',
-            'CPF': cpf or 'N/A',
-            'Data de Nascimento': user.date_of_birth.strftime('%d/%m/%Y') if user.date_of_birth else 'N/A',
-            'Endereço': endereco or 'N/A',
-            'Cidade': cidade or 'N/A',
-            'Estado': estado or 'N/A',
-            'CEP': cep or 'N/A',
-            'Vaga': vacancy.title,
-            'Hospital': hospital_name,
-            'Localização': hospital_location,
-            'Status': status_map.get(application.status, application.status),
-            'Score': avg_score if avg_score else 'N/A',
-            'Data da Candidatura': application.created_at.strftime('%d/%m/%Y %H:%M'),
-            'Carta de Apresentação': application.cover_letter or 'N/A',
-            'Notas do Recrutador': application.recruiter_notes or 'N/A'
-        }
-        data.append(row)
+    # Aplica os mesmos filtros e a mesma ordenação da view de candidaturas
+    filters = ApplicationFilterService.get_filters(request.GET)
+    applications = ApplicationFilterService.filter_queryset(
+        Application.objects.all(), filters, request.user.profile
+    )
+    applications = export_queryset(applications, filters['score_sort'], filters['search'])
     
     # Nome do arquivo
     timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
     filename = f'candidaturas_{timestamp}'
     
     if export_format == 'excel':
-        return export_as_excel_candidaturas(data, filename)
+        return stream_excel(applications, filename)
     else:
-        return export_as_csv_candidaturas(data, filename)
-
-
-def export_as_csv_candidaturas(data, filename):
-    """
-    Exporta candidaturas para CSV.
-    """
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
-    
-    # Adiciona BOM para UTF-8
-    response.write('\ufeff')
-    
-    if not data:
-        return response
-    
-    writer = csv.DictWriter(response, fieldnames=data[0].keys())
-    writer.writeheader()
-    writer.writerows(data)
-    
-    return response
-
-
-def export_as_excel_candidaturas(data, filename):
-    """
-    Exporta candidaturas para Excel.
-    """
-    if not data:
-        # Retorna um arquivo Excel vazio
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Candidaturas"
-        ws['A1'] = "Nenhuma candidatura encontrada"
-        
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
-        
-        wb.save(response)
-        return response
-    
-    # Cria um DataFrame com os dados
-    df = pd.DataFrame(data)
-    
-    # Cria o arquivo Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Candidaturas"
-    
-    # Adiciona os dados
-    for r in dataframe_to_rows(df, index=False, header=True):
-        ws.append(r)
-    
-    # Ajusta a largura das colunas
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Formata o cabeçalho
-    from openpyxl.styles import Font, PatternFill
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-    
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
-    
-    wb.save(response)
-    return response
+        return stream_csv(applications, filename)
 
 
 # API Views
@@ -1198,6 +845,8 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['vacancy__title', 'candidate__user__first_name', 'candidate__user__last_name']
     ordering_fields = ['created_at', 'updated_at', 'status']
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -1210,12 +859,17 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         user_profile = self.request.user.profile
         
         # Candidatos veem apenas suas próprias candidaturas
-        if request.user.role == 'candidate':
+        if self.request.user.role == 'candidate':
             return Application.objects.filter(candidate=user_profile)
         
         # Recrutadores e administradores veem todas as candidaturas
         return Application.objects.all()
     
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['favorite_ids'] = FavoriteService.for_request(self.request)
+        return context
+    
     def perform_create(self, serializer):
         serializer.save(candidate=self.request.user.profile)
     
@@ -10,7 +10,8 @@ from .models import (
     EmailTemplate, 
     EmailTrigger, 
     EmailQueue, 
-    EmailLog
+    EmailLog,
+    EmailCampaign
 )
 
 
@@ -26,7 +27,11 @@ class SMTPConfigurationAdmin(admin.ModelAdmin):
             'fields': ('name', 'is_active', 'is_default')
         }),
         ('Configurações do Servidor', {
-            'fields': ('host', 'port', 'use_tls', 'use_ssl')
+            'fields': ('host', 'port', 'use_tls', 'use_ssl', 'max_messages_per_connection')
+        }),
+        ('Limites de Envio', {
+            'fields': ('rate_limit_per_second', 'rate_limit_per_minute', 'rate_limit_per_hour'),
+            'description': 'Limites do provedor. Ao receber respostas 421/451 o envio é reduzido automaticamente.'
         }),
         ('Autenticação', {
             'fields': ('username', 'password')
@@ -122,19 +127,19 @@ class EmailQueueAdmin(admin.ModelAdmin):
         'to_email', 'subject_preview', 'trigger', 'status', 'priority', 
         'scheduled_at', 'sent_at', 'retry_count'
     ]
-    list_filter = ['status', 'priority', 'trigger__trigger_type', 'scheduled_at', 'sent_at']
+    list_filter = ['status', 'priority', 'trigger__trigger_type', 'campaign', 'scheduled_at', 'sent_at']
     search_fields = ['to_email', 'to_name', 'subject', 'trigger__name']
     readonly_fields = [
         'created_at', 'updated_at', 'sent_at', 'retry_count', 
-        'html_content_preview', 'context_data_preview'
+        'html_content_preview', 'context_data_preview', 'template_version', 'campaign'
     ]
     
     fieldsets = (
         ('Informações do Email', {
-            'fields': ('trigger', 'to_email', 'to_name', 'subject')
+            'fields': ('trigger', 'campaign', 'to_email', 'to_name', 'subject')
         }),
         ('Conteúdo', {
-            'fields': ('html_content', 'text_content', 'html_content_preview'),
+            'fields': ('render_at_send', 'template_version', 'html_content', 'text_content', 'html_content_preview'),
             'classes': ('collapse',)
         }),
         ('Status e Agendamento', {
@@ -166,6 +171,8 @@ class EmailQueueAdmin(admin.ModelAdmin):
         if obj.html_content:
             preview = obj.html_content[:200] + "..." if len(obj.html_content) > 200 else obj.html_content
             return mark_safe(f"<div style='max-height: 200px; overflow-y: auto; border: 1px solid #ccc; padding: 10px;'>{preview}</div>")
+        if obj.render_at_send:
+            return "Renderizado no envio a partir dos dados de contexto"
         return "Sem conteúdo HTML"
     html_content_preview.short_description = "Prévia do Conteúdo HTML"
     
@@ -185,11 +192,8 @@ class EmailQueueAdmin(admin.ModelAdmin):
         from .services import EmailQueueService
         
         retried_count = 0
-        for email_queue in queryset.filter(status='failed'):
-            if email_queue.can_retry():
-                email_queue.status = 'pending'
-                email_queue.scheduled_at = timezone.now()
-                email_queue.save()
+        for email_queue in queryset.filter(status__in=['failed', 'dead']):
+            if EmailQueueService.requeue(email_queue):
                 retried_count += 1
         
         self.message_user(request, f"{retried_count} emails foram marcados para reenvio.")
@@ -202,6 +206,75 @@ class EmailQueueAdmin(admin.ModelAdmin):
     cancel_pending_emails.short_description = "Cancelar emails pendentes"
 
 
+@admin.register(EmailCampaign)
+class EmailCampaignAdmin(admin.ModelAdmin):
+    list_display = [
+        'name', 'template', 'status', 'total_recipients', 'queued_count',
+        'skipped_count', 'created_by', 'created_at'
+    ]
+    list_filter = ['status', 'template', 'created_at']
+    search_fields = ['name', 'template__name']
+    readonly_fields = [
+        'trigger', 'status', 'total_recipients', 'queued_count', 'skipped_count',
+        'error_message', 'started_at', 'finished_at', 'created_by', 'created_at', 'progress_preview'
+    ]
+    exclude = ['recipient_ids']
+    
+    fieldsets = (
+        ('Campanha', {
+            'fields': ('name', 'template', 'trigger', 'priority', 'context_data')
+        }),
+        ('Andamento', {
+            'fields': (
+                'status', 'total_recipients', 'queued_count', 'skipped_count',
+                'progress_preview', 'started_at', 'finished_at'
+            )
+        }),
+        ('Erro', {
+            'fields': ('error_message',),
+            'classes': ('collapse',)
+        }),
+        ('Metadados', {
+            'fields': ('created_by', 'created_at'),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    def progress_preview(self, obj):
+        """Mostra emails por status e a vazão da campanha"""
+        from .services import EmailCampaignService
+        
+        progress = EmailCampaignService.progress(obj)
+        return format_html(
+            "{}% concluído &mdash; {} enviados, {} pendentes, {} com falha<br>"
+            "Enfileiramento: {} emails/s &middot; Envio: {} emails/s",
+            progress['percent_done'], progress['sent'], progress['pending'], progress['failed'],
+            progress['enqueue_rate'] or '-', progress['send_rate'] or '-'
+        )
+    progress_preview.short_description = "Progresso"
+    
+    def has_add_permission(self, request):
+        """Campanhas são criadas a partir da seleção de destinatários (EmailCampaignService)"""
+        return False
+    
+    actions = ['start_campaigns']
+    
+    def start_campaigns(self, request, queryset):
+        """Ação para (re)iniciar o enfileiramento das campanhas"""
+        from .services import EmailCampaignService
+        
+        started_count = 0
+        # Campanhas 'running' só quando interrompidas (sem progresso recente)
+        for campaign in queryset.exclude(status='completed'):
+            if not EmailCampaignService.can_restart(campaign):
+                continue
+            EmailCampaignService.start(campaign)
+            started_count += 1
+        
+        self.message_user(request, f"{started_count} campanhas foram agendadas para envio.")
+    start_campaigns.short_description = "Iniciar envio das campanhas"
+
+
 @admin.register(EmailLog)
 class EmailLogAdmin(admin.ModelAdmin):
     list_display = [
@@ -276,6 +349,7 @@ class EmailSystemAdminSite(AdminSite):
             path('email-system/', self.admin_view(self.email_system_dashboard), name='email_system_dashboard'),
             path('email-system/queue/', self.admin_view(self.email_system_queue), name='email_system_queue'),
             path('email-system/logs/', self.admin_view(self.email_system_logs), name='email_system_logs'),
+            path('email-system/metrics/', self.admin_view(self.email_system_metrics), name='email_system_metrics'),
             path('email-system/api/test-email/', self.admin_view(self.email_system_test_email), name='email_system_test_email'),
             path('email-system/api/stats/', self.admin_view(self.email_system_stats), name='email_system_stats'),
         ]
@@ -293,6 +367,10 @@ class EmailSystemAdminSite(AdminSite):
         from .admin_views import email_logs_admin
         return email_logs_admin(request)
     
+    def email_system_metrics(self, request):
+        from .admin_views import email_metrics_admin
+        return email_metrics_admin(request)
+    
     def email_system_test_email(self, request):
         from .admin_views import TestEmailAdminView
         view = TestEmailAdminView()
@@ -320,6 +398,11 @@ class EmailSystemAdminSite(AdminSite):
                 'url': reverse('admin:email_system_logs'),
                 'description': 'Histórico completo de envios de email'
             },
+            {
+                'name': 'Métricas de Email',
+                'url': reverse('admin:email_system_metrics'),
+                'description': 'Fila, latência por servidor SMTP e falhas por classe de erro'
+            },
         ]
         return super().index(request, extra_context)
 
@@ -18,7 +18,11 @@ urlpatterns = [
     # Logs
     path('logs/', admin_views.email_logs_admin, name='logs'),
     
+    # Métricas
+    path('metrics/', admin_views.email_metrics_admin, name='metrics'),
+    
     # API
     path('api/test-email/', admin_views.TestEmailAdminView.as_view(), name='test_email'),
     path('api/stats/', admin_views.email_stats_api_admin, name='stats_api'),
+    path('api/metrics/', admin_views.email_metrics_api, name='metrics_api'),
 ]
@@ -4,14 +4,16 @@ Views administrativas para o sistema de email integradas ao Django Admin
 from django.shortcuts import render, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
-from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from .models import EmailQueue, EmailLog, SMTPConfiguration, EmailTrigger, STATUS_CHOICES, PRIORITY_CHOICES
 from .services import EmailTriggerService, EmailQueueService
+from . import metrics
 import json
 
 
@@ -25,14 +27,14 @@ def email_dashboard_admin(request):
         'total_emails': EmailQueue.objects.count(),
         'pending_emails': EmailQueue.objects.filter(status='pending').count(),
         'sent_emails': EmailQueue.objects.filter(status='sent').count(),
-        'failed_emails': EmailQueue.objects.filter(status='failed').count(),
+        'failed_emails': EmailQueue.objects.filter(status__in=['failed', 'dead']).count(),
         'total_logs': EmailLog.objects.count(),
         'smtp_configs': SMTPConfiguration.objects.filter(is_active=True).count(),
         'active_triggers': EmailTrigger.objects.filter(is_active=True).count(),
     }
     
     # Emails recentes
-    recent_emails = EmailQueue.objects.select_related('trigger').order_by('-created_at')[:10]
+    recent_emails = EmailQueue.objects.select_related('trigger__template').order_by('-created_at')[:10]
     
     # Logs recentes
     recent_logs = EmailLog.objects.select_related('trigger').order_by('-created_at')[:10]
@@ -56,7 +58,7 @@ def email_queue_admin(request):
     status_filter = request.GET.get('status', '')
     priority_filter = request.GET.get('priority', '')
     
-    emails = EmailQueue.objects.select_related('trigger').order_by('-priority', 'scheduled_at')
+    emails = EmailQueue.objects.select_related('trigger__template').order_by('-priority', 'scheduled_at')
     
     if status_filter:
         emails = emails.filter(status=status_filter)
@@ -115,15 +117,11 @@ def retry_email_admin(request, email_id):
     try:
         email_queue = EmailQueue.objects.get(id=email_id)
         
-        if not email_queue.can_retry():
+        # Marcar para reenvio
+        if not EmailQueueService.requeue(email_queue):
             messages.error(request, 'Este email não pode ser reenviado.')
             return redirect('admin:email_system_queue')
         
-        # Marcar para reenvio
-        email_queue.status = 'pending'
-        email_queue.scheduled_at = timezone.now()
-        email_queue.save()
-        
         messages.success(request, f'Email {email_id} marcado para reenvio.')
         
     except EmailQueue.DoesNotExist:
@@ -238,9 +236,56 @@ def email_stats_api_admin(request):
         'total_emails': EmailQueue.objects.count(),
         'pending_emails': EmailQueue.objects.filter(status='pending').count(),
         'sent_emails': EmailQueue.objects.filter(status='sent').count(),
-        'failed_emails': EmailQueue.objects.filter(status='failed').count(),
+        'failed_emails': EmailQueue.objects.filter(status__in=['failed', 'dead']).count(),
         'processing_emails': EmailQueue.objects.filter(status='processing').count(),
         'cancelled_emails': EmailQueue.objects.filter(status='cancelled').count(),
     }
     
     return JsonResponse(stats)
+
+
+def metrics_window(request):
+    """Janela (horas) pedida em ?hours=, entre 1 e 7 dias"""
+    try:
+        hours = int(request.GET.get('hours', 24))
+    except ValueError:
+        hours = 24
+    return min(max(hours, 1), 168)
+
+
+@staff_member_required
+def email_metrics_admin(request):
+    """
+    Métricas do envio de emails: fila, latência por SMTP e falhas (admin)
+    """
+    hours = metrics_window(request)
+    context = {
+        'title': 'Métricas - Sistema de Email',
+        'metrics': metrics.snapshot(hours=hours),
+        'hours': hours,
+        'window_choices': [1, 6, 24, 72, 168],
+        'opts': EmailQueue._meta,
+    }
+    
+    return render(request, 'admin/email_system/metrics.html', context)
+
+
+def email_metrics_api(request):
+    """
+    Métricas em JSON ou, com ?format=prometheus, no formato texto do
+    Prometheus. Acesso para staff ou com o token EMAIL_METRICS_TOKEN.
+    """
+    token = getattr(settings, 'EMAIL_METRICS_TOKEN', '')
+    authorized = request.user.is_authenticated and request.user.is_staff
+    if not authorized and token:
+        authorized = constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    if not authorized:
+        return JsonResponse({'error': 'Acesso negado'}, status=403)
+    
+    snapshot = metrics.snapshot(hours=metrics_window(request))
+    if request.GET.get('format') == 'prometheus':
+        return HttpResponse(
+            metrics.prometheus_text(snapshot),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+    return JsonResponse(snapshot)
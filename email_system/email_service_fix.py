@@ -1,16 +1,13 @@
 """
 Serviço de email com correção para problemas de SSL
 """
-import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from django.template import Template, Context
 from django.utils import timezone
 from django.conf import settings
 import logging
 from typing import Dict, Any, Optional
 from .models import SMTPConfiguration, EmailTemplate, EmailTrigger, EmailQueue, EmailLog
+from .smtp import build_message, connection_pool
 
 logger = logging.getLogger(__name__)
 
@@ -49,43 +46,18 @@ class FixedEmailService:
             return False
         
         try:
-            # Preparar dados do remetente
-            sender_email = from_email or self.smtp_config.from_email
-            sender_name = from_name or self.smtp_config.from_name
+            message = build_message(
+                self.smtp_config,
+                to_email=to_email,
+                subject=subject,
+                html_content=html_content,
+                text_content=text_content,
+                from_email=from_email,
+                from_name=from_name,
+            )
             
-            # Criar mensagem
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = f"{sender_name} <{sender_email}>"
-            message["To"] = to_email
-            
-            # Adicionar conteúdo
-            if text_content:
-                text_part = MIMEText(text_content, "plain", "utf-8")
-                message.attach(text_part)
-            
-            html_part = MIMEText(html_content, "html", "utf-8")
-            message.attach(html_part)
-            
-            # Conectar e enviar com correções SSL
-            if self.smtp_config.use_ssl:
-                # Para SSL, criar contexto sem verificação de certificado
-                context = ssl.create_default_context()
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-                server = smtplib.SMTP_SSL(self.smtp_config.host, self.smtp_config.port, context=context)
-            else:
-                server = smtplib.SMTP(self.smtp_config.host, self.smtp_config.port)
-                if self.smtp_config.use_tls:
-                    # Para TLS, criar contexto sem verificação de certificado
-                    context = ssl.create_default_context()
-                    context.check_hostname = False
-                    context.verify_mode = ssl.CERT_NONE
-                    server.starttls(context=context)
-            
-            server.login(self.smtp_config.username, self.smtp_config.password)
-            server.send_message(message)
-            server.quit()
+            # Envia por uma conexão reaproveitada do pool, sem verificação de certificado
+            connection_pool.send(self.smtp_config, message, verify_certificates=False)
             
             logger.info(f"Email enviado com sucesso para {to_email}")
             return True
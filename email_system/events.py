@@ -0,0 +1,254 @@
+"""
+Eventos de domínio que disparam emails.
+
+Os signals apenas registram o evento (nome, id do objeto e poucos dados) para
+depois do commit da transação; a tarefa Celery ``handle_email_event`` carrega
+o objeto, monta o contexto e resolve o gatilho. Assim a requisição não faz
+nenhum trabalho de email e nada é enviado se a transação for desfeita.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .services import EmailTriggerService
+
+logger = logging.getLogger(__name__)
+
+SITE_NAME = 'RH Acqua'
+SITE_URL = 'https://rh.institutoacqua.org.br'
+
+# Nome do evento -> função que monta os argumentos de trigger_email
+EMAIL_EVENTS = {}
+
+
+def email_event(name):
+    """
+    Registra a função que transforma o evento ``name`` em um email
+    """
+    def register(builder):
+        EMAIL_EVENTS[name] = builder
+        return builder
+    return register
+
+
+def publish(event, object_id, **payload):
+    """
+    Agenda o evento para depois do commit da transação atual
+    """
+    transaction.on_commit(lambda: dispatch(event, object_id, payload))
+
+
+def dispatch(event, object_id, payload=None):
+    """
+    Envia o evento para a tarefa Celery; sem o broker, processa aqui mesmo
+    para não perder o email
+    """
+    from .tasks import handle_email_event
+
+    try:
+        # Sem novas tentativas de publicação: a requisição não pode ficar presa ao broker
+        handle_email_event.apply_async((event, object_id, payload or {}), retry=False)
+    except Exception as e:
+        logger.error(f"Broker indisponível para o evento de email {event}: {e}; processando na requisição")
+        handle(event, object_id, payload)
+
+
+def handle(event, object_id, payload=None):
+    """
+    Monta o email do evento e o coloca na fila pelo gatilho correspondente
+    """
+    builder = EMAIL_EVENTS.get(event)
+    if builder is None:
+        logger.warning(f"Evento de email desconhecido: {event}")
+        return None
+
+    try:
+        email = builder(object_id, **(payload or {}))
+    except Exception as e:
+        logger.error(f"Erro ao montar o email do evento {event} ({object_id}): {e}")
+        return None
+    if email is None:
+        return None
+
+    email_queue = EmailTriggerService.trigger_email(**email)
+    if email_queue is not None:
+        logger.info(f"Email do evento {event} disparado para: {email['to_email']}")
+    return email_queue
+
+
+def user_context(user):
+    return {
+        'user_name': user.get_full_name() or user.first_name or user.email,
+        'user_email': user.email,
+        'user_first_name': user.first_name,
+        'user_last_name': user.last_name,
+        'site_name': SITE_NAME,
+        'site_url': SITE_URL,
+    }
+
+
+def vacancy_context(vacancy):
+    return {
+        'vacancy_title': vacancy.title,
+        'vacancy_department': vacancy.department.name if vacancy.department else '',
+        'vacancy_location': vacancy.location,
+    }
+
+
+def load_application(application_id):
+    from applications.models import Application
+
+    return Application.objects.select_related(
+        'candidate__user', 'vacancy__department'
+    ).filter(pk=application_id).first()
+
+
+@email_event('user_registration')
+def user_registration(user_id):
+    """
+    Boas-vindas a um novo usuário
+    """
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is None:
+        return None
+    context_data = user_context(user)
+    context_data['registration_date'] = user.date_joined.strftime('%d/%m/%Y')
+    return {
+        'trigger_type': 'user_registration',
+        'to_email': user.email,
+        'context_data': context_data,
+        'to_name': user.get_full_name() or user.first_name,
+        'priority': 2,  # Prioridade normal
+    }
+
+
+@email_event('application_submitted')
+def application_submitted(application_id):
+    """
+    Confirmação de uma candidatura
+    """
+    application = load_application(application_id)
+    if application is None:
+        return None
+    user = application.candidate.user
+    context_data = user_context(user)
+    context_data.update(vacancy_context(application.vacancy))
+    context_data.update({
+        'application_date': application.created_at.strftime('%d/%m/%Y'),
+        'application_id': application.id,
+    })
+    return {
+        'trigger_type': 'application_submitted',
+        'to_email': user.email,
+        'context_data': context_data,
+        'to_name': user.get_full_name() or user.first_name,
+        'priority': 2,  # Prioridade normal
+    }
+
+
+@email_event('application_reviewed')
+def application_reviewed(application_id, status):
+    """
+    Resultado da análise de uma candidatura (``status`` no momento do evento)
+    """
+    application = load_application(application_id)
+    if application is None:
+        return None
+    user = application.candidate.user
+    application.status = status
+    context_data = user_context(user)
+    context_data.update(vacancy_context(application.vacancy))
+    context_data.update({
+        'application_status': application.get_status_display(),
+        'review_date': application.updated_at.strftime('%d/%m/%Y'),
+        'application_id': application.id,
+    })
+    return {
+        'trigger_type': 'application_approved' if status == 'approved' else 'application_rejected',
+        'to_email': user.email,
+        'context_data': context_data,
+        'to_name': user.get_full_name() or user.first_name,
+        'priority': 3,  # Prioridade alta
+    }
+
+
+def load_interview(interview_id):
+    from interviews.models import Interview
+
+    return Interview.objects.select_related(
+        'application__candidate__user', 'application__vacancy__department', 'interviewer__user'
+    ).filter(pk=interview_id).first()
+
+
+def interview_context(interview):
+    return {
+        'interview_date': interview.scheduled_date.strftime('%d/%m/%Y'),
+        'interview_time': interview.scheduled_date.strftime('%H:%M'),
+        'interview_type': interview.get_type_display(),
+        'interview_location': interview.location or 'A definir',
+        'interview_id': interview.id,
+    }
+
+
+@email_event('interview_scheduled')
+def interview_scheduled(interview_id):
+    """
+    Aviso de entrevista agendada
+    """
+    interview = load_interview(interview_id)
+    if interview is None:
+        return None
+    user = interview.application.candidate.user
+    context_data = user_context(user)
+    context_data['user_name'] = user.get_full_name()
+    context_data.update(vacancy_context(interview.application.vacancy))
+    context_data.update(interview_context(interview))
+    context_data.update({
+        'interview_notes': interview.notes or '',
+        'interviewer_name': interview.interviewer.user.get_full_name() if interview.interviewer else 'Equipe RH',
+    })
+    return {
+        'trigger_type': 'interview_scheduled',
+        'to_email': user.email,
+        'context_data': context_data,
+        'to_name': user.get_full_name(),
+        'priority': 3,  # Prioridade alta
+    }
+
+
+def interview_change(interview_id, trigger_type):
+    interview = load_interview(interview_id)
+    if interview is None:
+        return None
+    user = interview.application.candidate.user
+    context_data = user_context(user)
+    context_data.update(vacancy_context(interview.application.vacancy))
+    context_data.update(interview_context(interview))
+    context_data.update({
+        'interview_notes': interview.notes or 'Nenhuma observação.',
+        'interview_status': interview.get_status_display(),
+    })
+    return {
+        'trigger_type': trigger_type,
+        'to_email': user.email,
+        'context_data': context_data,
+        'to_name': user.get_full_name() or user.first_name,
+        'priority': 3,  # Prioridade alta
+    }
+
+
+@email_event('interview_updated')
+def interview_updated(interview_id):
+    """
+    Aviso de alteração de entrevista
+    """
+    return interview_change(interview_id, 'interview_updated')
+
+
+@email_event('interview_canceled')
+def interview_canceled(interview_id):
+    """
+    Aviso de cancelamento de entrevista
+    """
+    return interview_change(interview_id, 'interview_canceled')
@@ -0,0 +1,101 @@
+"""
+Comando para medir a renderização de templates de email com e sem o cache
+de templates compilados
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from django.utils import timezone
+
+from email_system.models import EmailTemplate
+from utils.template_cache import CompiledTemplateCache
+
+FIELDS = ('subject', 'html_content', 'text_content')
+
+SAMPLE_HTML = """
+<html><body>
+<h2>Olá, {{ user_name }}!</h2>
+<p>Sua candidatura para <strong>{{ vacancy_title }}</strong> em {{ hospital_name }} foi recebida.</p>
+{% if interview_date %}<p>Entrevista: {{ interview_date }} às {{ interview_time }}</p>{% endif %}
+<ul>{% for step in steps %}<li>{{ forloop.counter }}. {{ step|capfirst }}</li>{% endfor %}</ul>
+<p>Acompanhe em <a href="{{ site_url }}">{{ site_name }}</a>.</p>
+</body></html>
+"""
+
+
+def sample_context(index):
+    return {
+        'user_name': f'Candidato {index}',
+        'vacancy_title': 'Técnico de Enfermagem',
+        'hospital_name': 'Hospital Central',
+        'interview_date': '10/11/2025',
+        'interview_time': '14:00',
+        'steps': ['análise de currículo', 'entrevista', 'exame admissional'],
+        'site_url': 'https://rh.institutoacqua.org.br',
+        'site_name': 'RH Acqua',
+    }
+
+
+def render_without_cache(template, context_data):
+    # Comportamento anterior: compila cada campo e cria um Context por campo
+    return {
+        field: Template(getattr(template, field)).render(Context(context_data))
+        for field in FIELDS
+        if getattr(template, field)
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mede a renderização de emails com e sem o cache de templates compilados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10000,
+            help='Quantidade de emails renderizados em cada cenário (padrão: 10000)'
+        )
+        parser.add_argument(
+            '--template-id',
+            type=int,
+            default=None,
+            help='Template do banco a usar (padrão: um template de exemplo, sem acessar o banco)'
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        if options['template_id']:
+            template = EmailTemplate.objects.get(pk=options['template_id'])
+        else:
+            template = EmailTemplate(
+                pk=0,
+                name='Benchmark',
+                subject='Candidatura recebida: {{ vacancy_title }} - {{ user_name }}',
+                html_content=SAMPLE_HTML,
+                text_content='Olá {{ user_name }}, recebemos sua candidatura para {{ vacancy_title }}.',
+                updated_at=timezone.now(),
+            )
+
+        contexts = [sample_context(index) for index in range(count)]
+
+        started = time.perf_counter()
+        for context_data in contexts:
+            render_without_cache(template, context_data)
+        uncached = time.perf_counter() - started
+
+        cache = CompiledTemplateCache()
+        started = time.perf_counter()
+        for context_data in contexts:
+            cache.render(template, FIELDS, context_data)
+        cached = time.perf_counter() - started
+
+        self.stdout.write(f'Template: {template.name} ({count} renderizações)')
+        for label, elapsed in (('Sem cache', uncached), ('Com cache', cached)):
+            self.stdout.write(
+                f'- {label}: {elapsed:.3f}s ({count / elapsed:.0f} emails/s, '
+                f'{elapsed / count * 1_000_000:.0f} µs/email)'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ganho: {uncached / cached:.1f}x (cache: {cache.stats()})'
+        ))
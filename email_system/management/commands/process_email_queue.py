@@ -4,26 +4,53 @@ Comando para processar a fila de emails
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from email_system.services import EmailQueueService
-from email_system.models import EmailQueue
+from email_system.models import EmailQueue, EmailLog
+from email_system.worker import EmailQueueWorker
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = 'Processa emails pendentes na fila'
+    help = (
+        'Processa emails pendentes na fila. Várias instâncias podem rodar ao '
+        'mesmo tempo; com --loop o comando fica em execução contínua.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--limit',
             type=int,
-            default=10,
-            help='Número máximo de emails para processar por vez (padrão: 10)'
+            default=None,
+            help='Número de emails reservados por lote (padrão: EMAIL_WORKER_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Envios simultâneos por configuração SMTP (padrão: EMAIL_WORKER_CONCURRENCY)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Processa a fila continuamente'
+        )
+        parser.add_argument(
+            '--max-seconds',
+            type=int,
+            default=None,
+            help='Com --loop, encerra após este tempo'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5,
+            help='Com --loop, espera em segundos quando a fila está vazia (padrão: 5)'
         )
         parser.add_argument(
             '--retry-failed',
             action='store_true',
-            help='Tenta reenviar emails que falharam'
+            help='Antecipa para agora as novas tentativas agendadas de emails que falharam'
         )
         parser.add_argument(
             '--cleanup',
@@ -32,104 +59,101 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        limit = options['limit']
-        retry_failed = options['retry_failed']
-        cleanup = options['cleanup']
-        
+        worker = EmailQueueWorker(
+            batch_size=options['limit'],
+            concurrency=options['concurrency'],
+        )
+
         self.stdout.write(
-            self.style.SUCCESS(f'Iniciando processamento da fila de emails...')
+            self.style.SUCCESS(f'Iniciando processamento da fila de emails ({worker.worker_id})...')
         )
-        
-        # Tentar reenviar emails que falharam
-        if retry_failed:
-            retried_count = EmailQueueService.retry_failed_emails(limit=5)
-            if retried_count > 0:
+
+        # Antecipar as novas tentativas de emails que falharam
+        retried_ids = []
+        if options['retry_failed']:
+            retried_ids = EmailQueueService.retry_failed_emails(limit=5)
+            if retried_ids:
                 self.stdout.write(
-                    self.style.SUCCESS(f'{retried_count} emails falhados foram marcados para reenvio.')
+                    self.style.SUCCESS(f'{len(retried_ids)} emails falhados foram marcados para reenvio.')
                 )
-        
-        # Processar emails pendentes
-        pending_emails = EmailQueueService.get_pending_emails(limit=limit)
-        
-        if not pending_emails:
+
+        # As antecipadas são processadas antes: na fila normal os emails novos
+        # sempre vêm primeiro e ocupariam o lote
+        totals = self.process_retried(worker, retried_ids)
+        if options['loop']:
+            stats = worker.run(max_seconds=options['max_seconds'], idle_sleep=options['sleep'])
+        elif not retried_ids:
+            stats = worker.run_once()
+        else:
+            stats = {}
+        for key in ('processed', 'sent', 'failed', 'deferred'):
+            totals[key] += stats.get(key, 0)
+
+        if not totals['processed']:
             self.stdout.write(
                 self.style.WARNING('Nenhum email pendente encontrado.')
             )
-            return
-        
-        self.stdout.write(f'Processando {len(pending_emails)} emails...')
-        
-        processed_count = 0
-        success_count = 0
-        failed_count = 0
-        
-        for email_queue in pending_emails:
-            try:
-                self.stdout.write(f'Processando email {email_queue.id} para {email_queue.to_email}...')
-                
-                success = EmailQueueService.process_queue_item(email_queue)
-                
-                if success:
-                    success_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f'✓ Email {email_queue.id} enviado com sucesso')
-                    )
-                else:
-                    failed_count += 1
-                    self.stdout.write(
-                        self.style.ERROR(f'✗ Falha ao enviar email {email_queue.id}')
-                    )
-                
-                processed_count += 1
-                
-            except Exception as e:
-                failed_count += 1
-                self.stdout.write(
-                    self.style.ERROR(f'✗ Erro ao processar email {email_queue.id}: {e}')
-                )
-                logger.error(f'Erro ao processar email {email_queue.id}: {e}')
-        
+
         # Limpeza de dados antigos
-        if cleanup:
+        if options['cleanup']:
             self.cleanup_old_data()
-        
+
         # Resumo
         self.stdout.write(
             self.style.SUCCESS(
                 f'\nProcessamento concluído:\n'
-                f'- Emails processados: {processed_count}\n'
-                f'- Sucessos: {success_count}\n'
-                f'- Falhas: {failed_count}'
+                f'- Emails processados: {totals["processed"]}\n'
+                f'- Sucessos: {totals["sent"]}\n'
+                f'- Falhas: {totals["failed"]}\n'
+                f'- Adiados pelo limite de envio: {totals["deferred"]}'
             )
         )
-    
+
+    def process_retried(self, worker, retried_ids):
+        """Processa, em lotes do worker, apenas os emails antecipados"""
+        totals = {'processed': 0, 'sent': 0, 'failed': 0, 'deferred': 0}
+        while retried_ids:
+            stats = worker.run_once(only_ids=retried_ids)
+            if not stats['processed']:
+                break
+            for key in totals:
+                totals[key] += stats.get(key, 0)
+        return totals
+
     def cleanup_old_data(self):
         """Remove dados antigos para manter o banco limpo"""
         from datetime import timedelta
-        
+
         # Remover logs de emails enviados com mais de 30 dias
         cutoff_date = timezone.now() - timedelta(days=30)
-        
+
         old_logs = EmailLog.objects.filter(
             status='sent',
             created_at__lt=cutoff_date
         )
-        
+
         logs_count = old_logs.count()
         if logs_count > 0:
             old_logs.delete()
             self.stdout.write(
                 self.style.SUCCESS(f'{logs_count} logs antigos foram removidos.')
             )
-        
+
+        # Remover o conteúdo renderizado de emails finalizados
+        purged_count = EmailQueueService.purge_rendered_content()
+        if purged_count > 0:
+            self.stdout.write(
+                self.style.SUCCESS(f'Conteúdo de {purged_count} emails antigos foi removido.')
+            )
+
         # Remover emails da fila que foram enviados com mais de 7 dias
         cutoff_date_queue = timezone.now() - timedelta(days=7)
-        
+
         old_queue_items = EmailQueue.objects.filter(
             status='sent',
             sent_at__lt=cutoff_date_queue
         )
-        
+
         queue_count = old_queue_items.count()
         if queue_count > 0:
             old_queue_items.delete()
@@ -0,0 +1,260 @@
+"""
+Métricas do envio de emails.
+
+Os envios registrados no ``EmailLog`` são agregados por hora em
+``EmailMetricRollup`` (por configuração SMTP, status e classe de erro, com um
+histograma acumulado do tempo de processamento). A tarefa
+``rollup_email_metrics`` calcula só as horas fechadas que ainda faltam (e
+recalcula as últimas, para incluir logs gravados com atraso); a hora corrente
+é agregada na hora da consulta. Profundidade da fila e idade do item pendente
+mais antigo são lidas diretamente da fila.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from .models import DUE_STATUSES, ERROR_CLASS_CHOICES, EmailLog, EmailMetricRollup, EmailQueue, SMTPConfiguration
+
+logger = logging.getLogger(__name__)
+
+# Limites (segundos) do histograma de latência; o último balde (+Inf) é implícito
+LATENCY_BUCKETS = tuple(getattr(settings, 'EMAIL_LATENCY_BUCKETS', (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)))
+# Horas fechadas recalculadas a cada execução (logs gravados com atraso)
+ROLLUP_LOOKBACK_HOURS = 2
+# Horas calculadas na primeira execução (e máximo recalculado de uma vez)
+ROLLUP_BACKFILL_HOURS = getattr(settings, 'EMAIL_METRICS_BACKFILL_HOURS', 48)
+PERCENTILES = (50, 90, 99)
+
+ERROR_CLASS_LABELS = dict(ERROR_CLASS_CHOICES)
+
+
+def hour_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def aggregate_logs(start, end):
+    """
+    Agrega os logs criados em [start, end) por SMTP, status e classe de erro,
+    com uma consulta
+    """
+    buckets = {
+        f'le_{index}': Count('pk', filter=Q(processing_time__lte=bound))
+        for index, bound in enumerate(LATENCY_BUCKETS)
+    }
+    buckets['le_inf'] = Count('pk', filter=Q(processing_time__isnull=False))
+    rows = (
+        EmailLog.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values('smtp_config_id', 'status', 'error_class')
+        .annotate(count=Count('pk'), processing_time_sum=Sum('processing_time'), **buckets)
+        .order_by()
+    )
+    return [
+        {
+            'smtp_config_id': row['smtp_config_id'],
+            'status': row['status'],
+            'error_class': row['error_class'],
+            'count': row['count'],
+            'processing_time_sum': row['processing_time_sum'] or 0.0,
+            'latency_buckets': [row[f'le_{index}'] for index in range(len(LATENCY_BUCKETS))] + [row['le_inf']],
+        }
+        for row in rows
+    ]
+
+
+def rollup_hour(start):
+    """
+    (Re)calcula a agregação da hora iniciada em ``start``
+    """
+    rows = aggregate_logs(start, start + timedelta(hours=1))
+    with transaction.atomic():
+        EmailMetricRollup.objects.filter(bucket_start=start).delete()
+        EmailMetricRollup.objects.bulk_create(
+            EmailMetricRollup(bucket_start=start, **row) for row in rows
+        )
+    return len(rows)
+
+
+def run_rollups(now=None):
+    """
+    Agrega as horas fechadas ainda não calculadas e recalcula as últimas
+    ROLLUP_LOOKBACK_HOURS. Retorna a quantidade de horas calculadas.
+    """
+    current = hour_start(now or timezone.now())
+    oldest = current - timedelta(hours=ROLLUP_BACKFILL_HOURS)
+    last = EmailMetricRollup.objects.aggregate(last=Max('bucket_start'))['last']
+    if last is None:
+        first = oldest
+    else:
+        first = max(oldest, min(last, current - timedelta(hours=ROLLUP_LOOKBACK_HOURS)))
+
+    hours = 0
+    start = first
+    while start < current:
+        rollup_hour(start)
+        start += timedelta(hours=1)
+        hours += 1
+    return hours
+
+
+def histogram_quantile(cumulative, percentile):
+    """
+    Percentil estimado a partir do histograma acumulado (interpolação linear
+    dentro do balde, como o histogram_quantile do Prometheus)
+    """
+    total = cumulative[-1] if cumulative else 0
+    if not total:
+        return None
+    rank = percentile / 100 * total
+    previous = 0
+    for index, count in enumerate(cumulative):
+        if count >= rank:
+            if index == len(LATENCY_BUCKETS):
+                return float(LATENCY_BUCKETS[-1])
+            lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+            upper = LATENCY_BUCKETS[index]
+            if count == previous:
+                return float(upper)
+            return round(lower + (upper - lower) * (rank - previous) / (count - previous), 3)
+        previous = count
+    return float(LATENCY_BUCKETS[-1])
+
+
+def queue_gauges(now):
+    """
+    Situação atual da fila (uma consulta)
+    """
+    due = Q(status__in=DUE_STATUSES, scheduled_at__lte=now)
+    stats = EmailQueue.objects.aggregate(
+        depth=Count('pk', filter=due),
+        scheduled=Count('pk', filter=Q(status__in=DUE_STATUSES, scheduled_at__gt=now)),
+        processing=Count('pk', filter=Q(status='processing')),
+        dead=Count('pk', filter=Q(status='dead')),
+        oldest_due=Min('scheduled_at', filter=due),
+    )
+    oldest_due = stats.pop('oldest_due')
+    stats['oldest_pending_age_seconds'] = round((now - oldest_due).total_seconds(), 1) if oldest_due else 0.0
+    return stats
+
+
+def snapshot(hours=24, now=None):
+    """
+    Métricas das últimas ``hours`` horas (incluindo a hora corrente):
+    fila, latência por configuração SMTP e falhas por classe de erro
+    """
+    now = now or timezone.now()
+    current = hour_start(now)
+    rows = list(
+        EmailMetricRollup.objects.filter(
+            bucket_start__gte=current - timedelta(hours=hours - 1), bucket_start__lt=current
+        ).values('smtp_config_id', 'status', 'error_class', 'count', 'processing_time_sum', 'latency_buckets')
+    )
+    rows.extend(aggregate_logs(current, now + timedelta(seconds=1)))
+
+    size = len(LATENCY_BUCKETS) + 1
+    per_smtp = {}
+    failures = {}
+    for row in rows:
+        smtp = per_smtp.setdefault(row['smtp_config_id'], {
+            'sent': 0, 'failed': 0, 'processing_time_sum': 0.0, 'latency_buckets': [0] * size,
+        })
+        if row['status'] == 'sent':
+            smtp['sent'] += row['count']
+            smtp['processing_time_sum'] += row['processing_time_sum']
+            # Agregações feitas com outros limites de latência são ignoradas no histograma
+            if len(row['latency_buckets']) == size:
+                smtp['latency_buckets'] = [a + b for a, b in zip(smtp['latency_buckets'], row['latency_buckets'])]
+        else:
+            smtp['failed'] += row['count']
+            error = row['error_class'] or 'other'
+            failures[error] = failures.get(error, 0) + row['count']
+
+    names = dict(SMTPConfiguration.objects.filter(pk__in=[pk for pk in per_smtp if pk]).values_list('pk', 'name'))
+    smtp_metrics = []
+    for pk, smtp in sorted(per_smtp.items(), key=lambda item: item[0] or 0):
+        attempts = smtp['sent'] + smtp['failed']
+        smtp_metrics.append(dict(
+            smtp,
+            id=pk,
+            name=names.get(pk, 'Sem configuração'),
+            failure_rate=round(smtp['failed'] / attempts, 4) if attempts else 0.0,
+            latency={f'p{p}': histogram_quantile(smtp['latency_buckets'], p) for p in PERCENTILES},
+        ))
+
+    sent = sum(smtp['sent'] for smtp in smtp_metrics)
+    failed = sum(smtp['failed'] for smtp in smtp_metrics)
+    attempts = sent + failed
+    return {
+        'generated_at': now.isoformat(),
+        'window_hours': hours,
+        'latency_bounds': list(LATENCY_BUCKETS),
+        'queue': queue_gauges(now),
+        'totals': {
+            'sent': sent,
+            'failed': failed,
+            'failure_rate': round(failed / attempts, 4) if attempts else 0.0,
+        },
+        'smtp': smtp_metrics,
+        'failures': [
+            {
+                'error_class': error,
+                'label': ERROR_CLASS_LABELS.get(error, error),
+                'count': count,
+                'rate': round(count / attempts, 4),
+            }
+            for error, count in sorted(failures.items(), key=lambda item: -item[1])
+        ],
+    }
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(metrics):
+    """
+    Formato de exposição do Prometheus. Os totais da janela são gauges (não
+    contadores), com o rótulo ``window``.
+    """
+    window = f"{metrics['window_hours']}h"
+    lines = []
+
+    def gauge(name, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in samples:
+            rendered = ','.join(f'{key}="{_label(label)}"' for key, label in labels.items())
+            lines.append(f'{name}{{{rendered}}} {value}' if rendered else f'{name} {value}')
+
+    queue = metrics['queue']
+    gauge('email_queue_depth', 'Emails prontos para envio aguardando na fila', [({}, queue['depth'])])
+    gauge('email_queue_oldest_pending_age_seconds', 'Idade do email pronto para envio mais antigo',
+          [({}, queue['oldest_pending_age_seconds'])])
+    gauge('email_queue_scheduled', 'Emails agendados para o futuro (inclui novas tentativas)', [({}, queue['scheduled'])])
+    gauge('email_queue_processing', 'Emails em processamento', [({}, queue['processing'])])
+    gauge('email_queue_dead', 'Emails com falha definitiva', [({}, queue['dead'])])
+
+    gauge('email_sent', 'Emails enviados na janela', [
+        ({'smtp': smtp['name'], 'window': window}, smtp['sent']) for smtp in metrics['smtp']
+    ])
+    gauge('email_failed', 'Tentativas com falha na janela', [
+        ({'smtp': smtp['name'], 'window': window}, smtp['failed']) for smtp in metrics['smtp']
+    ])
+    gauge('email_send_latency_seconds', 'Percentis do tempo de envio na janela', [
+        ({'smtp': smtp['name'], 'quantile': f'{int(key[1:]) / 100:g}', 'window': window}, value)
+        for smtp in metrics['smtp']
+        for key, value in smtp['latency'].items()
+        if value is not None
+    ])
+    gauge('email_failures', 'Falhas por classe de erro na janela', [
+        ({'error_class': failure['error_class'], 'window': window}, failure['count'])
+        for failure in metrics['failures']
+    ])
+    gauge('email_failure_rate', 'Fração das tentativas com falha, por classe de erro, na janela', [
+        ({'error_class': failure['error_class'], 'window': window}, failure['rate'])
+        for failure in metrics['failures']
+    ])
+    return '\n'.join(lines) + '\n'
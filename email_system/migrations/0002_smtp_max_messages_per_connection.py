@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smtpconfiguration',
+            name='max_messages_per_connection',
+            field=models.PositiveIntegerField(default=100, help_text='Máximo de emails enviados por uma mesma conexão SMTP antes de reconectar (0 = sem limite)', verbose_name='Mensagens por Conexão'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_system', '0002_smtp_max_messages_per_connection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailqueue',
+            name='locked_by',
+            field=models.CharField(blank=True, help_text='Worker que detém o item enquanto está em processamento', max_length=100, null=True, verbose_name='Processado por'),
+        ),
+        migrations.AddField(
+            model_name='emailqueue',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, help_text='Fim da reserva do worker; depois disso o item volta para a fila', null=True, verbose_name='Reservado até'),
+        ),
+        migrations.AddIndex(
+            model_name='emailqueue',
+            index=models.Index(fields=['status', 'locked_until'], name='emailqueue_lease_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_system', '0003_emailqueue_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smtpconfiguration',
+            name='rate_limit_per_hour',
+            field=models.PositiveIntegerField(default=0, help_text='Máximo de emails enviados por hora por este servidor (0 = sem limite)', verbose_name='Emails por Hora'),
+        ),
+        migrations.AddField(
+            model_name='smtpconfiguration',
+            name='rate_limit_per_minute',
+            field=models.PositiveIntegerField(default=0, help_text='Máximo de emails enviados por minuto por este servidor (0 = sem limite)', verbose_name='Emails por Minuto'),
+        ),
+        migrations.AddField(
+            model_name='smtpconfiguration',
+            name='rate_limit_per_second',
+            field=models.PositiveIntegerField(default=0, help_text='Máximo de emails enviados por segundo por este servidor (0 = sem limite)', verbose_name='Emails por Segundo'),
+        ),
+    ]
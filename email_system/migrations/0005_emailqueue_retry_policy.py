@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_system', '0004_smtp_rate_limits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailqueue',
+            name='last_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='Data e hora da última tentativa de envio', null=True, verbose_name='Última Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='emailqueue',
+            name='last_error_code',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Código SMTP da última falha (5xx = recusa definitiva)', null=True, verbose_name='Código do Erro'),
+        ),
+        migrations.AlterField(
+            model_name='emaillog',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('sent', 'Enviado'), ('failed', 'Falhou'), ('dead', 'Falha Definitiva'), ('cancelled', 'Cancelado')], help_text='Status final do email', max_length=20, verbose_name='Status'),
+        ),
+        migrations.AlterField(
+            model_name='emailqueue',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('sent', 'Enviado'), ('failed', 'Falhou'), ('dead', 'Falha Definitiva'), ('cancelled', 'Cancelado')], default='pending', help_text='Status atual do email', max_length=20, verbose_name='Status'),
+        ),
+        migrations.AddIndex(
+            model_name='emailqueue',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'failed'])), fields=['retry_count', '-priority', 'scheduled_at'], name='emailqueue_due_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_system', '0005_emailqueue_retry_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailqueue',
+            name='render_at_send',
+            field=models.BooleanField(default=False, help_text='O conteúdo é gerado pelo worker no momento do envio, a partir dos dados de contexto', verbose_name='Renderizar no Envio'),
+        ),
+        migrations.AlterField(
+            model_name='emailqueue',
+            name='html_content',
+            field=models.TextField(blank=True, help_text='Conteúdo HTML do email (vazio quando renderizado no envio)', verbose_name='Conteúdo HTML'),
+        ),
+        migrations.AlterField(
+            model_name='emailqueue',
+            name='subject',
+            field=models.CharField(blank=True, help_text='Assunto do email (preenchido no envio quando renderizado no envio)', max_length=255, verbose_name='Assunto'),
+        ),
+        migrations.CreateModel(
+            name='EmailTemplateVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template_updated_at', models.DateTimeField(help_text='Data da alteração do template que gerou esta versão', verbose_name='Versão')),
+                ('subject', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('html_content', models.TextField(verbose_name='Conteúdo HTML')),
+                ('text_content', models.TextField(blank=True, null=True, verbose_name='Conteúdo Texto')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='email_system.emailtemplate', verbose_name='Template')),
+            ],
+            options={
+                'verbose_name': 'Versão de Template de Email',
+                'verbose_name_plural': 'Versões de Templates de Email',
+                'ordering': ['-template_updated_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='emailqueue',
+            name='template_version',
+            field=models.ForeignKey(blank=True, help_text='Versão fixada do template; sem ela, é usada a versão atual do gatilho', null=True, on_delete=django.db.models.deletion.PROTECT, to='email_system.emailtemplateversion', verbose_name='Versão do Template'),
+        ),
+        migrations.AddConstraint(
+            model_name='emailtemplateversion',
+            constraint=models.UniqueConstraint(fields=('template', 'template_updated_at'), name='emailtemplateversion_unique'),
+        ),
+    ]
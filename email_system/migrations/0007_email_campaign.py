@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('email_system', '0006_emailqueue_render_at_send'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Nome identificador da campanha', max_length=200, verbose_name='Nome')),
+                ('context_data', models.JSONField(blank=True, default=dict, help_text='Dados comuns a todos os destinatários', verbose_name='Dados de Contexto')),
+                ('recipient_ids', models.JSONField(blank=True, default=list, help_text='IDs dos usuários selecionados', verbose_name='Destinatários')),
+                ('priority', models.IntegerField(choices=[(1, 'Baixa'), (2, 'Normal'), (3, 'Alta'), (4, 'Urgente')], default=1, help_text='Prioridade dos emails na fila (baixa, para não atrasar os emails transacionais)', verbose_name='Prioridade')),
+                ('status', models.CharField(choices=[('draft', 'Rascunho'), ('queued', 'Aguardando'), ('running', 'Enfileirando'), ('completed', 'Enfileirada'), ('failed', 'Falhou')], default='draft', max_length=20, verbose_name='Status')),
+                ('total_recipients', models.PositiveIntegerField(default=0, verbose_name='Destinatários Selecionados')),
+                ('queued_count', models.PositiveIntegerField(default=0, verbose_name='Emails Enfileirados')),
+                ('skipped_count', models.PositiveIntegerField(default=0, help_text='Usuários inativos, sem email ou que não aceitam notificações por email', verbose_name='Destinatários Ignorados')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='Mensagem de Erro')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciada em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Enfileiramento concluído em')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criada em')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='email_campaigns', to=settings.AUTH_USER_MODEL, verbose_name='Criada por')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='email_system.emailtemplate', verbose_name='Template')),
+                ('trigger', models.ForeignKey(help_text='Gatilho que define a configuração SMTP dos emails', on_delete=django.db.models.deletion.PROTECT, to='email_system.emailtrigger', verbose_name='Gatilho')),
+            ],
+            options={
+                'verbose_name': 'Campanha de Email',
+                'verbose_name_plural': 'Campanhas de Email',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='emailqueue',
+            name='campaign',
+            field=models.ForeignKey(blank=True, help_text='Campanha em massa que gerou este email', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='emails', to='email_system.emailcampaign', verbose_name='Campanha'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_system', '0007_email_campaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaillog',
+            name='error_class',
+            field=models.CharField(blank=True, choices=[('throttled', 'Limite do Provedor (421/451)'), ('temporary', 'Falha Temporária (4xx)'), ('permanent', 'Recusa Definitiva (5xx)'), ('auth', 'Autenticação'), ('connection', 'Conexão'), ('template', 'Template'), ('other', 'Outros')], default='', max_length=20, verbose_name='Classe do Erro'),
+        ),
+        migrations.CreateModel(
+            name='EmailMetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField(verbose_name='Início da Hora')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('sent', 'Enviado'), ('failed', 'Falhou'), ('dead', 'Falha Definitiva'), ('cancelled', 'Cancelado')], max_length=20, verbose_name='Status')),
+                ('error_class', models.CharField(blank=True, choices=[('throttled', 'Limite do Provedor (421/451)'), ('temporary', 'Falha Temporária (4xx)'), ('permanent', 'Recusa Definitiva (5xx)'), ('auth', 'Autenticação'), ('connection', 'Conexão'), ('template', 'Template'), ('other', 'Outros')], default='', max_length=20, verbose_name='Classe do Erro')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Envios')),
+                ('processing_time_sum', models.FloatField(default=0, verbose_name='Tempo Total de Processamento (s)')),
+                ('latency_buckets', models.JSONField(default=list, help_text='Envios acumulados até cada limite de EMAIL_LATENCY_BUCKETS', verbose_name='Histograma de Latência')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('smtp_config', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='metric_rollups', to='email_system.smtpconfiguration', verbose_name='Configuração SMTP')),
+            ],
+            options={
+                'verbose_name': 'Métrica de Email (por hora)',
+                'verbose_name_plural': 'Métricas de Email (por hora)',
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['bucket_start'], name='email_syste_bucket__52021c_idx')],
+            },
+        ),
+    ]
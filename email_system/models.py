@@ -1,6 +1,8 @@
 """
 Modelos para o sistema de comunicação por email
 """
+from datetime import timedelta
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -33,9 +35,25 @@ STATUS_CHOICES = [
     ('processing', 'Processando'),
     ('sent', 'Enviado'),
     ('failed', 'Falhou'),
+    ('dead', 'Falha Definitiva'),
     ('cancelled', 'Cancelado'),
 ]
 
+# Classes de erro de envio (métricas de falha)
+ERROR_CLASS_CHOICES = [
+    ('throttled', 'Limite do Provedor (421/451)'),
+    ('temporary', 'Falha Temporária (4xx)'),
+    ('permanent', 'Recusa Definitiva (5xx)'),
+    ('auth', 'Autenticação'),
+    ('connection', 'Conexão'),
+    ('template', 'Template'),
+    ('other', 'Outros'),
+]
+
+# Situações da fila prontas para envio quando ``scheduled_at`` chega
+# (em 'failed' o horário é o da próxima tentativa)
+DUE_STATUSES = ['pending', 'failed']
+
 
 class SMTPConfiguration(models.Model):
     """
@@ -86,6 +104,26 @@ class SMTPConfiguration(models.Model):
         verbose_name="Nome do Remetente",
         help_text="Nome que aparecerá como remetente"
     )
+    max_messages_per_connection = models.PositiveIntegerField(
+        default=100,
+        verbose_name="Mensagens por Conexão",
+        help_text="Máximo de emails enviados por uma mesma conexão SMTP antes de reconectar (0 = sem limite)"
+    )
+    rate_limit_per_second = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Emails por Segundo",
+        help_text="Máximo de emails enviados por segundo por este servidor (0 = sem limite)"
+    )
+    rate_limit_per_minute = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Emails por Minuto",
+        help_text="Máximo de emails enviados por minuto por este servidor (0 = sem limite)"
+    )
+    rate_limit_per_hour = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Emails por Hora",
+        help_text="Máximo de emails enviados por hora por este servidor (0 = sem limite)"
+    )
     is_active = models.BooleanField(
         default=True,
         verbose_name="Ativo",
@@ -193,6 +231,57 @@ class EmailTemplate(models.Model):
         return f"{self.name} ({self.get_trigger_type_display()})"
 
 
+class EmailTemplateVersion(models.Model):
+    """
+    Cópia de uma versão de um template, usada pelos emails da fila que
+    precisam ser enviados exatamente com a versão vigente quando foram criados
+    """
+    template = models.ForeignKey(
+        EmailTemplate,
+        on_delete=models.CASCADE,
+        related_name='versions',
+        verbose_name="Template"
+    )
+    template_updated_at = models.DateTimeField(
+        verbose_name="Versão",
+        help_text="Data da alteração do template que gerou esta versão"
+    )
+    subject = models.CharField(
+        max_length=255,
+        verbose_name="Assunto"
+    )
+    html_content = models.TextField(
+        verbose_name="Conteúdo HTML"
+    )
+    text_content = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Conteúdo Texto"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Criado em"
+    )
+
+    class Meta:
+        verbose_name = "Versão de Template de Email"
+        verbose_name_plural = "Versões de Templates de Email"
+        ordering = ['-template_updated_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['template', 'template_updated_at'],
+                name='emailtemplateversion_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.template.name} ({self.template_updated_at:%d/%m/%Y %H:%M})"
+
+    @property
+    def name(self):
+        return self.template.name
+
+
 class EmailTrigger(models.Model):
     """
     Gatilhos que definem quando e como enviar emails
@@ -290,12 +379,14 @@ class EmailQueue(models.Model):
     )
     subject = models.CharField(
         max_length=255,
+        blank=True,
         verbose_name="Assunto",
-        help_text="Assunto do email"
+        help_text="Assunto do email (preenchido no envio quando renderizado no envio)"
     )
     html_content = models.TextField(
+        blank=True,
         verbose_name="Conteúdo HTML",
-        help_text="Conteúdo HTML do email"
+        help_text="Conteúdo HTML do email (vazio quando renderizado no envio)"
     )
     text_content = models.TextField(
         blank=True,
@@ -309,6 +400,28 @@ class EmailQueue(models.Model):
         verbose_name="Dados de Contexto",
         help_text="Dados usados para renderizar o template"
     )
+    render_at_send = models.BooleanField(
+        default=False,
+        verbose_name="Renderizar no Envio",
+        help_text="O conteúdo é gerado pelo worker no momento do envio, a partir dos dados de contexto"
+    )
+    campaign = models.ForeignKey(
+        'EmailCampaign',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='emails',
+        verbose_name="Campanha",
+        help_text="Campanha em massa que gerou este email"
+    )
+    template_version = models.ForeignKey(
+        EmailTemplateVersion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        verbose_name="Versão do Template",
+        help_text="Versão fixada do template; sem ela, é usada a versão atual do gatilho"
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -349,6 +462,31 @@ class EmailQueue(models.Model):
         verbose_name="Máximo de Tentativas",
         help_text="Número máximo de tentativas"
     )
+    last_attempt_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Última Tentativa",
+        help_text="Data e hora da última tentativa de envio"
+    )
+    last_error_code = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+        verbose_name="Código do Erro",
+        help_text="Código SMTP da última falha (5xx = recusa definitiva)"
+    )
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        verbose_name="Processado por",
+        help_text="Worker que detém o item enquanto está em processamento"
+    )
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Reservado até",
+        help_text="Fim da reserva do worker; depois disso o item volta para a fila"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Criado em"
@@ -365,13 +503,39 @@ class EmailQueue(models.Model):
         indexes = [
             models.Index(fields=['status', 'scheduled_at']),
             models.Index(fields=['priority', 'scheduled_at']),
+            models.Index(fields=['status', 'locked_until'], name='emailqueue_lease_idx'),
+            # Fila de envio: primeiro emails novos, depois as novas tentativas
+            models.Index(
+                fields=['retry_count', '-priority', 'scheduled_at'],
+                name='emailqueue_due_idx',
+                condition=models.Q(status__in=DUE_STATUSES),
+            ),
         ]
 
+    # Campos gravados ao final do processamento de um item
+    RESULT_FIELDS = [
+        'status', 'subject', 'sent_at', 'scheduled_at', 'error_message', 'retry_count', 'last_attempt_at',
+        'last_error_code', 'locked_by', 'locked_until', 'updated_at',
+    ]
+
     def __str__(self):
         return f"{self.to_email} - {self.subject} ({self.get_status_display()})"
 
+    def release_lease(self):
+        """Libera a reserva do worker"""
+        self.locked_by = None
+        self.locked_until = None
+
+    def defer(self, seconds):
+        """Devolve o email para a fila, para nova tentativa após ``seconds``"""
+        self.status = 'pending'
+        self.scheduled_at = timezone.now() + timedelta(seconds=seconds)
+        self.release_lease()
+
     def can_retry(self):
-        """Verifica se o email pode ser reenviado"""
+        """Verifica se o email pode ser reenviado manualmente"""
+        if self.status == 'dead':
+            return True
         return self.retry_count < self.max_retries and self.status in ['failed', 'pending']
 
 
@@ -444,6 +608,13 @@ class EmailLog(models.Model):
         verbose_name="Tempo de Processamento (s)",
         help_text="Tempo em segundos para processar o email"
     )
+    error_class = models.CharField(
+        max_length=20,
+        choices=ERROR_CLASS_CHOICES,
+        blank=True,
+        default='',
+        verbose_name="Classe do Erro"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Criado em"
@@ -460,4 +631,164 @@ class EmailLog(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.to_email} - {self.subject} ({self.get_status_display()}) - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
\ No newline at end of file
+        return f"{self.to_email} - {self.subject} ({self.get_status_display()}) - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
+
+
+class EmailCampaign(models.Model):
+    """
+    Envio em massa de um template para um grupo de usuários
+    """
+    STATUS_CHOICES = [
+        ('draft', 'Rascunho'),
+        ('queued', 'Aguardando'),
+        ('running', 'Enfileirando'),
+        ('completed', 'Enfileirada'),
+        ('failed', 'Falhou'),
+    ]
+
+    name = models.CharField(
+        max_length=200,
+        verbose_name="Nome",
+        help_text="Nome identificador da campanha"
+    )
+    template = models.ForeignKey(
+        EmailTemplate,
+        on_delete=models.PROTECT,
+        verbose_name="Template"
+    )
+    trigger = models.ForeignKey(
+        EmailTrigger,
+        on_delete=models.PROTECT,
+        verbose_name="Gatilho",
+        help_text="Gatilho que define a configuração SMTP dos emails"
+    )
+    context_data = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Dados de Contexto",
+        help_text="Dados comuns a todos os destinatários"
+    )
+    recipient_ids = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Destinatários",
+        help_text="IDs dos usuários selecionados"
+    )
+    priority = models.IntegerField(
+        choices=PRIORITY_CHOICES,
+        default=1,
+        verbose_name="Prioridade",
+        help_text="Prioridade dos emails na fila (baixa, para não atrasar os emails transacionais)"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='draft',
+        verbose_name="Status"
+    )
+    total_recipients = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Destinatários Selecionados"
+    )
+    queued_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Emails Enfileirados"
+    )
+    skipped_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Destinatários Ignorados",
+        help_text="Usuários inativos, sem email ou que não aceitam notificações por email"
+    )
+    error_message = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Mensagem de Erro"
+    )
+    started_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Iniciada em"
+    )
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Enfileiramento concluído em"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='email_campaigns',
+        verbose_name="Criada por"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Criada em"
+    )
+
+    class Meta:
+        verbose_name = "Campanha de Email"
+        verbose_name_plural = "Campanhas de Email"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+class EmailMetricRollup(models.Model):
+    """
+    Envios de uma hora agregados por configuração SMTP, status e classe de
+    erro, a partir do EmailLog
+    """
+    bucket_start = models.DateTimeField(
+        verbose_name="Início da Hora"
+    )
+    smtp_config = models.ForeignKey(
+        SMTPConfiguration,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='metric_rollups',
+        verbose_name="Configuração SMTP"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        verbose_name="Status"
+    )
+    error_class = models.CharField(
+        max_length=20,
+        choices=ERROR_CLASS_CHOICES,
+        blank=True,
+        default='',
+        verbose_name="Classe do Erro"
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Envios"
+    )
+    processing_time_sum = models.FloatField(
+        default=0,
+        verbose_name="Tempo Total de Processamento (s)"
+    )
+    latency_buckets = models.JSONField(
+        default=list,
+        verbose_name="Histograma de Latência",
+        help_text="Envios acumulados até cada limite de EMAIL_LATENCY_BUCKETS"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Atualizado em"
+    )
+
+    class Meta:
+        verbose_name = "Métrica de Email (por hora)"
+        verbose_name_plural = "Métricas de Email (por hora)"
+        ordering = ['-bucket_start']
+        indexes = [
+            models.Index(fields=['bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket_start.strftime('%d/%m/%Y %H:00')} - {self.status} ({self.count})"
@@ -0,0 +1,268 @@
+"""
+Limite de envio por servidor SMTP (token bucket).
+
+Cada ``SMTPConfiguration`` tem até três baldes de fichas: por segundo, por
+minuto e por hora. Um envio só é liberado quando há ficha em todos eles; caso
+contrário o limitador informa quanto tempo falta para a próxima ficha.
+
+O estado fica no Redis (compartilhado por todos os workers) e, se o Redis
+não estiver configurado ou disponível, em memória no próprio processo.
+
+Quando o servidor responde 421/451 (limite do provedor), o envio é suspenso
+por um período crescente e a vazão cai pela metade, voltando gradualmente ao
+limite configurado enquanto não houver novas recusas.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .smtp import smtp_error_code
+
+logger = logging.getLogger(__name__)
+
+# Redis usado para compartilhar os baldes entre processos ('' = apenas local)
+RATE_LIMIT_REDIS_URL = getattr(settings, 'EMAIL_RATE_LIMIT_REDIS_URL', '')
+# Códigos SMTP que indicam limite de envio do provedor
+THROTTLE_CODES = (421, 451)
+# Suspensão (segundos) após a primeira recusa; dobra a cada nova recusa
+THROTTLE_BACKOFF_BASE = getattr(settings, 'EMAIL_THROTTLE_BACKOFF_BASE', 30)
+THROTTLE_BACKOFF_MAX = getattr(settings, 'EMAIL_THROTTLE_BACKOFF_MAX', 900)
+# Menor fração da vazão configurada mantida após recusas
+THROTTLE_MIN_FACTOR = 0.1
+# Fração da vazão recuperada por segundo sem recusas (recupera tudo em 10 min)
+THROTTLE_RECOVERY_PER_SECOND = 1 / 600
+# Tempo (segundos) sem tentar o Redis depois de uma falha de conexão
+REDIS_RETRY_AFTER = 30
+
+WINDOWS = (
+    ('rate_limit_per_second', 1),
+    ('rate_limit_per_minute', 60),
+    ('rate_limit_per_hour', 3600),
+)
+
+
+def is_throttling_error(error):
+    """
+    Indica se o servidor recusou o envio por limite de taxa (421/451)
+    """
+    return smtp_error_code(error) in THROTTLE_CODES
+
+
+def bucket_limits(smtp_config):
+    """
+    Lista de (limite, janela em segundos) configurados, ignorando os zerados
+    """
+    limits = []
+    for field, window in WINDOWS:
+        limit = getattr(smtp_config, field, 0) or 0
+        if limit > 0:
+            limits.append((limit, window))
+    return limits
+
+
+def take_token(state, limits, now):
+    """
+    Tenta consumir uma ficha de cada balde, atualizando ``state``.
+
+    Retorna 0 quando o envio foi liberado, ou os segundos até a próxima
+    ficha. Mesma lógica do script Lua usado com o Redis.
+    """
+    blocked_until = state.get('blocked_until', 0.0)
+    if blocked_until > now:
+        return blocked_until - now
+
+    factor = state.get('factor', 1.0)
+    factor_ts = state.get('factor_ts', now)
+    factor = min(1.0, factor + max(0.0, now - factor_ts) * THROTTLE_RECOVERY_PER_SECOND)
+    if factor >= 1.0:
+        state['strikes'] = 0
+    state['factor'] = factor
+    state['factor_ts'] = now
+
+    elapsed = max(0.0, now - state.get('ts', now))
+    tokens = []
+    wait = 0.0
+    for index, (limit, window) in enumerate(limits):
+        capacity = max(1.0, limit * factor)
+        rate = limit * factor / window
+        available = min(capacity, state.get(f't{index}', capacity) + elapsed * rate)
+        if available < 1.0:
+            wait = max(wait, (1.0 - available) / rate)
+        tokens.append(available)
+
+    if wait == 0.0:
+        tokens = [available - 1.0 for available in tokens]
+    for index, available in enumerate(tokens):
+        state[f't{index}'] = available
+    state['ts'] = now
+    return wait
+
+
+def apply_throttle(state, now):
+    """
+    Registra uma recusa por limite: suspende o envio e reduz a vazão.
+
+    Retorna a duração da suspensão em segundos.
+    """
+    strikes = state.get('strikes', 0) + 1
+    backoff = min(THROTTLE_BACKOFF_MAX, THROTTLE_BACKOFF_BASE * 2 ** (strikes - 1))
+    state['strikes'] = strikes
+    state['factor'] = max(THROTTLE_MIN_FACTOR, state.get('factor', 1.0) / 2)
+    state['factor_ts'] = now + backoff
+    state['blocked_until'] = max(state.get('blocked_until', 0.0), now + backoff)
+    return backoff
+
+
+# Script equivalente a take_token/apply_throttle, executado de forma atômica no Redis.
+# ARGV: agora, operação ('take' ou 'throttle'), parâmetros, pares (limite, janela)
+REDIS_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local op = ARGV[2]
+local recovery = tonumber(ARGV[3])
+local min_factor = tonumber(ARGV[4])
+local backoff_base = tonumber(ARGV[5])
+local backoff_max = tonumber(ARGV[6])
+local ttl = tonumber(ARGV[7])
+local raw = redis.call('HGETALL', key)
+local state = {}
+for i = 1, #raw, 2 do state[raw[i]] = tonumber(raw[i + 1]) end
+
+local result = 0
+if op == 'throttle' then
+  local strikes = (state['strikes'] or 0) + 1
+  result = math.min(backoff_max, backoff_base * 2 ^ (strikes - 1))
+  state['strikes'] = strikes
+  state['factor'] = math.max(min_factor, (state['factor'] or 1) / 2)
+  state['factor_ts'] = now + result
+  state['blocked_until'] = math.max(state['blocked_until'] or 0, now + result)
+else
+  local blocked_until = state['blocked_until'] or 0
+  if blocked_until > now then
+    return tostring(blocked_until - now)
+  end
+  local factor = state['factor'] or 1
+  factor = math.min(1, factor + math.max(0, now - (state['factor_ts'] or now)) * recovery)
+  if factor >= 1 then state['strikes'] = 0 end
+  state['factor'] = factor
+  state['factor_ts'] = now
+
+  local elapsed = math.max(0, now - (state['ts'] or now))
+  local tokens = {}
+  local count = (#ARGV - 7) / 2
+  for i = 1, count do
+    local limit = tonumber(ARGV[6 + i * 2])
+    local window = tonumber(ARGV[7 + i * 2])
+    local capacity = math.max(1, limit * factor)
+    local rate = limit * factor / window
+    local available = math.min(capacity, (state['t' .. (i - 1)] or capacity) + elapsed * rate)
+    if available < 1 then
+      result = math.max(result, (1 - available) / rate)
+    end
+    tokens[i] = available
+  end
+  for i = 1, count do
+    if result == 0 then tokens[i] = tokens[i] - 1 end
+    state['t' .. (i - 1)] = tokens[i]
+  end
+  state['ts'] = now
+end
+
+local fields = {}
+for field, value in pairs(state) do
+  table.insert(fields, field)
+  table.insert(fields, tostring(value))
+end
+redis.call('HSET', key, unpack(fields))
+redis.call('EXPIRE', key, ttl)
+return tostring(result)
+"""
+
+
+class SMTPRateLimiter:
+    """
+    Limitador de envio por ``SMTPConfiguration`` (seguro entre threads)
+    """
+
+    def __init__(self, redis_url=RATE_LIMIT_REDIS_URL):
+        self.redis_url = redis_url
+        self._redis = None
+        self._script = None
+        self._redis_down_until = 0.0
+        self._local = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(smtp_config):
+        return f'email:ratelimit:{smtp_config.pk}'
+
+    def _get_script(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._script is None:
+            import redis
+
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=1, socket_connect_timeout=1)
+            self._script = self._redis.register_script(REDIS_SCRIPT)
+        return self._script
+
+    def _run(self, smtp_config, operation, limits, now):
+        script = self._get_script()
+        if script is not None:
+            args = [now, operation, THROTTLE_RECOVERY_PER_SECOND, THROTTLE_MIN_FACTOR,
+                    THROTTLE_BACKOFF_BASE, THROTTLE_BACKOFF_MAX, THROTTLE_BACKOFF_MAX + 3600]
+            for limit, window in limits:
+                args.extend((limit, window))
+            try:
+                return float(script(keys=[self.key(smtp_config)], args=args))
+            except Exception as e:
+                logger.warning(f"Limite de envio usando memória local; Redis indisponível: {e}")
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+        with self._lock:
+            state = self._local.setdefault(self.key(smtp_config), {})
+            if operation == 'throttle':
+                return apply_throttle(state, now)
+            return take_token(state, limits, now)
+
+    def try_acquire(self, smtp_config, now=None) -> float:
+        """
+        Consome uma ficha. Retorna 0 se o envio foi liberado, ou os
+        segundos até ele poder ser tentado de novo.
+        """
+        now = time.time() if now is None else now
+        return self._run(smtp_config, 'take', bucket_limits(smtp_config), now)
+
+    def acquire(self, smtp_config, max_wait) -> float:
+        """
+        Espera até ``max_wait`` segundos por uma ficha. Retorna 0 se o envio
+        foi liberado, ou a espera restante quando ela passaria do limite.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire(smtp_config)
+            if not wait:
+                return 0.0
+            if time.monotonic() + wait > deadline:
+                return wait
+            time.sleep(wait)
+
+    def throttled(self, smtp_config, now=None) -> float:
+        """
+        Registra uma recusa 421/451 do servidor. Retorna a suspensão aplicada.
+        """
+        now = time.time() if now is None else now
+        backoff = self._run(smtp_config, 'throttle', [], now)
+        logger.warning(
+            f"Servidor SMTP {smtp_config.host} limitou o envio; pausa de {backoff:.0f}s e vazão reduzida"
+        )
+        return backoff
+
+    def reset(self):
+        with self._lock:
+            self._local.clear()
+
+
+rate_limiter = SMTPRateLimiter()
@@ -0,0 +1,92 @@
+"""
+Registro em memória dos gatilhos de email ativos.
+
+Para cada ``trigger_type`` guarda o gatilho ativo de maior prioridade, já com
+``template`` e ``smtp_config`` carregados, evitando consultas a cada email
+disparado. Alterações em gatilhos, templates ou configurações SMTP trocam a
+versão gravada no cache (compartilhado entre os processos); cada processo
+recarrega seu registro quando percebe que a versão mudou.
+"""
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import EmailTemplate, EmailTrigger, SMTPConfiguration
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'email:trigger_registry:version'
+
+
+class TriggerRegistry:
+    """
+    Gatilho ativo de maior prioridade por tipo (seguro entre threads)
+    """
+
+    def __init__(self):
+        self._version = None
+        self._triggers = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            # Versão perdida (cache reiniciado): todos os processos recarregam
+            cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_CACHE_KEY)
+        return version
+
+    @staticmethod
+    def load():
+        """
+        Lê do banco os gatilhos ativos, mantendo o de maior prioridade por tipo
+        """
+        triggers = {}
+        queryset = EmailTrigger.objects.filter(is_active=True).select_related(
+            'template', 'smtp_config'
+        ).order_by('trigger_type', '-priority')
+        for trigger in queryset:
+            triggers.setdefault(trigger.trigger_type, trigger)
+        return triggers
+
+    def get(self, trigger_type):
+        """
+        Gatilho ativo de maior prioridade para o tipo, ou None
+        """
+        version = self.current_version()
+        with self._lock:
+            if version != self._version:
+                self._triggers = self.load()
+                self._version = version
+                logger.debug(f"Registro de gatilhos recarregado ({len(self._triggers)} tipos)")
+            return self._triggers.get(trigger_type)
+
+    def invalidate(self):
+        """
+        Troca a versão compartilhada; todos os processos recarregam no próximo uso
+        """
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        with self._lock:
+            self._version = None
+            self._triggers = {}
+
+
+trigger_registry = TriggerRegistry()
+
+
+def _invalidate_registry(sender, **kwargs):
+    trigger_registry.invalidate()
+    # De novo após o commit: outro processo pode ter recarregado o registro
+    # antes dele, ainda com os dados antigos, e guardado a versão nova
+    transaction.on_commit(trigger_registry.invalidate)
+
+
+for model in (EmailTrigger, EmailTemplate, SMTPConfiguration):
+    dispatch_uid = f'trigger_registry:{model._meta.label_lower}'
+    post_save.connect(_invalidate_registry, sender=model, dispatch_uid=dispatch_uid)
+    post_delete.connect(_invalidate_registry, sender=model, dispatch_uid=dispatch_uid)
@@ -1,16 +1,24 @@
 """
 Serviços para o sistema de email
 """
-import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from django.template import Template, Context
 from django.utils import timezone
 from django.conf import settings
 import logging
+import random
+from datetime import timedelta
 from typing import Dict, Any, Optional
-from .models import SMTPConfiguration, EmailTemplate, EmailTrigger, EmailQueue, EmailLog
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.template import Context, TemplateSyntaxError
+from .models import (
+    SMTPConfiguration, EmailTemplate, EmailTemplateVersion, EmailTrigger, EmailQueue, EmailLog,
+    EmailCampaign, DUE_STATUSES
+)
+from .ratelimit import is_throttling_error, rate_limiter
+from .registry import trigger_registry
+from .smtp import build_message, connection_pool, error_class, is_permanent_error, smtp_error_code
+from utils.template_cache import template_cache
 
 logger = logging.getLogger(__name__)
 
@@ -49,37 +57,18 @@ class EmailService:
             return False
         
         try:
-            # Preparar dados do remetente
-            sender_email = from_email or self.smtp_config.from_email
-            sender_name = from_name or self.smtp_config.from_name
-            
-            # Criar mensagem
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = f"{sender_name} <{sender_email}>"
-            message["To"] = to_email
-            
-            # Adicionar conteúdo
-            if text_content:
-                text_part = MIMEText(text_content, "plain", "utf-8")
-                message.attach(text_part)
-            
-            html_part = MIMEText(html_content, "html", "utf-8")
-            message.attach(html_part)
-            
-            # Conectar e enviar
-            context = ssl.create_default_context()
-            
-            if self.smtp_config.use_ssl:
-                server = smtplib.SMTP_SSL(self.smtp_config.host, self.smtp_config.port, context=context)
-            else:
-                server = smtplib.SMTP(self.smtp_config.host, self.smtp_config.port)
-                if self.smtp_config.use_tls:
-                    server.starttls(context=context)
+            message = build_message(
+                self.smtp_config,
+                to_email=to_email,
+                subject=subject,
+                html_content=html_content,
+                text_content=text_content,
+                from_email=from_email,
+                from_name=from_name,
+            )
             
-            server.login(self.smtp_config.username, self.smtp_config.password)
-            server.send_message(message)
-            server.quit()
+            # Envia por uma conexão reaproveitada do pool
+            connection_pool.send(self.smtp_config, message, verify_certificates=True)
             
             logger.info(f"Email enviado com sucesso para {to_email}")
             return True
@@ -100,27 +89,15 @@ class EmailTemplateService:
         Renderiza um template de email com os dados fornecidos
         """
         try:
-            # Renderizar assunto
-            subject_template = Template(template.subject)
-            subject_context = Context(context_data)
-            rendered_subject = subject_template.render(subject_context)
-            
-            # Renderizar conteúdo HTML
-            html_template = Template(template.html_content)
-            html_context = Context(context_data)
-            rendered_html = html_template.render(html_context)
-            
-            # Renderizar conteúdo texto (se existir)
-            rendered_text = None
-            if template.text_content:
-                text_template = Template(template.text_content)
-                text_context = Context(context_data)
-                rendered_text = text_template.render(text_context)
-            
+            # Templates compilados ficam em cache até o template ser alterado;
+            # o conteúdo texto só é renderizado se existir
+            rendered = template_cache.render(
+                template, ('subject', 'html_content', 'text_content'), context_data
+            )
             return {
-                'subject': rendered_subject,
-                'html_content': rendered_html,
-                'text_content': rendered_text
+                'subject': rendered['subject'] or '',
+                'html_content': rendered['html_content'] or '',
+                'text_content': rendered['text_content']
             }
             
         except Exception as e:
@@ -128,11 +105,61 @@ class EmailTemplateService:
             raise
 
 
+class EmailRetryPolicy:
+    """
+    Política de novas tentativas dos itens da fila.
+
+    Falhas temporárias são tentadas de novo com espera exponencial e
+    aleatória (jitter), para que um servidor fora do ar não receba todas as
+    tentativas ao mesmo tempo. Recusas definitivas (5xx) e itens que
+    esgotaram ``max_retries`` vão para 'dead' e só voltam manualmente.
+    """
+
+    # Espera (segundos) antes da primeira nova tentativa; dobra a cada falha
+    BACKOFF_BASE = getattr(settings, 'EMAIL_RETRY_BACKOFF_BASE', 60)
+    BACKOFF_MAX = getattr(settings, 'EMAIL_RETRY_BACKOFF_MAX', 6 * 3600)
+
+    @staticmethod
+    def backoff_seconds(attempt: int) -> float:
+        """
+        Espera antes da tentativa seguinte à ``attempt``-ésima falha
+        (metade fixa, metade aleatória)
+        """
+        delay = min(EmailRetryPolicy.BACKOFF_MAX, EmailRetryPolicy.BACKOFF_BASE * 2 ** max(attempt - 1, 0))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def record_failure(email_queue: EmailQueue, error: Exception) -> None:
+        """
+        Registra a falha no item e agenda a próxima tentativa ou o descarta
+        """
+        email_queue.retry_count += 1
+        email_queue.error_message = str(error)
+        email_queue.last_error_code = smtp_error_code(error)
+        email_queue.release_lease()
+
+        # Erro no template não se resolve tentando de novo
+        permanent = is_permanent_error(error) or isinstance(error, TemplateSyntaxError)
+        if permanent or email_queue.retry_count >= email_queue.max_retries:
+            email_queue.status = 'dead'
+            return
+
+        email_queue.status = 'failed'
+        email_queue.scheduled_at = timezone.now() + timedelta(
+            seconds=EmailRetryPolicy.backoff_seconds(email_queue.retry_count)
+        )
+
+
 class EmailQueueService:
     """
     Serviço para gerenciamento da fila de emails
     """
     
+    # Renderizar no envio (worker) em vez de na requisição que criou o email
+    RENDER_AT_SEND = getattr(settings, 'EMAIL_RENDER_AT_SEND', True)
+    # Dias que o conteúdo renderizado de emails finalizados é mantido
+    CONTENT_RETENTION_DAYS = getattr(settings, 'EMAIL_CONTENT_RETENTION_DAYS', 30)
+    
     @staticmethod
     def add_to_queue(
         trigger: EmailTrigger,
@@ -140,14 +167,32 @@ class EmailQueueService:
         context_data: Dict[str, Any],
         to_name: str = None,
         priority: int = None,
-        delay_minutes: int = None
+        delay_minutes: int = None,
+        render_at_send: bool = None,
+        pin_template_version: bool = False
     ) -> EmailQueue:
         """
-        Adiciona um email à fila para processamento
+        Adiciona um email à fila para processamento.
+        
+        No modo ``render_at_send`` (padrão: EMAIL_RENDER_AT_SEND) só o gatilho
+        e ``context_data`` são gravados, e o worker renderiza o template no
+        envio. ``pin_template_version`` fixa a versão atual do template, para
+        que alterações posteriores não afetem este email.
         """
+        if render_at_send is None:
+            render_at_send = EmailQueueService.RENDER_AT_SEND
         try:
-            # Renderizar template
-            rendered_content = EmailTemplateService.render_template(trigger.template, context_data)
+            template_version = None
+            if pin_template_version:
+                template_version = EmailQueueService.pinned_version(trigger.template)
+            
+            if render_at_send:
+                rendered_content = {'subject': '', 'html_content': '', 'text_content': None}
+            else:
+                # Renderizar template
+                rendered_content = EmailTemplateService.render_template(
+                    template_version or trigger.template, context_data
+                )
             
             # Calcular data de agendamento
             scheduled_at = timezone.now()
@@ -165,6 +210,8 @@ class EmailQueueService:
                 html_content=rendered_content['html_content'],
                 text_content=rendered_content['text_content'],
                 context_data=context_data,
+                render_at_send=render_at_send,
+                template_version=template_version,
                 priority=priority or trigger.priority,
                 scheduled_at=scheduled_at
             )
@@ -177,42 +224,99 @@ class EmailQueueService:
             raise
     
     @staticmethod
-    def process_queue_item(email_queue: EmailQueue) -> bool:
+    def pinned_version(template: EmailTemplate) -> EmailTemplateVersion:
+        """
+        Cópia da versão atual do template (uma por alteração, compartilhada)
+        """
+        version, _created = EmailTemplateVersion.objects.get_or_create(
+            template=template,
+            template_updated_at=template.updated_at,
+            defaults={
+                'subject': template.subject,
+                'html_content': template.html_content,
+                'text_content': template.text_content,
+            }
+        )
+        return version
+    
+    @staticmethod
+    def rendered_content(email_queue: EmailQueue) -> Dict[str, str]:
+        """
+        Conteúdo a enviar: o gravado na fila ou, no modo ``render_at_send``,
+        o template (versão fixada ou atual do gatilho) renderizado agora
         """
-        Processa um item da fila de emails
+        if not email_queue.render_at_send:
+            return {
+                'subject': email_queue.subject,
+                'html_content': email_queue.html_content,
+                'text_content': email_queue.text_content,
+            }
+        template = email_queue.template_version or email_queue.trigger.template
+        return EmailTemplateService.render_template(template, email_queue.context_data)
+    
+    @staticmethod
+    def save_result(email_queue: EmailQueue, lease_owner: str = None) -> bool:
+        """
+        Grava o resultado do processamento (``RESULT_FIELDS``).
+
+        Com ``lease_owner`` a gravação só acontece se o item ainda estiver
+        reservado por esse worker: se a reserva expirou e o item voltou para
+        a fila (ou já está com outro worker), o resultado é descartado.
+        Retorna False nesse caso.
+        """
+        if not lease_owner:
+            email_queue.save(update_fields=EmailQueue.RESULT_FIELDS)
+            return True
+        email_queue.updated_at = timezone.now()
+        values = {field: getattr(email_queue, field) for field in EmailQueue.RESULT_FIELDS}
+        saved = EmailQueue.objects.filter(
+            pk=email_queue.pk, status='processing', locked_by=lease_owner
+        ).update(**values)
+        if not saved:
+            logger.warning(f"Reserva do email {email_queue.pk} perdida por {lease_owner}; resultado descartado")
+        return bool(saved)
+    
+    @staticmethod
+    def process_queue_item(email_queue: EmailQueue, lease_owner: str = None) -> bool:
+        """
+        Processa um item da fila de emails.
+        
+        Itens reservados por um worker informam ``lease_owner``: o resultado
+        só é gravado enquanto a reserva for desse worker.
         """
         start_time = timezone.now()
+        email_queue.last_attempt_at = start_time
         
         try:
-            # Marcar como processando
-            email_queue.status = 'processing'
-            email_queue.save()
+            # Marcar como processando (itens obtidos pelo worker já chegam com lease)
+            if email_queue.status != 'processing':
+                email_queue.status = 'processing'
+                email_queue.save(update_fields=['status', 'updated_at'])
             
-            # Obter configuração SMTP
+            # Enviar por uma conexão do pool (falhas seguem para o tratamento abaixo)
             smtp_config = email_queue.trigger.smtp_config
-            from .email_service_fix import FixedEmailService
-            email_service = FixedEmailService(smtp_config)
-            
-            # Enviar email
-            success = email_service.send_email(
+            content = EmailQueueService.rendered_content(email_queue)
+            # Só o assunto fica gravado; o corpo renderizado não é guardado
+            email_queue.subject = content['subject'][:255]
+            message = build_message(
+                smtp_config,
                 to_email=email_queue.to_email,
-                subject=email_queue.subject,
-                html_content=email_queue.html_content,
-                text_content=email_queue.text_content,
-                to_name=email_queue.to_name
+                subject=content['subject'],
+                html_content=content['html_content'],
+                text_content=content['text_content'],
             )
+            connection_pool.send(smtp_config, message, verify_certificates=False)
+            success = True
             
             # Atualizar status
-            if success:
-                email_queue.status = 'sent'
-                email_queue.sent_at = timezone.now()
-                email_queue.error_message = None
-            else:
-                email_queue.status = 'failed'
-                email_queue.error_message = "Falha no envio do email"
+            email_queue.status = 'sent'
+            email_queue.sent_at = timezone.now()
+            email_queue.error_message = None
+            email_queue.last_error_code = None
             
             email_queue.retry_count += 1
-            email_queue.save()
+            email_queue.release_lease()
+            EmailQueueService.save_result(email_queue, lease_owner)
             
             # Calcular tempo de processamento
             processing_time = (timezone.now() - start_time).total_seconds()
@@ -236,11 +340,16 @@ class EmailQueueService:
             return success
             
         except Exception as e:
-            # Marcar como falhou
-            email_queue.status = 'failed'
-            email_queue.error_message = str(e)
-            email_queue.retry_count += 1
-            email_queue.save()
+            if is_throttling_error(e):
+                # Limite do provedor (421/451): reduzir o ritmo e tentar depois,
+                # sem contar como tentativa
+                backoff = rate_limiter.throttled(email_queue.trigger.smtp_config)
+                email_queue.error_message = str(e)
+                email_queue.last_error_code = smtp_error_code(e)
+                email_queue.defer(backoff)
+            else:
+                EmailRetryPolicy.record_failure(email_queue, e)
+            EmailQueueService.save_result(email_queue, lease_owner)
             
             # Calcular tempo de processamento
             processing_time = (timezone.now() - start_time).total_seconds()
@@ -255,6 +364,7 @@ class EmailQueueService:
                 subject=email_queue.subject,
                 status='failed',
                 error_message=str(e),
+                error_class=error_class(e),
                 retry_count=email_queue.retry_count,
                 processing_time=processing_time
             )
@@ -262,37 +372,92 @@ class EmailQueueService:
             logger.error(f"Erro ao processar email {email_queue.id}: {e}")
             return False
     
+    @staticmethod
+    def due_queryset(now=None):
+        """
+        Itens prontos para envio, na ordem de processamento.
+
+        Emails novos vêm antes das novas tentativas (menos tentativas
+        primeiro) e, entre eles, vale a prioridade. Usa o índice
+        ``emailqueue_due_idx``.
+        """
+        return EmailQueue.objects.filter(
+            status__in=DUE_STATUSES,
+            scheduled_at__lte=now or timezone.now(),
+        ).order_by('retry_count', '-priority', 'scheduled_at')
+
     @staticmethod
     def get_pending_emails(limit: int = 10) -> list:
         """
         Obtém emails pendentes para processamento
         """
-        return EmailQueue.objects.filter(
-            status='pending',
-            scheduled_at__lte=timezone.now()
-        ).order_by('-priority', 'scheduled_at')[:limit]
+        return EmailQueueService.due_queryset()[:limit]
     
     @staticmethod
-    def retry_failed_emails(limit: int = 5) -> int:
+    def requeue(email_queue: EmailQueue) -> bool:
+        """
+        Devolve manualmente um email que falhou para a fila, para envio imediato.
+
+        Emails descartados ('dead') recebem um novo ciclo de tentativas.
         """
-        Tenta reenviar emails que falharam
+        if not email_queue.can_retry():
+            return False
+        if email_queue.status == 'dead':
+            email_queue.retry_count = 0
+        previous_status = email_queue.status
+        email_queue.status = 'pending'
+        email_queue.scheduled_at = timezone.now()
+        email_queue.updated_at = timezone.now()
+        email_queue.release_lease()
+        # Só se o item não mudou desde a leitura (p.ex. reservado por um worker)
+        values = {field: getattr(email_queue, field) for field in EmailQueue.RESULT_FIELDS}
+        return bool(EmailQueue.objects.filter(pk=email_queue.pk, status=previous_status).update(**values))
+
+    @staticmethod
+    def retry_failed_emails(limit: int = 5) -> list:
         """
-        from django.db import models
-        failed_emails = EmailQueue.objects.filter(
-            status='failed'
-        ).filter(
-            models.Q(retry_count__lt=models.F('max_retries'))
-        ).order_by('-priority', 'scheduled_at')[:limit]
+        Antecipa para agora as novas tentativas já agendadas de emails que falharam.
+
+        As novas tentativas são agendadas automaticamente pela
+        ``EmailRetryPolicy``; isto serve para quando o servidor voltou antes
+        do previsto. Emails descartados ('dead') só voltam por ``requeue``.
+        Retorna os IDs antecipados.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                EmailQueue.objects.filter(status='failed', scheduled_at__gt=now)
+                .select_for_update(skip_locked=True)
+                .order_by('-priority', 'scheduled_at')
+                .values_list('pk', flat=True)[:limit]
+            )
+            EmailQueue.objects.filter(pk__in=ids).update(scheduled_at=now, updated_at=now)
+        return ids
+
+    @staticmethod
+    def purge_rendered_content(days: int = None) -> int:
+        """
+        Remove o conteúdo renderizado de emails finalizados há mais de ``days``
+        dias (padrão: EMAIL_CONTENT_RETENTION_DAYS). Assunto, destinatário e
+        dados de contexto continuam guardados, assim como o EmailLog.
+
+        Emails descartados ('dead') mantêm o conteúdo: podem voltar para a
+        fila por ``requeue`` e seriam enviados em branco.
+        """
+        if days is None:
+            days = EmailQueueService.CONTENT_RETENTION_DAYS
+        cutoff = timezone.now() - timedelta(days=days)
+        purged = EmailQueue.objects.filter(
+            status__in=['sent', 'cancelled'],
+            updated_at__lt=cutoff,
+        ).exclude(html_content='', text_content__isnull=True).update(html_content='', text_content=None)
         
-        retried_count = 0
-        for email_queue in failed_emails:
-            if email_queue.can_retry():
-                email_queue.status = 'pending'
-                email_queue.scheduled_at = timezone.now()
-                email_queue.save()
-                retried_count += 1
+        # Versões fixadas que não são mais usadas por nenhum email
+        EmailTemplateVersion.objects.filter(created_at__lt=cutoff, emailqueue__isnull=True).delete()
         
-        return retried_count
+        if purged:
+            logger.info(f"Conteúdo renderizado removido de {purged} emails")
+        return purged
 
 
 class EmailTriggerService:
@@ -313,19 +478,13 @@ class EmailTriggerService:
         Dispara um email baseado no tipo de gatilho
         """
         try:
-            # Buscar gatilhos ativos para este tipo
-            triggers = EmailTrigger.objects.filter(
-                trigger_type=trigger_type,
-                is_active=True
-            ).order_by('-priority')
+            # Gatilho ativo de maior prioridade, com template e SMTP já carregados
+            trigger = trigger_registry.get(trigger_type)
             
-            if not triggers.exists():
+            if trigger is None:
                 logger.warning(f"Nenhum gatilho ativo encontrado para: {trigger_type}")
                 return None
             
-            # Usar o primeiro gatilho (maior prioridade)
-            trigger = triggers.first()
-            
             # Verificar condições (se existirem)
             if trigger.conditions:
                 if not EmailTriggerService._check_conditions(trigger.conditions, context_data):
@@ -365,3 +524,257 @@ class EmailTriggerService:
         except Exception as e:
             logger.error(f"Erro ao verificar condições: {e}")
             return False
+
+
+class EmailCampaignService:
+    """
+    Serviço para envio de emails em massa (campanhas)
+    """
+    
+    # Destinatários lidos e emails gravados por lote ao enfileirar uma campanha
+    CHUNK_SIZE = getattr(settings, 'EMAIL_CAMPAIGN_CHUNK_SIZE', 500)
+    # Minutos sem progresso após os quais uma campanha 'running' foi interrompida
+    STALE_MINUTES = getattr(settings, 'EMAIL_CAMPAIGN_STALE_MINUTES', 15)
+    
+    @staticmethod
+    def eligible_recipients(recipients):
+        """
+        Filtra (no banco) os usuários que podem receber a campanha: ativos,
+        com email e que aceitam notificações por email
+        """
+        return recipients.filter(is_active=True, notificacoes_email=True).exclude(email='')
+    
+    @staticmethod
+    def campaign_trigger(template: EmailTemplate, smtp_config: SMTPConfiguration = None) -> EmailTrigger:
+        """
+        Gatilho usado pelos emails da campanha: um gatilho ativo do template
+        ou, se não houver, um gatilho inativo próprio para campanhas
+        """
+        triggers = EmailTrigger.objects.filter(template=template, is_active=True)
+        if smtp_config is not None:
+            triggers = triggers.filter(smtp_config=smtp_config)
+        trigger = triggers.order_by('-priority').first()
+        if trigger is not None:
+            return trigger
+        
+        smtp_config = smtp_config or SMTPConfiguration.objects.filter(is_default=True, is_active=True).first()
+        if smtp_config is None:
+            raise ValueError("Nenhuma configuração SMTP ativa para enviar a campanha")
+        # Inativo para não ser usado pelos eventos do sistema
+        trigger, _created = EmailTrigger.objects.get_or_create(
+            trigger_type='custom',
+            template=template,
+            smtp_config=smtp_config,
+            is_active=False,
+            defaults={'name': f'Campanha: {template.name}'[:100], 'priority': 1}
+        )
+        return trigger
+    
+    @staticmethod
+    def create_campaign(
+        name: str,
+        template: EmailTemplate,
+        recipients,
+        context_data: Dict[str, Any] = None,
+        smtp_config: SMTPConfiguration = None,
+        priority: int = 1,
+        created_by=None,
+        start: bool = True
+    ) -> EmailCampaign:
+        """
+        Cria uma campanha para ``recipients`` (queryset de usuários).
+        
+        Os destinatários são resolvidos agora, guardando só os ids; o
+        enfileiramento é feito pela tarefa ``run_email_campaign`` depois do
+        commit quando ``start`` é verdadeiro.
+        """
+        User = get_user_model()
+        selected = User.objects.filter(pk__in=recipients.values('pk'))
+        recipient_ids = list(
+            EmailCampaignService.eligible_recipients(selected).order_by('pk').values_list('pk', flat=True)
+        )
+        total = selected.count()
+        
+        campaign = EmailCampaign.objects.create(
+            name=name,
+            template=template,
+            trigger=EmailCampaignService.campaign_trigger(template, smtp_config),
+            context_data=context_data or {},
+            recipient_ids=recipient_ids,
+            priority=priority,
+            total_recipients=total,
+            skipped_count=total - len(recipient_ids),
+            created_by=created_by,
+        )
+        if start:
+            EmailCampaignService.start(campaign)
+        return campaign
+    
+    @staticmethod
+    def start(campaign: EmailCampaign) -> None:
+        """
+        Agenda o enfileiramento da campanha para depois do commit
+        """
+        from .tasks import run_email_campaign
+        
+        EmailCampaign.objects.filter(pk=campaign.pk).update(status='queued')
+        campaign.status = 'queued'
+        transaction.on_commit(lambda: run_email_campaign.delay(campaign.pk))
+    
+    @staticmethod
+    def can_restart(campaign: EmailCampaign) -> bool:
+        """
+        Indica se a campanha pode ser (re)iniciada: não concluída e, se
+        'running', sem novos emails na fila há STALE_MINUTES (o processo que a
+        enfileirava foi interrompido)
+        """
+        if campaign.status == 'completed':
+            return False
+        if campaign.status != 'running':
+            return True
+        last_queued_at = campaign.emails.aggregate(last=Max('created_at'))['last']
+        last_progress = max(filter(None, [campaign.started_at, last_queued_at]), default=None)
+        stale_before = timezone.now() - timedelta(minutes=EmailCampaignService.STALE_MINUTES)
+        return last_progress is None or last_progress < stale_before
+    
+    @staticmethod
+    def recipient_context(user) -> Dict[str, Any]:
+        return {
+            'user_name': user.get_full_name() or user.first_name or user.email,
+            'user_email': user.email,
+            'user_first_name': user.first_name,
+            'user_last_name': user.last_name,
+        }
+    
+    @staticmethod
+    def build_emails(campaign: EmailCampaign, users, render_at_send: bool, scheduled_at) -> list:
+        """
+        Monta (sem gravar) os itens da fila de um lote de destinatários.
+        
+        Fora do modo ``render_at_send`` os campos do template são compilados
+        uma vez e renderizados com um único ``Context``, empilhando os dados
+        de cada destinatário.
+        """
+        template = campaign.trigger.template
+        compiled = {}
+        if not render_at_send:
+            for field in ('subject', 'html_content', 'text_content'):
+                if getattr(template, field):
+                    compiled[field] = template_cache.get(template, field)
+        context = Context(campaign.context_data)
+        
+        emails = []
+        for user in users:
+            context_data = dict(campaign.context_data, **EmailCampaignService.recipient_context(user))
+            rendered = {'subject': '', 'html_content': '', 'text_content': None}
+            if compiled:
+                with context.push(EmailCampaignService.recipient_context(user)):
+                    for field, field_template in compiled.items():
+                        rendered[field] = field_template.render(context)
+            emails.append(EmailQueue(
+                trigger=campaign.trigger,
+                campaign=campaign,
+                to_email=user.email,
+                to_name=user.get_full_name() or user.first_name,
+                subject=rendered['subject'],
+                html_content=rendered['html_content'],
+                text_content=rendered['text_content'],
+                context_data=context_data,
+                render_at_send=render_at_send,
+                priority=campaign.priority,
+                scheduled_at=scheduled_at,
+            ))
+        return emails
+    
+    @staticmethod
+    def run(campaign_id: int, render_at_send: bool = None) -> EmailCampaign:
+        """
+        Enfileira os emails da campanha em lotes de CHUNK_SIZE (``bulk_create``).
+        
+        Pode ser executada de novo após uma falha: destinatários que já têm
+        email desta campanha na fila são ignorados. Qualquer erro depois de a
+        campanha passar para 'running' a deixa 'failed', que pode ser reiniciada.
+        """
+        if render_at_send is None:
+            render_at_send = EmailQueueService.RENDER_AT_SEND
+        campaign = EmailCampaign.objects.select_related('trigger__template').get(pk=campaign_id)
+        if campaign.status == 'completed':
+            return campaign
+        
+        User = get_user_model()
+        chunk_size = EmailCampaignService.CHUNK_SIZE
+        campaign.status = 'running'
+        campaign.started_at = campaign.started_at or timezone.now()
+        campaign.error_message = None
+        campaign.save(update_fields=['status', 'started_at', 'error_message'])
+        
+        already_queued = EmailQueue.objects.filter(campaign=campaign).values('to_email')
+        try:
+            for start in range(0, len(campaign.recipient_ids), chunk_size):
+                chunk = campaign.recipient_ids[start:start + chunk_size]
+                # Reaplica o filtro: o usuário pode ter desativado as notificações depois da criação
+                users = EmailCampaignService.eligible_recipients(
+                    User.objects.filter(pk__in=chunk)
+                ).exclude(email__in=already_queued).only('pk', 'email', 'first_name', 'last_name')
+                
+                emails = EmailCampaignService.build_emails(campaign, users, render_at_send, timezone.now())
+                with transaction.atomic():
+                    EmailQueue.objects.bulk_create(emails, batch_size=chunk_size)
+                    EmailCampaign.objects.filter(pk=campaign.pk).update(
+                        queued_count=F('queued_count') + len(emails)
+                    )
+            
+            campaign.refresh_from_db(fields=['queued_count'])
+            campaign.status = 'completed'
+            campaign.finished_at = timezone.now()
+            # Destinatários que deixaram de ser elegíveis entre a criação e o envio
+            campaign.skipped_count = campaign.total_recipients - campaign.queued_count
+            campaign.save(update_fields=['status', 'finished_at', 'skipped_count'])
+        except Exception as e:
+            logger.error(f"Erro ao enfileirar a campanha {campaign.pk}: {e}")
+            EmailCampaign.objects.filter(pk=campaign.pk).update(status='failed', error_message=str(e))
+            campaign.refresh_from_db()
+            return campaign
+        
+        logger.info(f"Campanha {campaign.pk} enfileirada: {campaign.queued_count} emails")
+        return campaign
+    
+    @staticmethod
+    def progress(campaign: EmailCampaign) -> Dict[str, Any]:
+        """
+        Andamento da campanha: emails por status e vazão de enfileiramento e
+        de envio (emails/s), com uma única consulta à fila
+        """
+        stats = campaign.emails.aggregate(
+            pending=Count('pk', filter=Q(status__in=['pending', 'processing'])),
+            sent=Count('pk', filter=Q(status='sent')),
+            failed=Count('pk', filter=Q(status__in=['failed', 'dead'])),
+            cancelled=Count('pk', filter=Q(status='cancelled')),
+            first_sent_at=Min('sent_at'),
+            last_sent_at=Max('sent_at'),
+        )
+        
+        enqueue_rate = None
+        if campaign.started_at and campaign.finished_at:
+            seconds = (campaign.finished_at - campaign.started_at).total_seconds()
+            enqueue_rate = round(campaign.queued_count / seconds, 1) if seconds > 0 else None
+        
+        send_rate = None
+        if stats['sent'] > 1:
+            seconds = (stats['last_sent_at'] - stats['first_sent_at']).total_seconds()
+            send_rate = round(stats['sent'] / seconds, 2) if seconds > 0 else None
+        
+        finished = stats['sent'] + stats['failed'] + stats['cancelled']
+        return {
+            'status': campaign.status,
+            'total_recipients': campaign.total_recipients,
+            'skipped': campaign.skipped_count,
+            'queued': campaign.queued_count,
+            'pending': stats['pending'],
+            'sent': stats['sent'],
+            'failed': stats['failed'],
+            'cancelled': stats['cancelled'],
+            'percent_done': round(finished / campaign.queued_count * 100, 1) if campaign.queued_count else 0.0,
+            'enqueue_rate': enqueue_rate,
+            'send_rate': send_rate,
+        }
@@ -0,0 +1,293 @@
+"""
+Conexões SMTP persistentes, reaproveitadas entre mensagens.
+
+Cada ``SMTPConfiguration`` tem um pool de conexões já autenticadas. Uma
+conexão é emprestada para enviar uma mensagem e devolvida em seguida; só é
+descartada quando atinge ``max_messages_per_connection``, quando o servidor
+a encerra ou responde com erro 4xx, ou quando falha no NOOP de verificação
+feito após um período ocioso.
+"""
+import atexit
+import logging
+import os
+import smtplib
+import ssl
+import threading
+import time
+from collections import defaultdict
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from django.conf import settings
+from django.template import TemplateSyntaxError
+
+logger = logging.getLogger(__name__)
+
+# Tempo limite (segundos) das operações de rede
+SMTP_TIMEOUT = getattr(settings, 'EMAIL_SMTP_TIMEOUT', 30)
+# Conexões ociosas mantidas por servidor
+SMTP_POOL_MAX_IDLE = getattr(settings, 'EMAIL_SMTP_POOL_MAX_IDLE', 4)
+# Ociosidade (segundos) a partir da qual a conexão é verificada com NOOP
+SMTP_POOL_HEALTH_CHECK_AFTER = getattr(settings, 'EMAIL_SMTP_POOL_HEALTH_CHECK_AFTER', 30)
+# Ociosidade (segundos) a partir da qual a conexão é fechada sem verificação
+SMTP_POOL_IDLE_TIMEOUT = getattr(settings, 'EMAIL_SMTP_POOL_IDLE_TIMEOUT', 300)
+
+
+def build_message(smtp_config, to_email, subject, html_content, text_content=None,
+                  from_email=None, from_name=None):
+    """
+    Monta a mensagem MIME (texto e HTML) com o remetente da configuração
+    """
+    sender_email = from_email or smtp_config.from_email
+    sender_name = from_name or smtp_config.from_name
+
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = f"{sender_name} <{sender_email}>"
+    message["To"] = to_email
+
+    if text_content:
+        message.attach(MIMEText(text_content, "plain", "utf-8"))
+    message.attach(MIMEText(html_content, "html", "utf-8"))
+    return message
+
+
+def smtp_error_code(error):
+    """
+    Código SMTP de uma exceção do smtplib (o primeiro destinatário, em recusas)
+    """
+    code = getattr(error, 'smtp_code', None)
+    if code is None and isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [value[0] for value in error.recipients.values()]
+        code = codes[0] if codes else None
+    return code
+
+
+def is_permanent_error(error):
+    """
+    Indica se o servidor recusou a mensagem em definitivo (5xx).
+
+    Falhas de autenticação são da configuração, não da mensagem, e por isso
+    continuam sendo tentadas de novo.
+    """
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    code = smtp_error_code(error)
+    return code is not None and 500 <= code < 600
+
+
+def is_transient_error(error):
+    """
+    Indica se o erro encerra a sessão ou é temporário (desconexão ou 4xx)
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, 'smtp_code', None)
+    return code is not None and 400 <= code < 500
+
+
+def error_class(error):
+    """
+    Classe do erro de envio, usada nas métricas de falha
+    """
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return 'auth'
+    code = smtp_error_code(error)
+    if code in (421, 451):
+        return 'throttled'
+    if code is not None and 500 <= code < 600:
+        return 'permanent'
+    if code is not None and 400 <= code < 500:
+        return 'temporary'
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)):
+        return 'connection'
+    if isinstance(error, TemplateSyntaxError):
+        return 'template'
+    return 'other'
+
+
+class PooledSMTPConnection:
+    """
+    Sessão SMTP autenticada de uma configuração
+    """
+
+    def __init__(self, smtp_config, key, verify_certificates=True):
+        self.smtp_config = smtp_config
+        self.key = key
+        self.verify_certificates = verify_certificates
+        self.server = None
+        self.sent_count = 0
+        self.last_used = 0.0
+
+    def ssl_context(self):
+        context = ssl.create_default_context()
+        if not self.verify_certificates:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        return context
+
+    def open(self):
+        config = self.smtp_config
+        if config.use_ssl:
+            server = smtplib.SMTP_SSL(config.host, config.port, context=self.ssl_context(), timeout=SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(config.host, config.port, timeout=SMTP_TIMEOUT)
+            if config.use_tls:
+                server.starttls(context=self.ssl_context())
+        try:
+            if config.username:
+                server.login(config.username, config.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.sent_count = 0
+        self.last_used = time.monotonic()
+        logger.debug(f"Conexão SMTP aberta: {config.host}:{config.port}")
+        return self
+
+    @property
+    def idle_seconds(self):
+        return time.monotonic() - self.last_used
+
+    @property
+    def exhausted(self):
+        limit = getattr(self.smtp_config, 'max_messages_per_connection', 0) or 0
+        return bool(limit) and self.sent_count >= limit
+
+    def is_alive(self):
+        """
+        Verifica a sessão com NOOP
+        """
+        try:
+            code, _message = self.server.noop()
+            return code == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, message):
+        self.server.send_message(message)
+        self.sent_count += 1
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                self.server.close()
+            except OSError:
+                pass
+        self.server = None
+
+
+class SMTPConnectionPool:
+    """
+    Pool de conexões SMTP por ``SMTPConfiguration`` (seguro entre threads)
+    """
+
+    def __init__(self, max_idle=SMTP_POOL_MAX_IDLE, health_check_after=SMTP_POOL_HEALTH_CHECK_AFTER,
+                 idle_timeout=SMTP_POOL_IDLE_TIMEOUT):
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.idle_timeout = idle_timeout
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @staticmethod
+    def pool_key(smtp_config, verify_certificates):
+        # updated_at muda a cada alteração da configuração (servidor, senha...)
+        return (smtp_config.pk, smtp_config.updated_at, verify_certificates)
+
+    def _check_fork(self):
+        # Processos filhos (workers do Celery) não podem reusar os sockets do pai
+        if os.getpid() != self._pid:
+            self._idle = defaultdict(list)
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+    def acquire(self, smtp_config, verify_certificates=True):
+        """
+        Empresta uma conexão aberta e autenticada
+        """
+        self._check_fork()
+        key = self.pool_key(smtp_config, verify_certificates)
+        stale = []
+        connection = None
+        with self._lock:
+            # Conexões de versões anteriores da configuração
+            for other_key in [k for k in self._idle if k[0] == key[0] and k != key]:
+                stale.extend(self._idle.pop(other_key))
+            idle = self._idle.get(key)
+            while idle and connection is None:
+                candidate = idle.pop()
+                if candidate.idle_seconds > self.idle_timeout:
+                    stale.append(candidate)
+                else:
+                    connection = candidate
+
+        for old in stale:
+            old.close()
+
+        if connection is not None and connection.idle_seconds > self.health_check_after:
+            if not connection.is_alive():
+                connection.close()
+                connection = None
+
+        if connection is None:
+            connection = PooledSMTPConnection(smtp_config, key, verify_certificates).open()
+        return connection
+
+    def release(self, connection, reusable=True):
+        """
+        Devolve a conexão ao pool, ou a fecha se não puder ser reaproveitada
+        """
+        if not reusable or connection.server is None or connection.exhausted:
+            connection.close()
+            return
+        with self._lock:
+            idle = self._idle[connection.key]
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def send(self, smtp_config, message, verify_certificates=True):
+        """
+        Envia a mensagem por uma conexão do pool.
+
+        Se a sessão tiver sido encerrada pelo servidor (desconexão ou 421),
+        a mensagem é reenviada uma vez por uma nova conexão. Outros erros
+        são propagados.
+        """
+        for attempt in range(2):
+            connection = self.acquire(smtp_config, verify_certificates)
+            try:
+                connection.send(message)
+            except Exception as error:
+                transient = is_transient_error(error)
+                self.release(connection, reusable=not transient and isinstance(error, smtplib.SMTPException))
+                session_lost = (
+                    isinstance(error, smtplib.SMTPServerDisconnected)
+                    or getattr(error, 'smtp_code', None) == 421
+                )
+                if attempt == 0 and session_lost:
+                    logger.info(f"Sessão SMTP encerrada por {smtp_config.host}; reconectando")
+                    continue
+                raise
+            self.release(connection)
+            return
+
+    def close_all(self):
+        with self._lock:
+            connections = [connection for idle in self._idle.values() for connection in idle]
+            self._idle = defaultdict(list)
+        for connection in connections:
+            connection.close()
+
+
+connection_pool = SMTPConnectionPool()
+atexit.register(connection_pool.close_all)
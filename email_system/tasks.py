@@ -0,0 +1,57 @@
+"""
+Tarefas Celery do sistema de email
+"""
+import logging
+
+from celery import shared_task
+
+from . import events, metrics
+from .services import EmailCampaignService, EmailQueueService
+from .worker import EmailQueueWorker
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def process_email_queue(max_seconds=55):
+    """
+    Consome a fila de emails até esvaziá-la ou por até ``max_seconds``
+    (agendada pelo Celery Beat a cada minuto). Execuções simultâneas são
+    seguras: cada uma reserva lotes diferentes.
+    """
+    totals = EmailQueueWorker().run(max_seconds=max_seconds, stop_when_empty=True)
+    return {key: totals[key] for key in ('processed', 'sent', 'failed', 'deferred')}
+
+
+@shared_task(ignore_result=True)
+def purge_email_content():
+    """
+    Remove o conteúdo renderizado de emails antigos (agendada diariamente)
+    """
+    return EmailQueueService.purge_rendered_content()
+
+
+@shared_task(ignore_result=True)
+def handle_email_event(event, object_id, payload=None):
+    """
+    Resolve o gatilho de um evento de domínio e coloca o email na fila
+    """
+    email_queue = events.handle(event, object_id, payload)
+    return email_queue.pk if email_queue is not None else None
+
+
+@shared_task(ignore_result=True)
+def run_email_campaign(campaign_id):
+    """
+    Enfileira os emails de uma campanha em massa
+    """
+    campaign = EmailCampaignService.run(campaign_id)
+    return {'status': campaign.status, 'queued': campaign.queued_count}
+
+
+@shared_task(ignore_result=True)
+def rollup_email_metrics():
+    """
+    Agrega por hora os envios registrados no EmailLog (agendada a cada 5 minutos)
+    """
+    return metrics.run_rollups()
@@ -1,3 +1,609 @@
-from django.test import TestCase
+import smtplib
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from utils.template_cache import template_cache
+
+from . import events, metrics
+from .models import EmailCampaign, EmailLog, EmailMetricRollup, EmailQueue, EmailTemplate, EmailTrigger, SMTPConfiguration
+from .ratelimit import SMTPRateLimiter, rate_limiter
+from .registry import TriggerRegistry
+from .services import EmailCampaignService, EmailQueueService, EmailRetryPolicy, EmailTemplateService
+from .smtp import SMTPConnectionPool, build_message
+from .worker import EmailQueueWorker
+
+
+class EmailQueueTestDataMixin:
+    """Dados comuns para os testes da fila de emails."""
+
+    def create_queue_data(self):
+        self.smtp_config = SMTPConfiguration.objects.create(
+            name="Teste",
+            host="smtp.teste.com",
+            port=587,
+            username="usuario",
+            password="senha",
+            from_email="rh@teste.com",
+            from_name="RH",
+        )
+        self.template = EmailTemplate.objects.create(
+            name="Entrevista",
+            trigger_type='interview_scheduled',
+            subject="Entrevista de {{ user_name }}",
+            html_content="<p>Olá {{ user_name }}</p>",
+        )
+        self.trigger = EmailTrigger.objects.create(
+            name="Entrevista",
+            trigger_type='interview_scheduled',
+            template=self.template,
+            smtp_config=self.smtp_config,
+        )
+
+    def enqueue(self, count, **kwargs):
+        return [
+            EmailQueue.objects.create(
+                trigger=self.trigger,
+                to_email=f"candidato{index}@teste.com",
+                subject="Assunto",
+                html_content="<p>Olá</p>",
+                **kwargs
+            )
+            for index in range(count)
+        ]
+
+
+class SMTPConnectionPoolTests(TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.config = SMTPConfiguration.objects.create(
+            name="Teste",
+            host="smtp.teste.com",
+            port=587,
+            username="usuario",
+            password="senha",
+            from_email="rh@teste.com",
+            from_name="RH",
+            max_messages_per_connection=3,
+        )
+        self.pool = SMTPConnectionPool()
+        patcher = mock.patch('email_system.smtp.smtplib.SMTP')
+        self.smtp_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.smtp_class.return_value.noop.return_value = (250, b'OK')
+
+    def message(self):
+        return build_message(self.config, "candidato@teste.com", "Assunto", "<p>Olá</p>")
+
+    def test_session_is_reused_up_to_the_limit(self):
+        """Uma única sessão autenticada atende até max_messages_per_connection envios."""
+        for _index in range(5):
+            self.pool.send(self.config, self.message())
+
+        server = self.smtp_class.return_value
+        self.assertEqual(self.smtp_class.call_count, 2)
+        self.assertEqual(server.login.call_count, 2)
+        self.assertEqual(server.send_message.call_count, 5)
+
+    def test_reconnects_when_server_drops_the_session(self):
+        """Uma desconexão faz a mensagem ser reenviada por uma nova conexão."""
+        self.pool.send(self.config, self.message())
+        server = self.smtp_class.return_value
+        server.send_message.side_effect = [smtplib.SMTPServerDisconnected('fechada'), {}]
+
+        self.pool.send(self.config, self.message())
+
+        self.assertEqual(self.smtp_class.call_count, 2)
+        self.assertEqual(server.send_message.call_count, 3)
+
+    def test_permanent_errors_are_raised_and_session_kept(self):
+        """Recusa do destinatário é propagada, mas a sessão continua no pool."""
+        server = self.smtp_class.return_value
+        server.send_message.side_effect = smtplib.SMTPRecipientsRefused({'x@teste.com': (550, b'nao existe')})
+
+        with self.assertRaises(smtplib.SMTPRecipientsRefused):
+            self.pool.send(self.config, self.message())
+
+        server.send_message.side_effect = None
+        self.pool.send(self.config, self.message())
+        self.assertEqual(self.smtp_class.call_count, 1)
+
+
+class EmailQueueWorkerTests(EmailQueueTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_queue_data()
+        rate_limiter.reset()
+        self.addCleanup(rate_limiter.reset)
+        patcher = mock.patch('email_system.services.connection_pool')
+        self.pool = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claimed_items_are_not_claimed_again(self):
+        """Itens reservados por um worker não são entregues a outro."""
+        self.enqueue(3)
+        first = EmailQueueWorker(batch_size=2, worker_id='a').claim_batch()
+        second = EmailQueueWorker(batch_size=2, worker_id='b').claim_batch()
+        third = EmailQueueWorker(batch_size=2, worker_id='c').claim_batch()
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(third, [])
+        self.assertTrue(all(item.status == 'processing' and item.locked_until for item in first))
+        self.assertFalse({item.pk for item in first} & {item.pk for item in second})
+
+    def test_expired_leases_are_reclaimed(self):
+        """Itens de um worker interrompido voltam para a fila quando a reserva expira."""
+        self.enqueue(1)
+        EmailQueueWorker(worker_id='caiu').claim_batch()
+        EmailQueue.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(EmailQueueWorker.reclaim_expired_leases(), 1)
+        self.assertEqual(len(EmailQueueWorker(worker_id='novo').claim_batch()), 1)
+
+    def test_lost_lease_is_not_sent_nor_overwritten(self):
+        """Um worker cuja reserva expirou não envia o item nem grava por cima do novo dono."""
+        self.enqueue(2)
+        slow = EmailQueueWorker(concurrency=1, worker_id='lento')
+        items = slow.claim_batch()
+        EmailQueue.objects.filter(pk=items[0].pk).update(locked_by='novo')
+
+        stats = slow.process_batch(items)
+
+        self.assertEqual((stats['sent'], stats['lost']), (1, 1))
+        self.assertEqual(self.pool.send.call_count, 1)
+        taken = EmailQueue.objects.get(pk=items[0].pk)
+        self.assertEqual((taken.status, taken.locked_by), ('processing', 'novo'))
+
+        # Perda da reserva durante o envio: o resultado é descartado
+        EmailQueue.objects.filter(pk=items[0].pk).update(locked_by='lento')
+        self.pool.send.side_effect = lambda *args, **kwargs: EmailQueue.objects.filter(
+            pk=items[0].pk
+        ).update(locked_by='outro')
+        self.assertTrue(EmailQueueService.process_queue_item(items[0], lease_owner='lento'))
+        self.assertEqual(EmailQueue.objects.get(pk=items[0].pk).status, 'processing')
+
+    def test_run_once_sends_and_releases(self):
+        """O lote é enviado e os itens terminam sem reserva."""
+        self.enqueue(2)
+        self.enqueue(1, scheduled_at=timezone.now() + timedelta(hours=1))
+
+        stats = EmailQueueWorker(concurrency=1).run_once()
+
+        self.assertEqual(stats, {'processed': 2, 'sent': 2, 'failed': 0, 'deferred': 0})
+        self.assertEqual(self.pool.send.call_count, 2)
+        sent = EmailQueue.objects.filter(status='sent')
+        self.assertEqual(sent.count(), 2)
+        self.assertFalse(sent.filter(locked_by__isnull=False).exists())
+        self.assertEqual(EmailQueue.objects.filter(status='pending').count(), 1)
+
+    def test_throttled_item_goes_back_to_queue(self):
+        """Uma recusa 451 adia o item sem consumir tentativa e pausa o servidor."""
+        self.enqueue(2)
+        self.pool.send.side_effect = smtplib.SMTPDataError(451, b'muitas mensagens')
+
+        stats = EmailQueueWorker(concurrency=1).run_once()
+
+        self.assertEqual(stats['deferred'], 2)
+        self.assertEqual(self.pool.send.call_count, 1)
+        item = EmailQueue.objects.order_by('scheduled_at').first()
+        self.assertEqual((item.status, item.retry_count), ('pending', 0))
+        self.assertGreater(item.scheduled_at, timezone.now())
+
+
+class EmailRetryPolicyTests(EmailQueueTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_queue_data()
+        patcher = mock.patch('email_system.services.connection_pool')
+        self.pool = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_transient_failures_back_off_until_dead_letter(self):
+        """Falhas temporárias são reagendadas com espera crescente até o descarte."""
+        email_queue = self.enqueue(1)[0]
+        self.pool.send.side_effect = smtplib.SMTPServerDisconnected('caiu')
+
+        before = timezone.now()
+        EmailQueueService.process_queue_item(email_queue)
+        email_queue.refresh_from_db()
+        self.assertEqual((email_queue.status, email_queue.retry_count), ('failed', 1))
+        delay = (email_queue.scheduled_at - before).total_seconds()
+        self.assertTrue(EmailRetryPolicy.BACKOFF_BASE / 2 <= delay <= EmailRetryPolicy.BACKOFF_BASE + 1)
+
+        EmailQueueService.process_queue_item(email_queue)
+        EmailQueueService.process_queue_item(email_queue)
+        email_queue.refresh_from_db()
+        self.assertEqual((email_queue.status, email_queue.retry_count), ('dead', 3))
+
+    def test_permanent_error_goes_straight_to_dead_letter(self):
+        """Uma recusa 5xx não é tentada de novo."""
+        email_queue = self.enqueue(1)[0]
+        self.pool.send.side_effect = smtplib.SMTPRecipientsRefused({email_queue.to_email: (550, b'nao existe')})
+
+        EmailQueueService.process_queue_item(email_queue)
+
+        email_queue.refresh_from_db()
+        self.assertEqual((email_queue.status, email_queue.last_error_code), ('dead', 550))
+        self.assertTrue(EmailQueueService.requeue(email_queue))
+        self.assertEqual((email_queue.status, email_queue.retry_count), ('pending', 0))
+
+    def test_fresh_mail_is_due_before_retries(self):
+        """Novas tentativas vencidas não passam na frente de emails novos."""
+        retry = self.enqueue(1, priority=3, status='failed', retry_count=1)[0]
+        fresh = self.enqueue(1, priority=1)[0]
+
+        due = list(EmailQueueService.due_queryset())
+
+        self.assertEqual(due, [fresh, retry])
+
+    def test_retried_emails_are_processed_before_fresh_mail(self):
+        """As novas tentativas antecipadas são processadas mesmo com emails novos na fila."""
+        retry = self.enqueue(
+            1, status='failed', retry_count=1, scheduled_at=timezone.now() + timedelta(hours=1)
+        )[0]
+        fresh = self.enqueue(1)[0]
+
+        retried_ids = EmailQueueService.retry_failed_emails(limit=5)
+        self.assertEqual(retried_ids, [retry.pk])
+
+        totals = EmailQueueWorker(batch_size=len(retried_ids), concurrency=1).run_once(only_ids=retried_ids)
+
+        self.assertEqual(totals['sent'], 1)
+        retry.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((retry.status, fresh.status), ('sent', 'pending'))
+
+    def test_retry_failed_command_sends_retries_before_fresh_mail(self):
+        """O comando com --retry-failed envia as antecipadas mesmo com mais emails novos que --limit."""
+        retry = self.enqueue(
+            1, status='failed', retry_count=1, scheduled_at=timezone.now() + timedelta(hours=1)
+        )[0]
+        self.enqueue(3)
+
+        call_command('process_email_queue', '--retry-failed', '--limit', '2', '--concurrency', '1', stdout=StringIO())
+
+        retry.refresh_from_db()
+        self.assertEqual(retry.status, 'sent')
+        self.assertEqual(EmailQueue.objects.filter(status='pending').count(), 3)
+
+        # Em TestCase a conexão é a da transação do teste: não pode ser fechada
+        with mock.patch('email_system.worker.close_old_connections'):
+            call_command(
+                'process_email_queue', '--retry-failed', '--loop', '--max-seconds', '1', '--sleep', '0',
+                '--limit', '2', '--concurrency', '1', stdout=StringIO(),
+            )
+        self.assertFalse(EmailQueue.objects.filter(status='pending').exists())
+
+
+class RenderAtSendTests(EmailQueueTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_queue_data()
+        patcher = mock.patch('email_system.services.connection_pool')
+        self.pool = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent_message(self):
+        return self.pool.send.call_args[0][1]
+
+    def test_queue_stores_context_and_worker_renders(self):
+        """A fila guarda só o contexto; o conteúdo é gerado no envio."""
+        email_queue = EmailQueueService.add_to_queue(
+            self.trigger, "ana@teste.com", {'user_name': 'Ana'}, render_at_send=True
+        )
+        self.assertEqual((email_queue.subject, email_queue.html_content), ('', ''))
+
+        EmailQueueWorker(concurrency=1).run_once()
+
+        email_queue.refresh_from_db()
+        self.assertEqual(self.sent_message()['Subject'], "Entrevista de Ana")
+        self.assertEqual((email_queue.status, email_queue.subject), ('sent', "Entrevista de Ana"))
+        self.assertEqual(email_queue.html_content, '')
+
+    def test_pinned_version_ignores_later_edits(self):
+        """Com a versão fixada, alterações no template não afetam o email."""
+        EmailQueueService.add_to_queue(
+            self.trigger, "ana@teste.com", {'user_name': 'Ana'}, pin_template_version=True
+        )
+        self.template.subject = "Novo assunto"
+        self.template.save()
+
+        EmailQueueWorker(concurrency=1).run_once()
+
+        self.assertEqual(self.sent_message()['Subject'], "Entrevista de Ana")
+
+    def test_rendered_content_is_purged_after_retention(self):
+        """O conteúdo de emails antigos finalizados é removido."""
+        old, recent = self.enqueue(2, status='sent')
+        dead = self.enqueue(1, status='dead')[0]
+        EmailQueue.objects.filter(pk__in=[old.pk, dead.pk]).update(updated_at=timezone.now() - timedelta(days=40))
+
+        self.assertEqual(EmailQueueService.purge_rendered_content(days=30), 1)
+        old.refresh_from_db()
+        recent.refresh_from_db()
+        dead.refresh_from_db()
+        self.assertEqual((old.html_content, old.subject), ('', "Assunto"))
+        self.assertEqual(recent.html_content, "<p>Olá</p>")
+        # Pode voltar para a fila por requeue: o conteúdo é mantido
+        self.assertEqual(dead.html_content, "<p>Olá</p>")
+
+
+class EmailEventTests(EmailQueueTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_queue_data()
+        EmailTrigger.objects.create(
+            name="Cadastro",
+            trigger_type='user_registration',
+            template=self.template,
+            smtp_config=self.smtp_config,
+        )
+
+    def test_signal_only_publishes_event_after_commit(self):
+        """O cadastro não faz trabalho de email; só agenda a tarefa após o commit."""
+        with mock.patch('email_system.tasks.handle_email_event.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                user = get_user_model().objects.create_user(email="novo@teste.com", password="testpass123")
+                self.assertFalse(apply_async.called)
+
+        apply_async.assert_called_once_with(('user_registration', user.pk, {}), retry=False)
+        self.assertFalse(EmailQueue.objects.exists())
+
+    def test_rolled_back_transaction_publishes_nothing(self):
+        """Nenhum evento é publicado se a transação for desfeita."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    get_user_model().objects.create_user(email="novo@teste.com", password="testpass123")
+                    raise RuntimeError
+
+        self.assertEqual(callbacks, [])
+
+    def test_task_resolves_trigger_and_queues_email(self):
+        """A tarefa monta o contexto e coloca o email na fila."""
+        user = get_user_model().objects.create_user(
+            email="novo@teste.com", password="testpass123", first_name="Ana"
+        )
+
+        email_queue = events.handle('user_registration', user.pk)
+
+        self.assertEqual(email_queue.to_email, "novo@teste.com")
+        self.assertEqual(email_queue.trigger.trigger_type, 'user_registration')
+        self.assertEqual(email_queue.context_data['user_name'], "Ana")
+
+
+class TriggerRegistryTests(EmailQueueTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_queue_data()
+        self.registry = TriggerRegistry()
+
+    def test_lookup_is_served_from_memory(self):
+        """Depois de carregado, o gatilho vem com template e SMTP sem consultas."""
+        self.registry.get('interview_scheduled')
+
+        with self.assertNumQueries(0):
+            trigger = self.registry.get('interview_scheduled')
+            self.assertEqual(trigger.template.name, "Entrevista")
+            self.assertEqual(trigger.smtp_config.host, "smtp.teste.com")
+        self.assertIsNone(self.registry.get('user_registration'))
+
+    def test_changes_reach_other_processes(self):
+        """Alterações trocam a versão compartilhada e todos os registros recarregam."""
+        other_process = TriggerRegistry()
+        self.assertEqual(other_process.get('interview_scheduled'), self.trigger)
+
+        preferred = EmailTrigger.objects.create(
+            name="Entrevista (nova)",
+            trigger_type='interview_scheduled',
+            template=self.template,
+            smtp_config=self.smtp_config,
+            priority=3,
+        )
+        self.assertEqual(other_process.get('interview_scheduled'), preferred)
+
+        preferred.is_active = False
+        preferred.save()
+        self.assertEqual(other_process.get('interview_scheduled'), self.trigger)
+
+    def test_version_is_bumped_again_after_commit(self):
+        """Uma recarga feita antes do commit não fica com a versão nova."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trigger.save()
+            version_before_commit = self.registry.current_version()
+        self.assertNotEqual(self.registry.current_version(), version_before_commit)
+
+
+class EmailCampaignTests(EmailQueueTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_queue_data()
+        User = get_user_model()
+        for index in range(5):
+            User.objects.create_user(email=f"candidato{index}@teste.com", password="testpass123", first_name=f"C{index}")
+        User.objects.create_user(email="semaviso@teste.com", password="testpass123", notificacoes_email=False)
+        User.objects.create_user(email="inativo@teste.com", password="testpass123", is_active=False)
+        self.recipients = User.objects.filter(email__endswith="@teste.com")
+
+    def test_campaign_skips_opted_out_users_and_queues_in_chunks(self):
+        """Usuários inativos ou sem aviso por email ficam de fora; a fila é gravada em lotes."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            campaign = EmailCampaignService.create_campaign("Vaga encerrada", self.template, self.recipients)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual((campaign.status, campaign.total_recipients, campaign.skipped_count), ('queued', 7, 2))
+
+        with mock.patch.object(EmailCampaignService, 'CHUNK_SIZE', 2), \
+                mock.patch.object(EmailQueue.objects, 'bulk_create', wraps=EmailQueue.objects.bulk_create) as bulk_create:
+            campaign = EmailCampaignService.run(campaign.pk, render_at_send=False)
+
+        self.assertEqual(bulk_create.call_count, 3)
+        self.assertEqual((campaign.status, campaign.queued_count), ('completed', 5))
+        email_queue = campaign.emails.get(to_email="candidato3@teste.com")
+        self.assertEqual(email_queue.subject, "Entrevista de C3")
+        self.assertEqual(email_queue.trigger, self.trigger)
+        self.assertFalse(campaign.emails.filter(to_email__in=["semaviso@teste.com", "inativo@teste.com"]).exists())
+
+    def test_rerun_does_not_duplicate_and_reports_progress(self):
+        """Executar de novo não duplica emails; o progresso agrega a fila da campanha."""
+        campaign = EmailCampaignService.create_campaign(
+            "Vaga encerrada", self.template, self.recipients, start=False
+        )
+        EmailCampaignService.run(campaign.pk)
+        EmailCampaign.objects.filter(pk=campaign.pk).update(status='failed')
+        campaign = EmailCampaignService.run(campaign.pk)
+        self.assertEqual(campaign.emails.count(), 5)
+        campaign.emails.filter(to_email="candidato0@teste.com").update(status='sent', sent_at=timezone.now())
+
+        with self.assertNumQueries(1):
+            progress = EmailCampaignService.progress(campaign)
+
+        self.assertEqual((progress['sent'], progress['pending'], progress['percent_done']), (1, 4, 20.0))
+
+    def test_interrupted_campaign_can_be_restarted(self):
+        """Uma campanha que falhou ou parou em 'running' sem progresso pode ser reiniciada."""
+        campaign = EmailCampaignService.create_campaign(
+            "Vaga encerrada", self.template, self.recipients, start=False
+        )
+        with mock.patch.object(EmailCampaignService, 'build_emails', side_effect=RuntimeError('caiu')):
+            campaign = EmailCampaignService.run(campaign.pk)
+        self.assertEqual((campaign.status, campaign.error_message), ('failed', 'caiu'))
+        self.assertTrue(EmailCampaignService.can_restart(campaign))
+
+        campaign.status = 'running'
+        campaign.started_at = timezone.now()
+        self.assertFalse(EmailCampaignService.can_restart(campaign))
+        campaign.started_at -= timedelta(minutes=EmailCampaignService.STALE_MINUTES + 1)
+        self.assertTrue(EmailCampaignService.can_restart(campaign))
+
+
+class EmailMetricsTests(EmailQueueTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_queue_data()
+        self.now = timezone.now()
+        self.email_queue = EmailQueue.objects.create(
+            trigger=self.trigger, to_email="candidato@teste.com", status='sent'
+        )
+        self.log(0.2, hours_ago=2)
+        self.log(0.4, hours_ago=2)
+        self.log(3.0, hours_ago=2)
+        self.log(1.5, hours_ago=2, status='failed', error_class='throttled')
+        self.log(0.2, hours_ago=0, status='failed', error_class='permanent')
+
+    def log(self, processing_time, hours_ago, status='sent', error_class=''):
+        log = EmailLog.objects.create(
+            email_queue=self.email_queue,
+            trigger=self.trigger,
+            smtp_config=self.smtp_config,
+            to_email="candidato@teste.com",
+            subject="Assunto",
+            status=status,
+            error_class=error_class,
+            processing_time=processing_time,
+        )
+        EmailLog.objects.filter(pk=log.pk).update(created_at=self.now - timedelta(hours=hours_ago))
+
+    def test_rollups_are_idempotent_and_feed_snapshot(self):
+        """As horas fechadas viram agregados; a hora corrente é lida do log."""
+        metrics.run_rollups(now=self.now)
+        metrics.run_rollups(now=self.now)
+        self.assertEqual(EmailMetricRollup.objects.filter(status='sent').get().count, 3)
+        self.enqueue(2, scheduled_at=self.now - timedelta(minutes=10))
+
+        snapshot = metrics.snapshot(hours=24, now=self.now)
+
+        self.assertEqual(snapshot['queue']['depth'], 2)
+        self.assertEqual(snapshot['queue']['oldest_pending_age_seconds'], 600.0)
+        smtp = snapshot['smtp'][0]
+        self.assertEqual((smtp['sent'], smtp['failed']), (3, 2))
+        self.assertEqual(smtp['latency']['p50'], 0.375)
+        self.assertEqual({f['error_class']: f['count'] for f in snapshot['failures']}, {'throttled': 1, 'permanent': 1})
+
+    def test_histogram_quantile_interpolates_within_bucket(self):
+        cumulative = [0, 0, 10, 20] + [20] * (len(metrics.LATENCY_BUCKETS) - 3)
+        self.assertEqual(metrics.histogram_quantile(cumulative, 50), 0.5)
+        self.assertEqual(metrics.histogram_quantile(cumulative, 75), 0.75)
+        self.assertIsNone(metrics.histogram_quantile([0] * len(cumulative), 50))
+
+    @override_settings(EMAIL_METRICS_TOKEN='segredo')
+    def test_prometheus_endpoint_requires_staff_or_token(self):
+        """O endpoint aceita o token de coleta e recusa acessos anônimos."""
+        self.assertEqual(self.client.get('/email-system/metrics/').status_code, 403)
+
+        response = self.client.get(
+            '/email-system/metrics/?format=prometheus', HTTP_AUTHORIZATION='Bearer segredo'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('email_queue_depth 0', body)
+        self.assertIn('email_failures{error_class="permanent",window="24h"} 1', body)
+
+        staff = get_user_model().objects.create_user(email="staff@teste.com", password="testpass123", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get('/admin/email-system/metrics/?hours=6')
+        self.assertContains(response, "Recusa Definitiva (5xx)")
+
+
+class SMTPRateLimiterTests(TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.config = SMTPConfiguration(
+            pk=1,
+            host="smtp.teste.com",
+            rate_limit_per_second=2,
+            rate_limit_per_hour=3,
+        )
+        self.limiter = SMTPRateLimiter(redis_url='')
+
+    def test_every_window_is_enforced(self):
+        """O envio respeita o menor dos limites configurados."""
+        self.assertEqual(self.limiter.try_acquire(self.config, now=0), 0)
+        self.assertEqual(self.limiter.try_acquire(self.config, now=0), 0)
+        self.assertAlmostEqual(self.limiter.try_acquire(self.config, now=0), 0.5)
+        self.assertEqual(self.limiter.try_acquire(self.config, now=1), 0)
+        # Limite por hora esgotado: próxima ficha em 1/3 de hora
+        self.assertAlmostEqual(self.limiter.try_acquire(self.config, now=2), 1200 - 2, places=3)
+
+    def test_throttling_pauses_and_slows_down(self):
+        """Após uma recusa o envio fica suspenso e volta com vazão menor."""
+        self.config.rate_limit_per_hour = 0
+        backoff = self.limiter.throttled(self.config, now=0)
+
+        self.assertGreater(self.limiter.try_acquire(self.config, now=backoff - 1), 0)
+        self.assertEqual(self.limiter.try_acquire(self.config, now=backoff), 0)
+        # Metade da vazão: uma mensagem por segundo
+        self.assertAlmostEqual(self.limiter.try_acquire(self.config, now=backoff), 1.0, places=2)
+        self.assertGreater(self.limiter.throttled(self.config, now=backoff + 1), backoff)
+
+
+class EmailTemplateCacheTests(EmailQueueTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_queue_data()
+        template_cache.clear()
+        self.addCleanup(template_cache.clear)
+
+    def test_compiled_template_is_reused_until_saved(self):
+        """O template é compilado uma vez e recompilado após ser alterado."""
+        first = EmailTemplateService.render_template(self.template, {'user_name': 'Ana'})
+        second = EmailTemplateService.render_template(self.template, {'user_name': 'Bia'})
+
+        self.assertEqual(first['subject'], "Entrevista de Ana")
+        self.assertEqual(second['html_content'], "<p>Olá Bia</p>")
+        self.assertIsNone(second['text_content'])
+        self.assertEqual((template_cache.misses, template_cache.hits), (2, 2))
+
+        self.template.subject = "Convite para {{ user_name }}"
+        self.template.save()
+        self.assertEqual(template_cache.stats()['size'], 0)
+
+        rendered = EmailTemplateService.render_template(self.template, {'user_name': 'Caio'})
+        self.assertEqual(rendered['subject'], "Convite para Caio")
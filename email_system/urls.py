@@ -2,7 +2,7 @@
 URLs para o sistema de email
 """
 from django.urls import path
-from . import views
+from . import admin_views, views
 
 app_name = 'email_system'
 
@@ -21,4 +21,7 @@ urlpatterns = [
     # API
     path('api/test-email/', views.TestEmailView.as_view(), name='test_email'),
     path('api/stats/', views.email_stats_api, name='stats_api'),
+    
+    # Métricas (JSON ou ?format=prometheus; staff ou EMAIL_METRICS_TOKEN)
+    path('metrics/', admin_views.email_metrics_api, name='metrics'),
 ]
@@ -24,14 +24,14 @@ def email_dashboard(request):
         'total_emails': EmailQueue.objects.count(),
         'pending_emails': EmailQueue.objects.filter(status='pending').count(),
         'sent_emails': EmailQueue.objects.filter(status='sent').count(),
-        'failed_emails': EmailQueue.objects.filter(status='failed').count(),
+        'failed_emails': EmailQueue.objects.filter(status__in=['failed', 'dead']).count(),
         'total_logs': EmailLog.objects.count(),
         'smtp_configs': SMTPConfiguration.objects.filter(is_active=True).count(),
         'active_triggers': EmailTrigger.objects.filter(is_active=True).count(),
     }
     
     # Emails recentes
-    recent_emails = EmailQueue.objects.select_related('trigger').order_by('-created_at')[:10]
+    recent_emails = EmailQueue.objects.select_related('trigger__template').order_by('-created_at')[:10]
     
     # Logs recentes
     recent_logs = EmailLog.objects.select_related('trigger').order_by('-created_at')[:10]
@@ -53,7 +53,7 @@ def email_queue_view(request):
     status_filter = request.GET.get('status', '')
     priority_filter = request.GET.get('priority', '')
     
-    emails = EmailQueue.objects.select_related('trigger').order_by('-priority', 'scheduled_at')
+    emails = EmailQueue.objects.select_related('trigger__template').order_by('-priority', 'scheduled_at')
     
     if status_filter:
         emails = emails.filter(status=status_filter)
@@ -178,15 +178,11 @@ def retry_email(request, email_id):
     try:
         email_queue = EmailQueue.objects.get(id=email_id)
         
-        if not email_queue.can_retry():
+        # Marcar para reenvio
+        if not EmailQueueService.requeue(email_queue):
             messages.error(request, 'Este email não pode ser reenviado.')
             return redirect('email_system:queue')
         
-        # Marcar para reenvio
-        email_queue.status = 'pending'
-        email_queue.scheduled_at = timezone.now()
-        email_queue.save()
-        
         messages.success(request, f'Email {email_id} marcado para reenvio.')
         
     except EmailQueue.DoesNotExist:
@@ -230,7 +226,7 @@ def email_stats_api(request):
         'total_emails': EmailQueue.objects.count(),
         'pending_emails': EmailQueue.objects.filter(status='pending').count(),
         'sent_emails': EmailQueue.objects.filter(status='sent').count(),
-        'failed_emails': EmailQueue.objects.filter(status='failed').count(),
+        'failed_emails': EmailQueue.objects.filter(status__in=['failed', 'dead']).count(),
         'processing_emails': EmailQueue.objects.filter(status='processing').count(),
         'cancelled_emails': EmailQueue.objects.filter(status='cancelled').count(),
     }
@@ -0,0 +1,223 @@
+"""
+Worker da fila de emails.
+
+Cada worker reserva um lote de itens com ``SELECT ... FOR UPDATE SKIP
+LOCKED`` e marca os itens com uma reserva (lease) por tempo limitado, de
+forma que vários workers (processos, máquinas ou tarefas Celery) possam
+consumir a fila ao mesmo tempo sem enviar o mesmo email duas vezes. Itens de
+um worker que caiu voltam para a fila quando a reserva expira.
+
+Dentro de um lote, os itens de cada ``SMTPConfiguration`` são enviados por
+até ``concurrency`` threads, cada uma com sua conexão do pool SMTP, sempre
+respeitando o limite de envio do servidor (ver ``ratelimit``). Itens que
+precisariam esperar demais pelo limite voltam para a fila com novo horário.
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import EmailQueue
+from .ratelimit import rate_limiter
+from .services import EmailQueueService
+
+logger = logging.getLogger(__name__)
+
+# Itens reservados por vez
+WORKER_BATCH_SIZE = getattr(settings, 'EMAIL_WORKER_BATCH_SIZE', 50)
+# Envios simultâneos por configuração SMTP
+WORKER_CONCURRENCY = getattr(settings, 'EMAIL_WORKER_CONCURRENCY', 4)
+# Duração (segundos) da reserva de um lote
+WORKER_LEASE_SECONDS = getattr(settings, 'EMAIL_WORKER_LEASE_SECONDS', 300)
+# Espera máxima (segundos) pelo limite de envio antes de adiar o item
+WORKER_RATE_LIMIT_MAX_WAIT = getattr(settings, 'EMAIL_RATE_LIMIT_MAX_WAIT', 10)
+
+
+class EmailQueueWorker:
+    """
+    Consome a fila de emails em lotes reservados
+    """
+
+    def __init__(self, batch_size=None, concurrency=None, lease_seconds=None, worker_id=None):
+        self.batch_size = batch_size or WORKER_BATCH_SIZE
+        self.concurrency = concurrency or WORKER_CONCURRENCY
+        self.lease_seconds = lease_seconds or WORKER_LEASE_SECONDS
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+
+    def due_queryset(self, now):
+        """
+        Itens prontos para envio, na ordem de processamento
+        """
+        return EmailQueueService.due_queryset(now)
+
+    @staticmethod
+    def reclaim_expired_leases() -> int:
+        """
+        Devolve para a fila os itens cuja reserva expirou (worker interrompido)
+        """
+        now = timezone.now()
+        count = EmailQueue.objects.filter(status='processing', locked_until__lt=now).update(
+            status='pending', locked_by=None, locked_until=None, updated_at=now
+        )
+        if count:
+            logger.warning(f"{count} emails com reserva expirada voltaram para a fila")
+        return count
+
+    def claim_batch(self, only_ids=None) -> list:
+        """
+        Reserva até ``batch_size`` itens para este worker (com ``only_ids``,
+        apenas entre os itens informados)
+        """
+        now = timezone.now()
+        queryset = self.due_queryset(now)
+        if only_ids is not None:
+            queryset = queryset.filter(pk__in=only_ids)
+        with transaction.atomic():
+            ids = list(
+                queryset
+                .select_for_update(skip_locked=True)
+                .values_list('pk', flat=True)[:self.batch_size]
+            )
+            if not ids:
+                return []
+            EmailQueue.objects.filter(pk__in=ids).update(
+                status='processing',
+                locked_by=self.worker_id,
+                locked_until=now + timedelta(seconds=self.lease_seconds),
+                updated_at=now,
+            )
+
+        return list(
+            EmailQueue.objects.filter(pk__in=ids, locked_by=self.worker_id)
+            .select_related('trigger__smtp_config', 'trigger__template', 'template_version')
+            .order_by('retry_count', '-priority', 'scheduled_at')
+        )
+
+    def renew_lease(self, email_queue) -> bool:
+        """
+        Estende a reserva do item por mais ``lease_seconds``; False se ele não
+        está mais reservado por este worker
+        """
+        now = timezone.now()
+        locked_until = now + timedelta(seconds=self.lease_seconds)
+        renewed = EmailQueue.objects.filter(
+            pk=email_queue.pk, status='processing', locked_by=self.worker_id
+        ).update(locked_until=locked_until, updated_at=now)
+        if renewed:
+            email_queue.locked_until = locked_until
+        return bool(renewed)
+
+    def deliver(self, email_queue) -> str:
+        """
+        Envia um item respeitando o limite do servidor.
+
+        Retorna 'sent', 'failed', 'deferred' (devolvido para a fila) ou
+        'lost' (reserva perdida; o item não foi enviado por este worker).
+        """
+        # Um lote pode demorar mais que a reserva (espera pelo limite, timeouts
+        # SMTP): a reserva é renovada antes de cada item, e itens cuja reserva
+        # já foi perdida ficam com o worker que os recebeu
+        if not self.renew_lease(email_queue):
+            logger.warning(f"Reserva do email {email_queue.pk} perdida por {self.worker_id}; item ignorado")
+            return 'lost'
+        wait = rate_limiter.acquire(email_queue.trigger.smtp_config, max_wait=WORKER_RATE_LIMIT_MAX_WAIT)
+        if wait:
+            email_queue.defer(wait)
+            return 'deferred' if EmailQueueService.save_result(email_queue, self.worker_id) else 'lost'
+        if EmailQueueService.process_queue_item(email_queue, lease_owner=self.worker_id):
+            return 'sent'
+        # Recusas por limite do provedor voltam para a fila sem contar como falha
+        return 'deferred' if email_queue.status == 'pending' else 'failed'
+
+    def _send_in_thread(self, email_queue):
+        try:
+            return self.deliver(email_queue)
+        finally:
+            # Cada thread tem sua própria conexão com o banco
+            connection.close()
+
+    def process_batch(self, items) -> dict:
+        """
+        Envia os itens reservados, em paralelo por configuração SMTP
+        """
+        stats = {'processed': 0, 'sent': 0, 'failed': 0, 'deferred': 0}
+
+        def record(result):
+            stats['processed'] += 1
+            stats[result] = stats.get(result, 0) + 1
+
+        if self.concurrency <= 1:
+            for email_queue in items:
+                record(self.deliver(email_queue))
+            return stats
+
+        by_config = defaultdict(list)
+        for email_queue in items:
+            by_config[email_queue.trigger.smtp_config_id].append(email_queue)
+
+        executors = [
+            ThreadPoolExecutor(max_workers=min(self.concurrency, len(group)), thread_name_prefix='email-worker')
+            for group in by_config.values()
+        ]
+        futures = []
+        for executor, group in zip(executors, by_config.values()):
+            futures.extend(executor.submit(self._send_in_thread, email_queue) for email_queue in group)
+        for future in futures:
+            try:
+                record(future.result())
+            except Exception as e:
+                logger.error(f"Erro no envio de email pelo worker: {e}")
+                record('failed')
+        for executor in executors:
+            executor.shutdown()
+        return stats
+
+    def run_once(self, only_ids=None) -> dict:
+        """
+        Reserva e processa um lote (com ``only_ids``, apenas esses itens)
+        """
+        self.reclaim_expired_leases()
+        items = self.claim_batch(only_ids)
+        if not items:
+            return {'processed': 0, 'sent': 0, 'failed': 0, 'deferred': 0}
+        return self.process_batch(items)
+
+    def run(self, max_seconds=None, idle_sleep=5, stop_when_empty=False) -> dict:
+        """
+        Processa lotes continuamente.
+
+        Para após ``max_seconds`` (quando informado) ou, com
+        ``stop_when_empty``, assim que a fila estiver vazia.
+        """
+        started = time.monotonic()
+        totals = {'processed': 0, 'sent': 0, 'failed': 0, 'deferred': 0, 'batches': 0}
+        logger.info(f"Worker de emails {self.worker_id} iniciado")
+
+        while max_seconds is None or time.monotonic() - started < max_seconds:
+            # Processos longos descartam conexões expiradas entre os lotes
+            close_old_connections()
+            stats = self.run_once()
+            if stats['processed']:
+                totals['batches'] += 1
+                for key in ('processed', 'sent', 'failed', 'deferred', 'lost'):
+                    totals[key] = totals.get(key, 0) + stats.get(key, 0)
+                continue
+            if stop_when_empty:
+                break
+            time.sleep(idle_sleep)
+
+        elapsed = time.monotonic() - started
+        totals['elapsed'] = elapsed
+        logger.info(
+            f"Worker de emails {self.worker_id}: {totals['sent']} enviados, "
+            f"{totals['failed']} falhas, {totals['deferred']} adiados em {elapsed:.1f}s"
+        )
+        return totals
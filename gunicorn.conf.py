@@ -1,5 +1,18 @@
-bind = "0.0.0.0:8000"
-workers = 3
+import os
+
+# Perfil dos workers (GUNICORN_PROFILE):
+# - sync: um processo por requisição simultânea; conexões persistentes com o
+#   banco (DB_CONN_MAX_AGE), uma por worker
+# - gevent: cada worker atende até GUNICORN_WORKER_CONNECTIONS requisições
+#   simultâneas em greenlets; o psycopg2 é adaptado com o psycogreen
+# - asgi: workers do uvicorn servindo hr_system.asgi; as views ``async def``
+#   (contadores de notificações, APIs JSON) não ocupam o worker enquanto
+#   esperam, e as views síncronas rodam em threads
+profile = os.getenv('GUNICORN_PROFILE', 'sync')
+
+wsgi_app = "hr_system.wsgi:application"
+bind = os.getenv('GUNICORN_BIND', "0.0.0.0:8000")
+workers = int(os.getenv('GUNICORN_WORKERS', '3'))
 timeout = 120
 keepalive = 2
 max_requests = 1000
@@ -7,3 +20,25 @@ max_requests_jitter = 100
 worker_class = "sync"
 worker_connections = 1000
 preload_app = False
+
+if profile == 'gevent':
+    worker_class = "gevent"
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '100'))
+    # Cada greenlet tem a sua conexão com o banco: mantê-las abertas
+    # multiplicaria as conexões por worker_connections. Para reaproveitá-las,
+    # use o PgBouncer (DB_POOL_MODE=pgbouncer) com DB_CONN_MAX_AGE definido.
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+elif profile == 'asgi':
+    wsgi_app = "hr_system.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    # Sob ASGI cada requisição usa sua própria thread para o ORM; conexões
+    # persistentes não seriam reaproveitadas (ver o perfil gevent)
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        # O worker gevent já aplicou o monkey patch; o psycopg2 precisa do
+        # callback de espera para não bloquear o processo inteiro nas consultas
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -11,17 +11,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 # settings.py
 
-# --- INÍCIO: Configuração para Gevent + Psycopg2 ---
-# Garante que esta seja a primeira coisa a ser importada
-try:
-    from psycogreen.gevent import patch_psycopg
-    patch_psycopg()
-except ImportError:
-    pass
-# --- FIM: Configuração para Gevent + Psycopg2 ---
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from celery.schedules import crontab
 
 # Carregar variáveis do .env
 load_dotenv()
@@ -97,6 +90,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'utils.middleware.UserActivityMiddleware',
     'utils.middleware.AuthenticationRedirectMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -115,6 +109,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'applications.context_processors.favorites',
             ],
         },
     },
@@ -134,9 +129,49 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'rh_acqua_password'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Conexões reaproveitadas entre requisições/tarefas por até DB_CONN_MAX_AGE
+        # segundos (0 = uma por requisição), verificadas antes de cada reuso
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# DB_POOL_MODE=pgbouncer: conexão via PgBouncer em modo transaction pooling.
+# Cada transação pode ir para uma conexão diferente do servidor, então cursores
+# no servidor (usados por QuerySet.iterator()) não podem ser mantidos entre
+# transações; as exportações em streaming usam utils.db.chunked_iterator, que
+# continua lendo em blocos nesse modo. O PostgreSQL deve usar timezone UTC,
+# já que o SET TIME ZONE da sessão não se aplica às demais conexões do pool.
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'persistent')
+if DB_POOL_MODE == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Cache: Redis compartilhado por todos os workers (sem CACHE_REDIS_URL/REDIS_URL,
+# memória do processo, como em desenvolvimento). 'local' é o primeiro nível
+# (L1) em memória de cada processo, usado por utils.cache.TieredCache.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', os.getenv('REDIS_URL', ''))
+CACHE_L1_TIMEOUT = int(os.getenv('CACHE_L1_TIMEOUT', '30'))
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'KEY_PREFIX': 'rh',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'socket_connect_timeout': 1,
+            'socket_timeout': 1,
+        },
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local-l1',
+        'TIMEOUT': CACHE_L1_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -206,6 +241,75 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'cleanup-expired-exports': {
+        'task': 'reports.tasks.cleanup_expired_exports',
+        'schedule': crontab(minute=0),
+    },
+    'process-email-queue': {
+        'task': 'email_system.tasks.process_email_queue',
+        'schedule': 60.0,
+    },
+    'purge-email-content': {
+        'task': 'email_system.tasks.purge_email_content',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'rollup-email-metrics': {
+        'task': 'email_system.tasks.rollup_email_metrics',
+        'schedule': 300.0,
+    },
+    'flush-user-activity': {
+        'task': 'users.tasks.flush_user_activity',
+        'schedule': float(os.getenv('ACTIVITY_FLUSH_INTERVAL', '60')),
+    },
+}
+
+# Última atividade dos usuários: registrada no Redis (vazio = buffer em
+# memória no processo) no máximo uma vez a cada ACTIVITY_RECORD_INTERVAL
+# segundos por usuário e gravada no banco, em lote, a cada
+# ACTIVITY_FLUSH_INTERVAL segundos
+ACTIVITY_REDIS_URL = os.getenv('ACTIVITY_REDIS_URL', os.getenv('REDIS_URL', ''))
+ACTIVITY_RECORD_INTERVAL = int(os.getenv('ACTIVITY_RECORD_INTERVAL', '30'))
+ACTIVITY_FLUSH_INTERVAL = int(os.getenv('ACTIVITY_FLUSH_INTERVAL', '60'))
+
+# Exportações em segundo plano: arquivos ficam disponíveis por este período
+EXPORT_JOB_TTL_HOURS = int(os.getenv('EXPORT_JOB_TTL_HOURS', '24'))
+# PDFs são gerados inteiros em memória; acima deste limite use CSV ou Excel
+EXPORT_PDF_MAX_ROWS = int(os.getenv('EXPORT_PDF_MAX_ROWS', '5000'))
+# Arquivos das exportações (dados pessoais): fora de MEDIA_ROOT, que é servido
+# sem login; são entregues apenas pela view de download
+EXPORT_ROOT = os.getenv('EXPORT_ROOT', str(BASE_DIR / 'private' / 'exports'))
+
+# Worker da fila de emails: itens reservados por lote, envios simultâneos
+# por configuração SMTP e duração (segundos) da reserva
+EMAIL_WORKER_BATCH_SIZE = int(os.getenv('EMAIL_WORKER_BATCH_SIZE', '50'))
+EMAIL_WORKER_CONCURRENCY = int(os.getenv('EMAIL_WORKER_CONCURRENCY', '4'))
+EMAIL_WORKER_LEASE_SECONDS = int(os.getenv('EMAIL_WORKER_LEASE_SECONDS', '300'))
+
+# Limite de envio por servidor SMTP: estado compartilhado no Redis (vazio =
+# apenas em memória no processo) e espera máxima (segundos) antes de adiar
+EMAIL_RATE_LIMIT_REDIS_URL = os.getenv('EMAIL_RATE_LIMIT_REDIS_URL', os.getenv('REDIS_URL', ''))
+EMAIL_RATE_LIMIT_MAX_WAIT = int(os.getenv('EMAIL_RATE_LIMIT_MAX_WAIT', '10'))
+
+# Novas tentativas de emails com falha temporária: espera inicial (segundos),
+# dobrada a cada falha até o máximo
+EMAIL_RETRY_BACKOFF_BASE = int(os.getenv('EMAIL_RETRY_BACKOFF_BASE', '60'))
+EMAIL_RETRY_BACKOFF_MAX = int(os.getenv('EMAIL_RETRY_BACKOFF_MAX', str(6 * 3600)))
+
+# Emails da fila guardam só os dados de contexto e são renderizados no envio;
+# o conteúdo renderizado de emails finalizados é removido após este período
+EMAIL_RENDER_AT_SEND = os.getenv('EMAIL_RENDER_AT_SEND', 'True').lower() == 'true'
+EMAIL_CONTENT_RETENTION_DAYS = int(os.getenv('EMAIL_CONTENT_RETENTION_DAYS', '30'))
+
+# Destinatários lidos e emails gravados por lote ao enfileirar campanhas em massa
+EMAIL_CAMPAIGN_CHUNK_SIZE = int(os.getenv('EMAIL_CAMPAIGN_CHUNK_SIZE', '500'))
+# Minutos sem novos emails na fila após os quais uma campanha 'running' é
+# considerada interrompida e pode ser reiniciada pelo admin
+EMAIL_CAMPAIGN_STALE_MINUTES = int(os.getenv('EMAIL_CAMPAIGN_STALE_MINUTES', '15'))
+
+# Token (Authorization: Bearer) para coletar /email-system/metrics/ sem login
+# de staff, p.ex. pelo Prometheus; vazio = apenas staff
+EMAIL_METRICS_TOKEN = os.getenv('EMAIL_METRICS_TOKEN', '')
 
 # Logging Configuration for Production
 LOGGING = {
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(fields=['scheduled_date', 'id'], name='interview_scheduled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interview',
+            index=models.Index(fields=['status', 'scheduled_date'], name='interview_status_sched_idx'),
+        ),
+    ]
@@ -89,6 +89,10 @@ class Interview(models.Model):
         verbose_name = _('Entrevista')
         verbose_name_plural = _('Entrevistas')
         ordering = ['scheduled_date']
+        indexes = [
+            models.Index(fields=['scheduled_date', 'id'], name='interview_scheduled_idx'),
+            models.Index(fields=['status', 'scheduled_date'], name='interview_status_sched_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_type_display()} - {self.application.candidate.user.get_full_name()} - {self.scheduled_date.strftime('%d/%m/%Y %H:%M')}"
@@ -0,0 +1,35 @@
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from applications.tests import ApplicationTestDataMixin
+from .models import Interview
+
+
+class EntrevistasPaginationTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.client.login(email="recrutador@teste.com", password="testpass123")
+        start = timezone.now() + timedelta(days=1)
+        for index, application in enumerate(self.create_applications(12)):
+            Interview.objects.create(
+                application=application,
+                interviewer=self.recruiter.profile,
+                scheduled_date=start + timedelta(hours=index),
+            )
+        self.url = reverse("interviews:entrevistas")
+
+    def test_cursor_page_links_by_cursor(self):
+        """A página por cursor navega pelos cursores, mantendo os filtros."""
+        first = self.client.get(self.url).context['interviews']
+
+        response = self.client.get(self.url, {'cursor': first.next_cursor, 'status': 'scheduled'})
+
+        page = response.context['interviews']
+        self.assertEqual(len(page), 2)
+        self.assertContains(response, f'?cursor={quote(page.previous_cursor)}&status=scheduled')
+        self.assertNotContains(response, '?page=')
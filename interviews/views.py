@@ -15,8 +15,11 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from users.models import UserProfile
+from utils.pagination import OptionalKeysetPagination, paginate
+from utils.search import CandidateSearch
 from applications.models import Application
 from vacancies.models import Vacancy
+from email_system import events
 from email_system.services import EmailService
 from email_system.models import EmailTemplate
 import logging
@@ -182,13 +185,9 @@ def schedule_interview(request, application_id=None):
         if form.is_valid():
             interview = form.save()
             
-            # Enviar email de notificação
-            try:
-                send_interview_notification_email(interview)
-                messages.success(request, _('Entrevista agendada com sucesso! Email enviado ao candidato.'))
-            except Exception as e:
-                messages.success(request, _('Entrevista agendada com sucesso!'))
-                messages.warning(request, _('Não foi possível enviar o email de notificação.'))
+            # O email ao candidato é disparado pelo evento interview_scheduled
+            # (signal de criação), depois do commit
+            messages.success(request, _('Entrevista agendada com sucesso! Email enviado ao candidato.'))
                 
             return redirect('interviews:interview_detail', pk=interview.pk)
     else:
@@ -712,6 +711,8 @@ class InterviewViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['application__candidate__user__first_name', 'application__candidate__user__last_name', 'application__vacancy__title']
     ordering_fields = ['scheduled_date', 'status', 'type']
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('scheduled_date', 'id')
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -963,20 +964,17 @@ def entrevistas(request):
     
     search_filter = request.GET.get('search', '')
     if search_filter:
-        interviews = interviews.filter(
-            Q(application__candidate__user__first_name__icontains=search_filter) |
-            Q(application__candidate__user__last_name__icontains=search_filter) |
-            Q(application__candidate__user__email__icontains=search_filter)
+        interviews = CandidateSearch.filter(
+            interviews, search_filter,
+            user_path='application__candidate__user',
+            vacancy_path='application__vacancy',
         )
     
     # Obtém dados para os filtros
     vacancies = Vacancy.objects.filter(status='published')
     
-    # Paginação
-    from django.core.paginator import Paginator
-    paginator = Paginator(interviews.order_by('scheduled_date'), 10)
-    page_number = request.GET.get('page')
-    interviews = paginator.get_page(page_number)
+    # Paginação (keyset com ?cursor=, usada pelo scroll infinito)
+    interviews = paginate(request, interviews, 10, ordering=('scheduled_date', 'id'))
     
     context = {
         'interviews': interviews,
@@ -991,56 +989,6 @@ def entrevistas(request):
     return render(request, 'interviews/entrevistas.html', context)
 
 
-def send_interview_notification_email(interview):
-    """
-    Envia email de notificação de entrevista agendada para o candidato usando o sistema de templates.
-    """
-    try:
-        from email_system.services import EmailTriggerService
-        
-        # Dados da entrevista
-        candidate = interview.application.candidate
-        vacancy = interview.application.vacancy
-        
-        # Formatar data e hora
-        scheduled_date = interview.scheduled_date.strftime('%d/%m/%Y')
-        scheduled_time = interview.scheduled_date.strftime('%H:%M')
-        
-        # Contexto para o template (usando as variáveis corretas do template)
-        context_data = {
-            'user_name': candidate.user.get_full_name(),
-            'vacancy_title': vacancy.title,
-            'interview_date': scheduled_date,
-            'interview_time': scheduled_time,
-            'interview_type': interview.get_type_display(),
-            'interview_location': interview.location or 'A definir',
-            'interviewer_name': interview.interviewer.user.get_full_name() if interview.interviewer else 'Equipe RH',
-            'company_name': 'RH Acqua',
-            'site_name': 'RH Acqua',
-            'site_url': 'https://rh.institutoacqua.org.br'
-        }
-        
-        # Usar o EmailTriggerService para disparar o email
-        email_queue = EmailTriggerService.trigger_email(
-            trigger_type='interview_scheduled',
-            to_email=candidate.user.email,
-            context_data=context_data,
-            to_name=candidate.user.get_full_name(),
-            priority=3  # Prioridade alta para entrevistas
-        )
-        
-        if email_queue:
-            logger.info(f"Email de entrevista adicionado à fila: {email_queue.id}")
-            return True
-        else:
-            logger.error("Falha ao adicionar email de entrevista à fila")
-            return False
-        
-    except Exception as e:
-        logger.error(f"Erro ao enviar email de entrevista: {e}")
-        raise e
-
-
 @login_required
 def schedule_interview_ajax(request):
     """
@@ -1214,44 +1162,8 @@ def edit_interview(request, interview_id):
         interview.status = status
         interview.save()
         
-        # Disparar email de atualização
-        try:
-            candidate_profile = interview.application.candidate
-            candidate_user = candidate_profile.user
-            vacancy = interview.application.vacancy
-            
-            context_data = {
-                'user_name': candidate_user.get_full_name() or candidate_user.first_name or candidate_user.email,
-                'user_email': candidate_user.email,
-                'user_first_name': candidate_user.first_name,
-                'user_last_name': candidate_user.last_name,
-                'vacancy_title': vacancy.title,
-                'vacancy_department': vacancy.department.name if vacancy.department else '',
-                'vacancy_location': vacancy.location,
-                'interview_date': interview.scheduled_date.strftime('%d/%m/%Y'),
-                'interview_time': interview.scheduled_date.strftime('%H:%M'),
-                'interview_type': interview.get_type_display(),
-                'interview_location': interview.location or 'A definir',
-                'interview_notes': interview.notes or 'Nenhuma observação.',
-                'interview_id': interview.id,
-                'interview_status': interview.get_status_display(),
-                'site_name': 'RH Acqua',
-                'site_url': 'https://rh.institutoacqua.org.br',
-            }
-            
-            from email_system.services import EmailTriggerService
-            EmailTriggerService.trigger_email(
-                trigger_type='interview_updated',
-                to_email=candidate_user.email,
-                context_data=context_data,
-                to_name=candidate_user.get_full_name() or candidate_user.first_name,
-                priority=3  # Prioridade alta
-            )
-            
-            logger.info(f"Email de entrevista atualizada disparado para: {candidate_user.email}")
-            
-        except Exception as e:
-            logger.error(f"Erro ao disparar email de entrevista atualizada: {e}")
+        # Disparar email de atualização (após o commit, pela fila de eventos)
+        events.publish('interview_updated', interview.pk)
         
         return JsonResponse({
             'success': True,
@@ -1290,43 +1202,8 @@ def cancel_interview(request, interview_id):
         interview.status = 'canceled'
         interview.save()
         
-        # Disparar email de cancelamento
-        try:
-            candidate_profile = interview.application.candidate
-            candidate_user = candidate_profile.user
-            vacancy = interview.application.vacancy
-            
-            context_data = {
-                'user_name': candidate_user.get_full_name() or candidate_user.first_name or candidate_user.email,
-                'user_email': candidate_user.email,
-                'user_first_name': candidate_user.first_name,
-                'user_last_name': candidate_user.last_name,
-                'vacancy_title': vacancy.title,
-                'vacancy_department': vacancy.department.name if vacancy.department else '',
-                'vacancy_location': vacancy.location,
-                'interview_date': interview.scheduled_date.strftime('%d/%m/%Y'),
-                'interview_time': interview.scheduled_date.strftime('%H:%M'),
-                'interview_type': interview.get_type_display(),
-                'interview_location': interview.location or 'A definir',
-                'interview_notes': interview.notes or 'Nenhuma observação.',
-                'interview_id': interview.id,
-                'site_name': 'RH Acqua',
-                'site_url': 'https://rh.institutoacqua.org.br',
-            }
-            
-            from email_system.services import EmailTriggerService
-            EmailTriggerService.trigger_email(
-                trigger_type='interview_canceled',
-                to_email=candidate_user.email,
-                context_data=context_data,
-                to_name=candidate_user.get_full_name() or candidate_user.first_name,
-                priority=3  # Prioridade alta
-            )
-            
-            logger.info(f"Email de entrevista cancelada disparado para: {candidate_user.email}")
-            
-        except Exception as e:
-            logger.error(f"Erro ao disparar email de entrevista cancelada: {e}")
+        # Disparar email de cancelamento (após o commit, pela fila de eventos)
+        events.publish('interview_canceled', interview.pk)
         
         return JsonResponse({
             'success': True,
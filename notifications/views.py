@@ -38,6 +38,7 @@ from .permissions import (
     IsAdminOrReadOnly, CanManageAnnouncements, CanManageNotificationTypes,
     CanSendNotifications, CanSendMessages
 )
+from utils.decorators import async_login_required
 
 User = get_user_model()
 
@@ -973,23 +974,24 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-# Funções auxiliares para AJAX
-@login_required
-def get_unread_count(request):
+# Funções auxiliares para AJAX (assíncronas: chamadas com frequência por
+# todas as páginas, não ocupam um worker enquanto esperam o banco)
+@async_login_required
+async def get_unread_count(request):
     """
     Retorna o número de notificações e mensagens não lidas.
     """
     # Obtém o número de notificações não lidas
-    notification_count = Notification.objects.filter(
+    notification_count = await Notification.objects.filter(
         user=request.user,
         status='unread'
-    ).count()
+    ).acount()
     
     # Obtém o número de mensagens não lidas
-    message_count = Message.objects.filter(
+    message_count = await Message.objects.filter(
         recipient=request.user,
         status='unread'
-    ).count()
+    ).acount()
     
     # Retorna os dados
     return JsonResponse({
@@ -999,20 +1001,16 @@ def get_unread_count(request):
     })
 
 
-@login_required
-def get_latest_notifications(request):
+@async_login_required
+async def get_latest_notifications(request):
     """
     Retorna as últimas notificações não lidas.
     """
-    # Obtém as últimas notificações não lidas
-    notifications = Notification.objects.filter(
-        user=request.user,
-        status='unread'
-    ).order_by('-created_at')[:5]
+    unread = Notification.objects.filter(user=request.user, status='unread')
     
-    # Serializa as notificações
+    # Serializa as últimas notificações não lidas
     data = []
-    for notification in notifications:
+    async for notification in unread.order_by('-created_at')[:5]:
         data.append({
             'id': notification.id,
             'title': notification.title,
@@ -1025,6 +1023,6 @@ def get_latest_notifications(request):
     # Retorna os dados
     return JsonResponse({
         'notifications': data,
-        'count': Notification.objects.filter(user=request.user, status='unread').count(),
+        'count': await unread.acount(),
         'more_url': reverse('notifications:notification_list')
     })
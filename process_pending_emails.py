@@ -13,102 +13,40 @@ django.setup()
 
 from email_system.models import EmailQueue
 from email_system.services import EmailQueueService
+from email_system.worker import EmailQueueWorker
 from django.utils import timezone
 
-def process_pending_emails(limit=50):
-    """Processa emails pendentes"""
+def process_pending_emails(limit=50, only_ids=None):
+    """Processa emails pendentes (pelo mesmo worker do comando process_email_queue)"""
     print(f"=== PROCESSANDO ATÉ {limit} EMAILS PENDENTES ===")
     
-    # Buscar emails pendentes
-    pending_emails = EmailQueue.objects.filter(
-        status='pending',
-        scheduled_at__lte=timezone.now()
-    ).order_by('-priority', 'scheduled_at')[:limit]
-    
-    total = pending_emails.count()
+    # O worker reserva os itens, então é seguro rodar junto com outros workers
+    totals = EmailQueueWorker(batch_size=limit).run_once(only_ids=only_ids)
+    total = totals['processed']
     print(f"Encontrados {total} emails pendentes")
     
     if total == 0:
         print("Nenhum email pendente para processar")
         return
     
-    success_count = 0
-    error_count = 0
-    
-    for i, email in enumerate(pending_emails, 1):
-        print(f"\n[{i}/{total}] Processando email ID {email.id}")
-        print(f"Para: {email.to_email}")
-        print(f"Assunto: {email.subject}")
-        
-        try:
-            result = EmailQueueService.process_queue_item(email)
-            
-            if result:
-                success_count += 1
-                print("✅ Sucesso")
-            else:
-                error_count += 1
-                print(f"❌ Falha: {email.error_message}")
-                
-        except Exception as e:
-            error_count += 1
-            print(f"❌ Erro: {e}")
-    
     print(f"\n=== RESULTADO ===")
     print(f"Total processados: {total}")
-    print(f"Sucessos: {success_count}")
-    print(f"Falhas: {error_count}")
-    print(f"Taxa de sucesso: {(success_count/total)*100:.1f}%")
+    print(f"Sucessos: {totals['sent']}")
+    print(f"Falhas: {totals['failed']}")
+    print(f"Taxa de sucesso: {(totals['sent']/total)*100:.1f}%")
 
 def retry_failed_emails(limit=20):
-    """Tenta reenviar emails que falharam"""
-    print(f"\n=== TENTANDO REENVIAR ATÉ {limit} EMAILS FALHADOS ===")
-    
-    # Buscar emails que podem ser reenviados
-    failed_emails = EmailQueue.objects.filter(
-        status='failed',
-        retry_count__lt=3
-    ).order_by('-priority', 'created_at')[:limit]
-    
-    total = failed_emails.count()
-    print(f"Encontrados {total} emails que podem ser reenviados")
+    """Antecipa e processa as novas tentativas de emails que falharam"""
+    print(f"\n=== ANTECIPANDO ATÉ {limit} NOVAS TENTATIVAS ===")
     
-    if total == 0:
-        print("Nenhum email para reenviar")
-        return
+    # As novas tentativas seguem a mesma política do worker (EmailRetryPolicy):
+    # aqui apenas são antecipadas para agora
+    retried_ids = EmailQueueService.retry_failed_emails(limit=limit)
+    print(f"Emails antecipados: {len(retried_ids)}")
     
-    retried_count = 0
-    success_count = 0
-    
-    for i, email in enumerate(failed_emails, 1):
-        print(f"\n[{i}/{total}] Tentando reenviar email ID {email.id}")
-        print(f"Para: {email.to_email}")
-        print(f"Tentativas anteriores: {email.retry_count}")
-        
-        try:
-            # Marcar como pendente para reenvio
-            email.status = 'pending'
-            email.scheduled_at = timezone.now()
-            email.save()
-            retried_count += 1
-            
-            # Processar imediatamente
-            result = EmailQueueService.process_queue_item(email)
-            
-            if result:
-                success_count += 1
-                print("✅ Reenviado com sucesso")
-            else:
-                print(f"❌ Falha no reenvio: {email.error_message}")
-                
-        except Exception as e:
-            print(f"❌ Erro no reenvio: {e}")
-    
-    print(f"\n=== RESULTADO DO REENVIO ===")
-    print(f"Emails marcados para reenvio: {retried_count}")
-    print(f"Reenviados com sucesso: {success_count}")
-    if retried_count > 0:
-        print(f"Taxa de sucesso: {(success_count/retried_count)*100:.1f}%")
+    if retried_ids:
+        # Apenas os antecipados: emails novos na fila passariam na frente
+        process_pending_emails(limit=len(retried_ids), only_ids=retried_ids)
 
 def show_email_stats():
     """Mostra estatísticas dos emails"""
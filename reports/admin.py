@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 from .models import (
     Report, ReportExecution, Dashboard, Widget, 
-    Metric, MetricValue, ReportTemplate
+    Metric, MetricValue, ReportTemplate, ExportJob
 )
 
 
@@ -75,6 +75,25 @@ class ReportExecutionAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('export_type', 'file_format', 'requested_by', 'status', 'processed_rows', 'total_rows', 'created_at', 'expires_at')
+    list_filter = ('status', 'export_type', 'file_format', 'created_at')
+    search_fields = ('requested_by__user__first_name', 'requested_by__user__last_name', 'requested_by__user__email')
+    readonly_fields = ('created_at', 'started_at', 'completed_at', 'requested_by', 'filters')
+    fieldsets = (
+        (_('Informações Básicas'), {
+            'fields': ('export_type', 'file_format', 'requested_by', 'filters', 'status')
+        }),
+        (_('Progresso'), {
+            'fields': ('total_rows', 'processed_rows', 'created_at', 'started_at', 'completed_at', 'expires_at')
+        }),
+        (_('Resultado'), {
+            'fields': ('result_file', 'error_message')
+        }),
+    )
+
+
 @admin.register(Dashboard)
 class DashboardAdmin(admin.ModelAdmin):
     list_display = ('name', 'owner', 'is_public', 'created_at')
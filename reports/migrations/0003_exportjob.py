@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_auto_20250910_1111'),
+        ('reports', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('export_type', models.CharField(choices=[('applications', 'Candidaturas'), ('talents', 'Banco de Talentos')], max_length=20, verbose_name='Tipo de Exportação')),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('excel', 'Excel'), ('pdf', 'PDF')], default='excel', max_length=10, verbose_name='Formato')),
+                ('filters', models.JSONField(blank=True, default=dict, verbose_name='Filtros')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('completed', 'Concluído'), ('failed', 'Falhou')], default='pending', max_length=20, verbose_name='Status')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Total de Linhas')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Linhas Processadas')),
+                ('result_file', models.FileField(blank=True, null=True, upload_to='exports/%Y/%m/', verbose_name='Arquivo de Resultado')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='Mensagem de Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Data de Início')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Data de Conclusão')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expira em')),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='users.userprofile', verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Exportação',
+                'verbose_name_plural': 'Exportações',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:10
+
+from django.db import migrations
+
+
+def create_notification_type(apps, schema_editor):
+    NotificationCategory = apps.get_model('notifications', 'NotificationCategory')
+    NotificationType = apps.get_model('notifications', 'NotificationType')
+
+    category, _ = NotificationCategory.objects.get_or_create(
+        slug='reports',
+        defaults={'name': 'Relatórios', 'icon': 'fas fa-file-export', 'color': 'primary'},
+    )
+    NotificationType.objects.get_or_create(
+        slug='export-ready',
+        defaults={
+            'name': 'Exportação concluída',
+            'description': 'Arquivo de uma exportação em segundo plano disponível para download.',
+            'category': category,
+            'icon': 'fas fa-file-download',
+            'color': 'success',
+            'email_available': False,
+            'sms_available': False,
+        },
+    )
+
+
+def remove_notification_type(apps, schema_editor):
+    NotificationType = apps.get_model('notifications', 'NotificationType')
+    NotificationType.objects.filter(slug='export-ready').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        ('reports', '0003_exportjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_notification_type, remove_notification_type),
+    ]
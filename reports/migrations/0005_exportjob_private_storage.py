@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:16
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+import reports.storage
+
+
+def remove_public_exports(apps, schema_editor):
+    """
+    Exportações anteriores ficaram em MEDIA_ROOT, servido sem login: os
+    arquivos são apagados e os registros removidos (expiravam em horas)
+    """
+    ExportJob = apps.get_model('reports', 'ExportJob')
+    for job in ExportJob.objects.exclude(result_file='').exclude(result_file__isnull=True).iterator():
+        default_storage.delete(job.result_file.name)
+        job.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_export_ready_notification_type'),
+    ]
+
+    operations = [
+        # Antes da troca do storage: o arquivo ainda é resolvido em MEDIA_ROOT
+        migrations.RunPython(remove_public_exports, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='result_file',
+            field=models.FileField(blank=True, null=True, storage=reports.storage.export_storage, upload_to=reports.storage.export_upload_to, verbose_name='Arquivo de Resultado'),
+        ),
+    ]
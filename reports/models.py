@@ -7,6 +7,8 @@ from vacancies.models import Vacancy, Hospital, Department
 from applications.models import Application
 from interviews.models import Interview
 
+from .storage import export_storage, export_upload_to
+
 
 class Report(models.Model):
     """
@@ -477,3 +479,115 @@ class ReportTemplate(models.Model):
     
     def __str__(self):
         return self.name
+
+
+class ExportJob(models.Model):
+    """
+    Exportação gerada em segundo plano (candidaturas ou banco de talentos).
+    """
+    EXPORT_TYPES = (
+        ('applications', _('Candidaturas')),
+        ('talents', _('Banco de Talentos')),
+    )
+    
+    FORMAT_CHOICES = (
+        ('csv', 'CSV'),
+        ('excel', 'Excel'),
+        ('pdf', 'PDF'),
+    )
+    
+    STATUS_CHOICES = (
+        ('pending', _('Pendente')),
+        ('processing', _('Processando')),
+        ('completed', _('Concluído')),
+        ('failed', _('Falhou')),
+    )
+    
+    requested_by = models.ForeignKey(
+        UserProfile, 
+        on_delete=models.CASCADE, 
+        related_name='export_jobs',
+        verbose_name=_('Solicitado por')
+    )
+    export_type = models.CharField(
+        max_length=20, 
+        choices=EXPORT_TYPES,
+        verbose_name=_('Tipo de Exportação')
+    )
+    file_format = models.CharField(
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        default='excel',
+        verbose_name=_('Formato')
+    )
+    filters = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_('Filtros')
+    )
+    status = models.CharField(
+        max_length=20, 
+        choices=STATUS_CHOICES, 
+        default='pending',
+        verbose_name=_('Status')
+    )
+    total_rows = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Total de Linhas')
+    )
+    processed_rows = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Linhas Processadas')
+    )
+    result_file = models.FileField(
+        upload_to=export_upload_to,
+        storage=export_storage,
+        blank=True, 
+        null=True,
+        verbose_name=_('Arquivo de Resultado')
+    )
+    error_message = models.TextField(
+        blank=True, 
+        null=True,
+        verbose_name=_('Mensagem de Erro')
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_('Data de Criação')
+    )
+    started_at = models.DateTimeField(
+        blank=True, 
+        null=True,
+        verbose_name=_('Data de Início')
+    )
+    completed_at = models.DateTimeField(
+        blank=True, 
+        null=True,
+        verbose_name=_('Data de Conclusão')
+    )
+    expires_at = models.DateTimeField(
+        db_index=True,
+        verbose_name=_('Expira em')
+    )
+    
+    class Meta:
+        verbose_name = _('Exportação')
+        verbose_name_plural = _('Exportações')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.get_export_type_display()} ({self.get_file_format_display()}) - {self.get_status_display()}"
+    
+    @property
+    def progress(self):
+        """Percentual de linhas já escritas no arquivo."""
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, int(self.processed_rows * 100 / self.total_rows))
+    
+    @property
+    def is_expired(self):
+        """Indica se o arquivo já passou da data de expiração."""
+        return self.expires_at <= timezone.now()
@@ -0,0 +1,197 @@
+"""
+Serviços de exportação em segundo plano
+"""
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from applications import exports as application_exports
+from applications.models import Application
+from applications.services import ApplicationFilterService
+from talent_pool import exports as talent_exports
+from talent_pool.models import Talent
+from talent_pool.services import TalentFilterService
+from utils.export_import import write_csv_rows, write_excel_rows, write_pdf_rows
+
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobService:
+    """
+    Criação, execução e limpeza de exportações geradas pelo Celery
+    """
+
+    # Intervalo (em linhas) entre as atualizações de progresso no banco
+    PROGRESS_STEP = 500
+    # Máximo de linhas de uma exportação em PDF (gerada inteira em memória)
+    PDF_MAX_ROWS = getattr(settings, 'EXPORT_PDF_MAX_ROWS', 5000)
+
+    FILE_EXTENSIONS = {
+        'csv': 'csv',
+        'excel': 'xlsx',
+        'pdf': 'pdf',
+    }
+
+    @staticmethod
+    def expiration():
+        """
+        Data de expiração de uma exportação criada ou concluída agora
+        """
+        return timezone.now() + timedelta(hours=settings.EXPORT_JOB_TTL_HOURS)
+
+    @staticmethod
+    def get_filters(export_type: str, params) -> dict:
+        """
+        Extrai os filtros da exportação com o mesmo parser da tela de origem
+        """
+        if export_type == 'applications':
+            return ApplicationFilterService.get_filters(params)
+        return TalentFilterService.get_filters(params)
+
+    @staticmethod
+    def create_job(user_profile, export_type: str, file_format: str, params) -> ExportJob:
+        """
+        Registra a exportação e a enfileira após o commit da transação
+        """
+        from .tasks import run_export_job
+
+        job = ExportJob.objects.create(
+            requested_by=user_profile,
+            export_type=export_type,
+            file_format=file_format,
+            filters=ExportJobService.get_filters(export_type, params),
+            expires_at=ExportJobService.expiration(),
+        )
+        transaction.on_commit(lambda: run_export_job.delay(job.pk))
+        return job
+
+    @staticmethod
+    def build_export(job: ExportJob):
+        """
+        Monta o queryset e o formato das linhas da exportação.
+
+        Retorna uma tupla ``(queryset, columns, iter_rows, title)``.
+        """
+        if job.export_type == 'applications':
+            queryset = ApplicationFilterService.filter_queryset(
+                Application.objects.all(), job.filters, job.requested_by
+            )
+            queryset = application_exports.export_queryset(
+                queryset, job.filters.get('score_sort', ''), job.filters.get('search', '')
+            )
+            return queryset, application_exports.EXPORT_COLUMNS, application_exports.iter_rows, 'Candidaturas'
+
+        queryset = TalentFilterService.filter_queryset(Talent.objects.all(), job.filters)
+        queryset = talent_exports.export_queryset(queryset)
+        return queryset, talent_exports.EXPORT_COLUMNS, talent_exports.iter_rows, 'Banco de Talentos'
+
+    @staticmethod
+    def track_progress(job: ExportJob, rows):
+        """
+        Repassa as linhas registrando o progresso a cada ``PROGRESS_STEP`` linhas
+        """
+        processed = 0
+        for processed, row in enumerate(rows, start=1):
+            if processed % ExportJobService.PROGRESS_STEP == 0:
+                ExportJob.objects.filter(pk=job.pk).update(processed_rows=processed)
+            yield row
+        job.processed_rows = processed
+
+    @staticmethod
+    def run(job: ExportJob) -> ExportJob:
+        """
+        Gera o arquivo da exportação e o grava no storage de mídia.
+
+        Qualquer erro (inclusive na montagem da consulta) marca a exportação
+        como ``failed``, para que a tela de status pare de consultá-la.
+        """
+        try:
+            queryset, columns, iter_rows, title = ExportJobService.build_export(job)
+
+            job.status = 'processing'
+            job.started_at = timezone.now()
+            job.total_rows = queryset.count()
+            job.save(update_fields=['status', 'started_at', 'total_rows'])
+
+            # O PDF é montado inteiro em memória pelo WeasyPrint (não é gerado
+            # em fluxo como CSV e Excel): exportações grandes são recusadas
+            if job.file_format == 'pdf' and job.total_rows > ExportJobService.PDF_MAX_ROWS:
+                raise ValueError(
+                    f"Exportações em PDF são limitadas a {ExportJobService.PDF_MAX_ROWS} registros; "
+                    "use CSV ou Excel."
+                )
+
+            headers = [header for header, _width in columns]
+            rows = ExportJobService.track_progress(job, iter_rows(queryset))
+
+            with tempfile.TemporaryFile() as output:
+                if job.file_format == 'excel':
+                    write_excel_rows(output, columns, rows, sheet_name=title, empty_message='Nenhum registro encontrado')
+                elif job.file_format == 'pdf':
+                    write_pdf_rows(output, headers, rows, title=title)
+                else:
+                    write_csv_rows(output, headers, rows)
+
+                output.seek(0)
+                timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+                extension = ExportJobService.FILE_EXTENSIONS[job.file_format]
+                job.result_file.save(f'{job.export_type}_{timestamp}.{extension}', File(output), save=False)
+        except Exception as e:
+            logger.exception(f"Erro ao gerar exportação {job.pk}")
+            job.status = 'failed'
+            job.error_message = str(e)
+            job.completed_at = timezone.now()
+            job.save(update_fields=['status', 'error_message', 'completed_at', 'processed_rows'])
+            return job
+
+        job.status = 'completed'
+        job.completed_at = timezone.now()
+        job.expires_at = ExportJobService.expiration()
+        job.save(update_fields=['status', 'processed_rows', 'result_file', 'completed_at', 'expires_at'])
+
+        ExportJobService.notify(job)
+        return job
+
+    @staticmethod
+    def notify(job: ExportJob):
+        """
+        Avisa o solicitante que o arquivo está disponível para download
+        """
+        from django.urls import reverse
+        from notifications.models import Notification, NotificationType
+
+        try:
+            notification_type = NotificationType.objects.get(slug='export-ready')
+        except NotificationType.DoesNotExist:
+            # Sem tipo de notificação configurado, o usuário acompanha pelo status
+            return
+
+        Notification.objects.create(
+            user=job.requested_by.user,
+            notification_type=notification_type,
+            title='Exportação concluída',
+            message=f"{job.get_export_type_display()}: {job.processed_rows} registros exportados.",
+            url=reverse('export_job_download', args=[job.pk]),
+            metadata={'export_job_id': job.pk},
+        )
+
+    @staticmethod
+    def cleanup_expired() -> int:
+        """
+        Remove os arquivos e registros das exportações expiradas
+        """
+        expired = ExportJob.objects.filter(expires_at__lte=timezone.now())
+        count = 0
+        for job in expired.iterator():
+            if job.result_file:
+                job.result_file.delete(save=False)
+            job.delete()
+            count += 1
+        return count
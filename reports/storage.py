@@ -0,0 +1,48 @@
+"""
+Storage privado dos arquivos de exportação.
+
+As exportações completas trazem dados pessoais dos candidatos (CPF, data de
+nascimento, endereço, telefone, anotações). Os arquivos ficam em EXPORT_ROOT,
+fora de MEDIA_ROOT (que o nginx serve sem login), e só são entregues pela
+view ``export_job_download``, que confere o dono da exportação.
+"""
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+
+class PrivateExportStorage(FileSystemStorage):
+    """
+    Storage em disco, em EXPORT_ROOT, sem URL pública
+    """
+
+    # Lidos a cada uso (e não na criação do campo do modelo), como MEDIA_ROOT
+    # no FileSystemStorage padrão
+    @property
+    def base_location(self):
+        return self._location or getattr(settings, 'EXPORT_ROOT', os.path.join(settings.BASE_DIR, 'private', 'exports'))
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError('Arquivos de exportação não têm URL pública; use a view export_job_download.')
+
+
+def export_storage():
+    """
+    Storage dos arquivos de exportação
+    """
+    return PrivateExportStorage()
+
+
+def export_upload_to(instance, filename):
+    """
+    Caminho do arquivo: diretório aleatório por exportação, mantendo o nome
+    amigável usado no download
+    """
+    return f"{timezone.now():%Y/%m}/{uuid.uuid4().hex}/{filename}"
@@ -0,0 +1,36 @@
+"""
+Tarefas Celery de exportação
+"""
+import logging
+
+from celery import shared_task
+
+from .models import ExportJob
+from .services import ExportJobService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def run_export_job(job_id):
+    """
+    Gera o arquivo de uma exportação pendente
+    """
+    try:
+        job = ExportJob.objects.select_related('requested_by__user').get(pk=job_id, status='pending')
+    except ExportJob.DoesNotExist:
+        logger.warning(f"Exportação {job_id} não encontrada ou já processada")
+        return None
+
+    job = ExportJobService.run(job)
+    return job.status
+
+
+@shared_task
+def cleanup_expired_exports():
+    """
+    Remove as exportações expiradas (agendada pelo Celery Beat)
+    """
+    count = ExportJobService.cleanup_expired()
+    logger.info(f"{count} exportações expiradas removidas")
+    return count
@@ -0,0 +1,174 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from applications.tests import ApplicationTestDataMixin
+from .models import ExportJob
+from .services import ExportJobService
+from .tasks import cleanup_expired_exports, run_export_job
+
+MEDIA_ROOT = tempfile.mkdtemp()
+EXPORT_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, EXPORT_ROOT=EXPORT_ROOT)
+class ExportJobTests(ApplicationTestDataMixin, TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(EXPORT_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.client.login(email="recrutador@teste.com", password="testpass123")
+
+    def start_export(self, export_type='applications', **data):
+        with mock.patch('reports.tasks.run_export_job.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('export_job_create', args=[export_type]) + '?status=pending',
+                    data,
+                )
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(response.json()['id'])
+        return ExportJob.objects.get(pk=response.json()['id'])
+
+    def test_request_enqueues_job_with_page_filters(self):
+        """A requisição só registra a exportação e a enfileira após o commit."""
+        job = self.start_export(format='csv', search='Candidato')
+
+        self.assertEqual(job.status, 'pending')
+        self.assertEqual(job.filters['status'], 'pending')
+        self.assertEqual(job.filters['search'], 'Candidato')
+        self.assertEqual(job.requested_by, self.recruiter.profile)
+
+    def test_csv_export_is_written_to_storage_and_downloaded(self):
+        """O arquivo é gerado pela tarefa e servido a partir do storage."""
+        self.create_applications(3)
+        job = self.start_export(format='csv')
+
+        self.assertEqual(run_export_job(job.pk), 'completed')
+
+        status = self.client.get(reverse('export_job_status', args=[job.pk])).json()
+        self.assertEqual(status['progress'], 100)
+        self.assertEqual(status['total_rows'], 3)
+        self.assertEqual(status['processed_rows'], 3)
+
+        response = self.client.get(status['download_url'])
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        lines = content.strip().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('Nome Completo,Email'))
+
+    def test_export_file_is_not_publicly_served(self):
+        """O arquivo fica fora de MEDIA_ROOT, com nome imprevisível e sem URL pública."""
+        self.create_applications(1)
+        job = self.start_export(format='csv')
+        ExportJobService.run(job)
+        job.refresh_from_db()
+
+        path = os.path.realpath(job.result_file.path)
+        self.assertTrue(path.startswith(os.path.realpath(EXPORT_ROOT) + os.sep))
+        self.assertFalse(path.startswith(os.path.realpath(MEDIA_ROOT) + os.sep))
+        # Diretório aleatório por exportação: o nome não é adivinhável pelo horário
+        self.assertRegex(job.result_file.name, r'^\d{4}/\d{2}/[0-9a-f]{32}/applications_\d{8}_\d{6}\.csv$')
+        with self.assertRaises(ValueError):
+            job.result_file.url
+
+        other = get_user_model().objects.create_user(email="outro@teste.com", password="testpass123", role='recruiter')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[job.pk])).status_code, 404)
+
+    def test_failure_before_writing_marks_job_failed(self):
+        """Erros ao montar a consulta também encerram a exportação."""
+        job = self.start_export(format='csv')
+
+        with mock.patch.object(ExportJobService, 'build_export', side_effect=RuntimeError('falhou')):
+            ExportJobService.run(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error_message, 'falhou')
+
+        with mock.patch.object(ExportJobService, 'PDF_MAX_ROWS', 0):
+            self.create_applications(1)
+            pdf = self.start_export(format='pdf')
+            ExportJobService.run(pdf)
+        pdf.refresh_from_db()
+        self.assertEqual(pdf.status, 'failed')
+
+    def test_talent_excel_export(self):
+        """O banco de talentos usa os mesmos escritores de arquivo."""
+        from talent_pool.models import Talent
+
+        for application in self.create_applications(2):
+            Talent.objects.create(candidate=application.candidate)
+        job = self.start_export('talents', format='excel')
+
+        ExportJobService.run(job)
+
+        job.refresh_from_db()
+        with job.result_file.open('rb') as result:
+            workbook = openpyxl.load_workbook(io.BytesIO(result.read()))
+        rows = list(workbook['Banco de Talentos'].values)
+        self.assertEqual(rows[0][0], 'Nome Completo')
+        self.assertEqual(len(rows), 3)
+
+    def test_talent_export_filters_by_education(self):
+        """O filtro de escolaridade vale para a exportação (e para a página)."""
+        from talent_pool.models import Talent
+        from users.models import CandidateProfile
+
+        for index, application in enumerate(self.create_applications(2)):
+            Talent.objects.create(candidate=application.candidate)
+            CandidateProfile.objects.update_or_create(
+                user=application.candidate.user,
+                defaults={'education_level': 'superior' if index == 0 else 'medio'},
+            )
+        job = self.start_export('talents', format='csv', education='superior')
+
+        ExportJobService.run(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.total_rows, 1)
+        response = self.client.get(reverse('talent_pool:banco_talentos'), {'education': 'superior'})
+        self.assertEqual(response.context['total_talents'], 1)
+        # Os botões de exportação da página usam a exportação em segundo plano
+        self.assertContains(response, reverse('export_job_create', args=['talents']))
+
+    def test_other_users_cannot_see_job(self):
+        """Somente o solicitante acompanha e baixa a exportação."""
+        job = self.start_export(format='csv')
+        self.client.logout()
+        get_user_model().objects.create_user(email="outro@teste.com", password="testpass123", role='recruiter')
+        self.client.login(email="outro@teste.com", password="testpass123")
+
+        self.assertEqual(self.client.get(reverse('export_job_status', args=[job.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export_job_download', args=[job.pk])).status_code, 404)
+
+    def test_cleanup_removes_expired_files(self):
+        """Exportações expiradas perdem o arquivo e o registro."""
+        self.create_applications(1)
+        expired = self.start_export(format='csv')
+        ExportJobService.run(expired)
+        expired.refresh_from_db()
+        path = expired.result_file.path
+        ExportJob.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        active = self.start_export(format='csv')
+
+        self.assertEqual(cleanup_expired_exports(), 1)
+
+        self.assertFalse(ExportJob.objects.filter(pk=expired.pk).exists())
+        self.assertTrue(ExportJob.objects.filter(pk=active.pk).exists())
+        self.assertFalse(os.path.exists(path))
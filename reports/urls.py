@@ -29,6 +29,11 @@ urlpatterns = [
     path('executions/<int:pk>/', views.report_execution_detail, name='report_execution_detail'),
     path('executions/<int:execution_id>/export/<str:format>/', views.export_report, name='export_report'),
     
+    # Exportações em segundo plano
+    path('exports/<str:export_type>/start/', views.export_job_create, name='export_job_create'),
+    path('exports/<int:pk>/status/', views.export_job_status, name='export_job_status'),
+    path('exports/<int:pk>/download/', views.export_job_download, name='export_job_download'),
+    
     # Dashboards
     path('dashboards/', views.dashboard_list, name='dashboard_list'),
     path('dashboards/<int:pk>/', views.dashboard_detail, name='dashboard_detail'),
@@ -3,10 +3,11 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Q, Count, Avg, Sum
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import JsonResponse, HttpResponseRedirect, HttpResponse
+from django.http import JsonResponse, HttpResponseRedirect, HttpResponse, FileResponse, Http404
+from django.views.decorators.http import require_POST
 from django.utils import timezone
 from django.conf import settings
 import os
@@ -28,8 +29,9 @@ from applications.models import Application
 from interviews.models import Interview
 from .models import (
     Report, ReportExecution, Dashboard, Widget, 
-    Metric, MetricValue, ReportTemplate
+    Metric, MetricValue, ReportTemplate, ExportJob
 )
+from .services import ExportJobService
 from .forms import (
     ReportForm, ReportFilterForm, ReportExecutionForm, DashboardForm,
     WidgetForm, MetricForm, MetricValueForm, ReportTemplateForm,
@@ -904,6 +906,78 @@ def export_report(request, execution_id, format='pdf'):
     return response
 
 
+def _export_job_data(job):
+    """
+    Dados de acompanhamento de uma exportação (usados no polling).
+    """
+    data = {
+        'id': job.pk,
+        'export_type': job.export_type,
+        'format': job.file_format,
+        'status': job.status,
+        'progress': job.progress,
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'status_url': reverse('export_job_status', args=[job.pk]),
+        'download_url': None,
+        'error_message': job.error_message,
+        'expires_at': job.expires_at.isoformat(),
+    }
+    if job.status == 'completed' and job.result_file:
+        data['download_url'] = reverse('export_job_download', args=[job.pk])
+    return data
+
+
+@login_required
+@require_POST
+def export_job_create(request, export_type):
+    """
+    Enfileira uma exportação em segundo plano com os filtros da tela de origem.
+    """
+    if request.user.role not in ['recruiter', 'recrutador', 'admin']:
+        return JsonResponse({'error': _('Apenas recrutadores podem exportar dados.')}, status=403)
+    
+    if export_type not in dict(ExportJob.EXPORT_TYPES):
+        raise Http404
+    
+    file_format = request.POST.get('format', 'excel')
+    if file_format not in dict(ExportJob.FORMAT_CHOICES):
+        return JsonResponse({'error': _('Formato de exportação inválido.')}, status=400)
+    
+    # Os filtros podem vir na query string da tela de origem ou no corpo do POST
+    params = request.GET.copy()
+    params.update(request.POST)
+    
+    job = ExportJobService.create_job(request.user.profile, export_type, file_format, params)
+    return JsonResponse(_export_job_data(job), status=202)
+
+
+@login_required
+def export_job_status(request, pk):
+    """
+    Retorna o status e o progresso de uma exportação.
+    """
+    job = get_object_or_404(ExportJob, pk=pk, requested_by=request.user.profile)
+    return JsonResponse(_export_job_data(job))
+
+
+@login_required
+def export_job_download(request, pk):
+    """
+    Envia o arquivo de uma exportação concluída a partir do storage.
+    """
+    job = get_object_or_404(ExportJob, pk=pk, requested_by=request.user.profile)
+    
+    if job.status != 'completed' or not job.result_file or job.is_expired:
+        raise Http404(_('O arquivo desta exportação não está disponível.'))
+    
+    return FileResponse(
+        job.result_file.open('rb'),
+        as_attachment=True,
+        filename=os.path.basename(job.result_file.name),
+    )
+
+
 # API Views
 
 class ReportViewSet(viewsets.ModelViewSet):
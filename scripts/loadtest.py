@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+Teste de carga simples: requisições por segundo e latência de um conjunto de
+URLs, opcionalmente comparando perfis de execução do gunicorn.
+
+Contra um servidor já em execução:
+
+    python scripts/loadtest.py --base-url http://127.0.0.1:8000 \
+        --path /vacancies/vaga/enfermeiro/ --concurrency 20 --duration 30
+
+Comparando perfis (o script sobe um gunicorn por perfil, na porta --port):
+
+    python scripts/loadtest.py --profiles sync-no-reuse,sync,gevent \
+        --path /vacancies/vaga/enfermeiro/ --cookie "sessionid=..."
+
+Tráfego misto: com --slow-path, outras --slow-concurrency conexões ficam
+requisitando páginas lentas (exportações, PDFs) durante o teste, e a tabela
+mostra as rápidas e as lentas separadamente. No perfil sync as lentas ocupam
+os workers e a latência das rápidas sobe; no asgi as views assíncronas
+continuam respondendo:
+
+    python scripts/loadtest.py --profiles sync,asgi --cookie "sessionid=..." \
+        --path /vacancies/api/vacancy/1/ --path /vacancies/ajax/load-departments/?hospital=1 \
+        --slow-path /applications/export/ --slow-concurrency 6
+
+Perfis disponíveis (variáveis de ambiente passadas ao gunicorn.conf.py e ao
+settings.py) estão em PROFILES; ``pgbouncer`` espera o PgBouncer na porta
+PGBOUNCER_PORT (padrão 6432) do mesmo host do banco.
+"""
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    # Comportamento anterior: uma conexão nova com o banco por requisição
+    'sync-no-reuse': {'GUNICORN_PROFILE': 'sync', 'DB_CONN_MAX_AGE': '0'},
+    'sync': {'GUNICORN_PROFILE': 'sync', 'DB_CONN_MAX_AGE': '60'},
+    'pgbouncer': {
+        'GUNICORN_PROFILE': 'sync',
+        'DB_CONN_MAX_AGE': '60',
+        'DB_POOL_MODE': 'pgbouncer',
+        'DB_PORT': os.getenv('PGBOUNCER_PORT', '6432'),
+    },
+    'gevent': {'GUNICORN_PROFILE': 'gevent'},
+    'asgi': {'GUNICORN_PROFILE': 'asgi'},
+}
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def worker(base_url, paths, cookie, deadline, results, lock):
+    """
+    Faz requisições em sequência (mantendo a conexão) até o fim do teste
+    """
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=30)
+    headers = {'Cookie': cookie} if cookie else {}
+    latencies = []
+    errors = 0
+    index = 0
+    while time.monotonic() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+    connection.close()
+    with lock:
+        results['latencies'].extend(latencies)
+        results['errors'] += errors
+
+
+def run_load(base_url, groups, duration, cookie=None):
+    """
+    Roda simultaneamente os grupos ``{nome: (caminhos, conexões)}`` e
+    retorna as estatísticas de cada um
+    """
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    results = {}
+    threads = []
+    for name, (paths, concurrency) in groups.items():
+        results[name] = {'latencies': [], 'errors': 0}
+        threads.extend(
+            threading.Thread(target=worker, args=(base_url, paths, cookie, deadline, results[name], lock))
+            for _ in range(concurrency)
+        )
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    stats = {}
+    for name, result in results.items():
+        latencies = result['latencies']
+        stats[name] = {
+            'requests': len(latencies),
+            'errors': result['errors'],
+            'rps': len(latencies) / elapsed if elapsed else 0.0,
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+        }
+    return stats
+
+
+def wait_until_ready(base_url, path, timeout=60):
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+            connection.request('GET', path)
+            connection.getresponse().read()
+            return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def start_server(profile, port, workers):
+    env = dict(os.environ, **PROFILES[profile])
+    env['GUNICORN_BIND'] = f'127.0.0.1:{port}'
+    env['GUNICORN_WORKERS'] = str(workers)
+    return subprocess.Popen(
+        # A aplicação (WSGI ou ASGI) vem do perfil, em gunicorn.conf.py
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def print_table(rows):
+    print(f"{'perfil':<24}{'tráfego':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}")
+    for name, stats in rows:
+        for group, result in stats.items():
+            print(
+                f"{name:<24}{group:<10}{result['rps']:>10.1f}{result['p50']:>10.1f}{result['p95']:>10.1f}"
+                f"{result['p99']:>10.1f}{result['errors']:>8}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga (requisições por segundo)')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--path', action='append', dest='paths', help='Caminho a requisitar (pode repetir)')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--slow-path', action='append', dest='slow_paths',
+                        help='Caminho lento requisitado em paralelo (pode repetir)')
+    parser.add_argument('--slow-concurrency', type=int, default=4, help='Conexões do tráfego lento')
+    parser.add_argument('--duration', type=float, default=20.0, help='Segundos de carga por perfil')
+    parser.add_argument('--cookie', default=os.getenv('LOADTEST_COOKIE'), help='Cabeçalho Cookie (p.ex. sessionid=...)')
+    parser.add_argument('--profiles', help=f"Perfis a comparar, separados por vírgula ({', '.join(PROFILES)})")
+    parser.add_argument('--port', type=int, default=8765, help='Porta usada pelos servidores de --profiles')
+    parser.add_argument('--workers', type=int, default=3, help='Workers do gunicorn em --profiles')
+    args = parser.parse_args()
+    paths = args.paths or ['/']
+    groups = {'rápido': (paths, args.concurrency)}
+    if args.slow_paths:
+        groups['lento'] = (args.slow_paths, args.slow_concurrency)
+
+    if not args.profiles:
+        print_table([(args.base_url, run_load(args.base_url, groups, args.duration, args.cookie))])
+        return
+
+    rows = []
+    for profile in args.profiles.split(','):
+        if profile not in PROFILES:
+            parser.error(f'Perfil desconhecido: {profile}')
+        base_url = f'http://127.0.0.1:{args.port}'
+        process = start_server(profile, args.port, args.workers)
+        try:
+            if not wait_until_ready(base_url, paths[0]):
+                print(f'{profile}: servidor não respondeu', file=sys.stderr)
+                continue
+            # Aquecimento: conexões, templates e caches
+            run_load(base_url, groups, min(3.0, args.duration), args.cookie)
+            rows.append((profile, run_load(base_url, groups, args.duration, args.cookie)))
+        finally:
+            stop_server(process)
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
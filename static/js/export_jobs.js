@@ -0,0 +1,87 @@
+/**
+ * RH Acqua - Exportações em segundo plano
+ *
+ * Botões com data-export-job="<url de início>" e data-export-format="csv|excel|pdf"
+ * enfileiram a exportação com os filtros da página (query string atual),
+ * acompanham o progresso pela URL de status e iniciam o download quando o
+ * arquivo fica pronto. O andamento é exibido no elemento [data-export-job-status],
+ * se existir.
+ */
+(function () {
+    'use strict';
+
+    const POLL_INTERVAL = 2000;
+
+    function csrfToken() {
+        const input = document.querySelector('[name=csrfmiddlewaretoken]');
+        if (input) {
+            return input.value;
+        }
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    function showStatus(message, level) {
+        const status = document.querySelector('[data-export-job-status]');
+        if (!status) {
+            return;
+        }
+        status.className = 'alert alert-' + (level || 'info');
+        status.textContent = message;
+        status.classList.remove('d-none');
+    }
+
+    function poll(statusUrl) {
+        fetch(statusUrl, { credentials: 'same-origin' })
+            .then(function (response) { return response.json(); })
+            .then(function (job) {
+                if (job.status === 'completed' && job.download_url) {
+                    showStatus('Exportação concluída: ' + job.total_rows + ' registros. O download vai começar.', 'success');
+                    window.location.href = job.download_url;
+                } else if (job.status === 'failed') {
+                    showStatus('Erro ao gerar a exportação: ' + (job.error_message || 'tente novamente.'), 'danger');
+                } else {
+                    showStatus('Gerando arquivo... ' + job.progress + '%', 'info');
+                    window.setTimeout(function () { poll(statusUrl); }, POLL_INTERVAL);
+                }
+            })
+            .catch(function () {
+                window.setTimeout(function () { poll(statusUrl); }, POLL_INTERVAL);
+            });
+    }
+
+    function start(button) {
+        const body = new FormData();
+        body.append('format', button.dataset.exportFormat);
+
+        showStatus('Exportação solicitada...', 'info');
+        fetch(button.dataset.exportJob + window.location.search, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'X-CSRFToken': csrfToken() },
+            body: body,
+        })
+            .then(function (response) {
+                return response.json().then(function (data) { return { ok: response.ok, data: data }; });
+            })
+            .then(function (result) {
+                if (!result.ok) {
+                    showStatus(result.data.error || 'Não foi possível iniciar a exportação.', 'danger');
+                    return;
+                }
+                poll(result.data.status_url);
+            })
+            .catch(function () {
+                showStatus('Não foi possível iniciar a exportação.', 'danger');
+            });
+    }
+
+    document.addEventListener('click', function (event) {
+        const button = event.target.closest('[data-export-job]');
+        if (!button) {
+            return;
+        }
+        event.preventDefault();
+        start(button);
+    });
+})();
@@ -0,0 +1,88 @@
+/**
+ * RH Acqua - Scroll infinito das listagens
+ *
+ * Containers marcados com data-infinite-scroll="<nome>" e
+ * data-next-cursor="<cursor>" carregam a próxima página (paginação por
+ * keyset, ?cursor=) quando o final da lista fica visível. A resposta é o
+ * próprio HTML da listagem; apenas os itens do container de mesmo nome são
+ * aproveitados.
+ */
+(function () {
+    'use strict';
+
+    function nextUrl(cursor) {
+        const url = new URL(window.location.href);
+        url.searchParams.delete('page');
+        url.searchParams.set('cursor', cursor);
+        return url.toString();
+    }
+
+    function setup(container) {
+        const name = container.dataset.infiniteScroll;
+        if (!container.dataset.nextCursor || !('IntersectionObserver' in window)) {
+            return;
+        }
+
+        // A navegação numerada deixa de ser necessária
+        document.querySelectorAll('[data-infinite-scroll-pagination]').forEach(function (nav) {
+            nav.classList.add('d-none');
+        });
+
+        const sentinel = document.createElement('div');
+        sentinel.className = 'text-center text-muted small py-3';
+        sentinel.setAttribute('aria-live', 'polite');
+        container.parentNode.insertBefore(sentinel, container.nextSibling);
+
+        let loading = false;
+
+        const observer = new IntersectionObserver(function (entries) {
+            if (!entries[0].isIntersecting || loading) {
+                return;
+            }
+            const cursor = container.dataset.nextCursor;
+            if (!cursor) {
+                observer.disconnect();
+                sentinel.remove();
+                return;
+            }
+
+            loading = true;
+            sentinel.textContent = 'Carregando...';
+
+            fetch(nextUrl(cursor), {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                credentials: 'same-origin'
+            })
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error('HTTP ' + response.status);
+                    }
+                    return response.text();
+                })
+                .then(function (html) {
+                    const doc = new DOMParser().parseFromString(html, 'text/html');
+                    const page = doc.querySelector('[data-infinite-scroll="' + name + '"]');
+                    if (!page) {
+                        throw new Error('Listagem não encontrada na resposta');
+                    }
+                    Array.from(page.children).forEach(function (child) {
+                        container.appendChild(document.importNode(child, true));
+                    });
+                    container.dataset.nextCursor = page.dataset.nextCursor || '';
+                    sentinel.textContent = '';
+                    loading = false;
+                })
+                .catch(function (error) {
+                    console.error('Erro ao carregar a próxima página:', error);
+                    sentinel.textContent = 'Não foi possível carregar mais itens.';
+                    observer.disconnect();
+                });
+        }, { rootMargin: '200px' });
+
+        observer.observe(sentinel);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('[data-infinite-scroll]').forEach(setup);
+    });
+})();
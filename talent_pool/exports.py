@@ -0,0 +1,65 @@
+"""
+Exportação do banco de talentos
+"""
+from utils.db import chunked_iterator
+
+# Quantidade de linhas lidas do banco por vez
+EXPORT_CHUNK_SIZE = 2000
+
+# (cabeçalho, largura da coluna no Excel)
+EXPORT_COLUMNS = (
+    ('Nome Completo', 30),
+    ('Email', 32),
+    ('Telefone', 18),
+    ('Cidade', 20),
+    ('Estado', 8),
+    ('Status', 24),
+    ('Origem', 22),
+    ('Expectativa Salarial Mínima', 16),
+    ('Expectativa Salarial Máxima', 16),
+    ('Data de Disponibilidade', 18),
+    ('Data do Último Contato', 18),
+    ('Data de Cadastro', 18),
+)
+
+
+def export_queryset(queryset):
+    """
+    Prepara o queryset de exportação com o usuário do candidato na mesma consulta.
+    """
+    return queryset.select_related('candidate__user').order_by('-created_at', '-id')
+
+
+def _date(value):
+    return value.strftime('%d/%m/%Y') if value else 'N/A'
+
+
+def talent_row(talent):
+    """
+    Converte um talento em uma linha de exportação (na ordem de EXPORT_COLUMNS).
+    """
+    user = talent.candidate.user
+    return [
+        user.get_full_name(),
+        user.email,
+        user.phone or 'N/A',
+        user.city or 'N/A',
+        user.state or 'N/A',
+        str(talent.get_status_display()),
+        str(talent.get_source_display()),
+        float(talent.salary_expectation_min) if talent.salary_expectation_min is not None else 'N/A',
+        float(talent.salary_expectation_max) if talent.salary_expectation_max is not None else 'N/A',
+        _date(talent.available_start_date),
+        _date(talent.last_contact_date),
+        talent.created_at.strftime('%d/%m/%Y %H:%M'),
+    ]
+
+
+def iter_rows(queryset):
+    """
+    Itera as linhas de exportação lendo o banco em blocos.
+
+    ``queryset`` deve ter sido preparado por ``export_queryset``.
+    """
+    for talent in chunked_iterator(queryset, EXPORT_CHUNK_SIZE):
+        yield talent_row(talent)
@@ -0,0 +1,69 @@
+"""
+Serviços para consultas do banco de talentos
+"""
+from utils.search import CandidateSearch
+
+
+class TalentFilterService:
+    """
+    Filtros da página do banco de talentos (listagem e exportação)
+    """
+
+    FILTER_PARAMS = ('experience', 'education', 'location', 'availability', 'last_interview', 'score', 'search')
+
+    @staticmethod
+    def get_filters(params) -> dict:
+        """
+        Extrai os filtros suportados de ``request.GET`` (ou de um dict)
+        """
+        filters = {name: params.get(name, '') or '' for name in TalentFilterService.FILTER_PARAMS}
+        if hasattr(params, 'getlist'):
+            filters['skills'] = params.getlist('skills')
+        else:
+            filters['skills'] = list(params.get('skills') or [])
+        return filters
+
+    @staticmethod
+    def filter_queryset(queryset, filters: dict):
+        """
+        Aplica os filtros de habilidades, experiência, escolaridade,
+        localização e busca. ``availability``, ``last_interview`` e ``score``
+        são apenas devolvidos à página (não há dados para filtrá-los).
+        """
+        skills = filters.get('skills')
+        if skills:
+            queryset = queryset.filter(skills__name__in=skills).distinct()
+
+        experience = filters.get('experience')
+        if experience == 'junior':
+            queryset = queryset.filter(talent_note__years_experience__lte=2).distinct()
+        elif experience == 'pleno':
+            queryset = queryset.filter(talent_note__years_experience__range=(3, 5)).distinct()
+        elif experience == 'senior':
+            queryset = queryset.filter(talent_note__years_experience__gte=6).distinct()
+
+        education = filters.get('education')
+        if education:
+            queryset = queryset.filter(candidate__user__candidate_profile__education_level=education)
+
+        location = filters.get('location')
+        if location:
+            queryset = queryset.filter(candidate__user__city__icontains=location)
+
+        search = filters.get('search')
+        if search:
+            queryset = TalentFilterService.search(queryset, search)
+
+        return queryset
+
+    @staticmethod
+    def search(queryset, query):
+        """
+        Busca por nome, e-mail, CPF e habilidades do candidato ou do talento
+        """
+        return CandidateSearch.filter(
+            queryset, query,
+            user_path='candidate__user',
+            skills_path='skills',
+            extra_fields=('notes_content',),
+        )
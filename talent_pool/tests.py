@@ -0,0 +1,30 @@
+from urllib.parse import quote
+
+from django.test import TestCase
+from django.urls import reverse
+
+from applications.tests import ApplicationTestDataMixin
+from .models import Talent
+
+
+class BancoTalentosPaginationTests(ApplicationTestDataMixin, TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.create_base_data()
+        self.client.login(email="recrutador@teste.com", password="testpass123")
+        for application in self.create_applications(14):
+            Talent.objects.create(candidate=application.candidate)
+        self.url = reverse("talent_pool:banco_talentos")
+
+    def test_cursor_page_links_by_cursor(self):
+        """A página por cursor não repete o próprio cursor nos links."""
+        first = self.client.get(self.url).context['page_obj']
+
+        response = self.client.get(self.url, {'cursor': first.next_cursor})
+
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 2)
+        self.assertFalse(page.has_next())
+        self.assertContains(response, f'?cursor={quote(page.previous_cursor)}"')
+        self.assertNotContains(response, f'cursor={quote(first.next_cursor)}')
+        self.assertNotContains(response, '?page=')
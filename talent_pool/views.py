@@ -9,7 +9,6 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.http import JsonResponse, HttpResponseRedirect
 from django.utils import timezone
-from django.core.paginator import Paginator
 
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
@@ -35,6 +34,9 @@ from .serializers import (
     SavedSearchSerializer, SavedSearchCreateUpdateSerializer,
     TalentRecommendationSerializer, TalentRecommendationCreateUpdateSerializer
 )
+from utils.pagination import OptionalKeysetPagination, cached_count, paginate
+from utils.search import CandidateSearch
+from .services import TalentFilterService
 from .permissions import (
     IsRecruiterOrAdmin, IsTalentOwnerOrRecruiter, IsTagCreatorOrAdmin,
     IsNoteAuthorOrAdmin, IsSavedSearchOwnerOrPublic, IsRecommendationCreatorOrAdmin
@@ -192,11 +194,9 @@ def talent_list(request):
         # Filtro por palavras-chave
         keywords = form.cleaned_data.get('keywords')
         if keywords:
-            talents = talents.filter(
-                Q(candidate__user__first_name__icontains=keywords) |
-                Q(candidate__user__last_name__icontains=keywords) |
-                Q(candidate__user__email__icontains=keywords) |
-                Q(notes__icontains=keywords)
+            talents = TalentFilterService.search(talents, keywords)
+            talents = CandidateSearch.annotate_rank(talents, keywords, 'candidate__user').order_by(
+                '-search_rank', '-created_at'
             )
         
         # Filtro por status
@@ -719,50 +719,12 @@ def banco_talentos(request):
     View para a página principal do banco de talentos.
     """
     # Buscar talentos com filtros
-    talents = Talent.objects.all()
+    talent_filters = TalentFilterService.get_filters(request.GET)
+    talent_filters['score'] = talent_filters['score'] or 70
+    talents = TalentFilterService.filter_queryset(Talent.objects.all(), talent_filters)
     
-    # Aplicar filtros se fornecidos
-    skills_filter = request.GET.getlist('skills')
-    experience_filter = request.GET.get('experience')
-    education_filter = request.GET.get('education')
-    location_filter = request.GET.get('location')
-    availability_filter = request.GET.get('availability')
-    last_interview_filter = request.GET.get('last_interview')
-    score_filter = request.GET.get('score', 70)
-    search_filter = request.GET.get('search')
-    
-    if skills_filter:
-        talents = talents.filter(skills__skill__name__in=skills_filter).distinct()
-    
-    if experience_filter:
-        if experience_filter == 'junior':
-            talents = talents.filter(skills__years_experience__lte=2)
-        elif experience_filter == 'pleno':
-            talents = talents.filter(skills__years_experience__range=(3, 5))
-        elif experience_filter == 'senior':
-            talents = talents.filter(skills__years_experience__gte=6)
-    
-    if education_filter:
-        talents = talents.filter(candidate__education_level=education_filter)
-    
-    if location_filter:
-        talents = talents.filter(candidate__city__icontains=location_filter)
-    
-    if search_filter:
-        talents = talents.filter(
-            Q(candidate__user__first_name__icontains=search_filter) |
-            Q(candidate__user__last_name__icontains=search_filter) |
-            Q(candidate__user__email__icontains=search_filter) |
-            Q(notes__icontains=search_filter)
-        )
-    
-    # Ordenar por score (simulado)
-    talents = talents.order_by('-created_at')
-    
-    # Paginação
-    paginator = Paginator(talents, 12)  # 12 talentos por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginação por data de cadastro (keyset com ?cursor=, usada pelo scroll infinito)
+    page_obj = paginate(request, talents, 12)
     
     # Buscar habilidades disponíveis para o filtro
     skills = Skill.objects.all().order_by('name')
@@ -770,17 +732,8 @@ def banco_talentos(request):
     context = {
         'page_obj': page_obj,
         'skills': skills,
-        'total_talents': talents.count(),
-        'filters': {
-            'skills': skills_filter,
-            'experience': experience_filter,
-            'education': education_filter,
-            'location': location_filter,
-            'availability': availability_filter,
-            'last_interview': last_interview_filter,
-            'score': score_filter,
-            'search': search_filter,
-        }
+        'total_talents': cached_count(talents),
+        'filters': talent_filters,
     }
     
     return render(request, 'talent_pool/banco_talentos.html', context)
@@ -823,6 +776,8 @@ class TalentViewSet(viewsets.ModelViewSet):
     search_fields = ['candidate__user__first_name', 'candidate__user__last_name', 'candidate__user__email', 'notes']
     ordering_fields = ['created_at', 'last_contact_date']
     filterset_fields = ['status', 'source', 'pools']
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         if self.action == 'list':
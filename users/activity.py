@@ -0,0 +1,222 @@
+"""
+Última atividade dos usuários.
+
+O ``UserActivityMiddleware`` não grava no banco a cada requisição: o horário
+do acesso vai para um hash no Redis (``usuário -> horário``, que já agrupa os
+acessos de cada usuário), no máximo uma vez a cada ACTIVITY_RECORD_INTERVAL
+segundos por processo. A tarefa ``flush_user_activity`` grava os pendentes em
+``UserProfile.last_activity`` com um UPDATE por lote.
+
+Sem Redis configurado (ou com ele indisponível) os horários ficam num buffer
+em memória, gravado por uma thread do próprio processo a cada
+ACTIVITY_FLUSH_INTERVAL segundos. Listas que mostram a última atividade usam
+``with_pending_activity`` para exibir também os horários ainda não gravados.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, DateTimeField, Value, When
+
+logger = logging.getLogger(__name__)
+
+# Redis compartilhado pelos processos ('' = apenas o buffer local)
+ACTIVITY_REDIS_URL = getattr(settings, 'ACTIVITY_REDIS_URL', '')
+# Intervalo mínimo (segundos) entre dois registros do mesmo usuário no processo
+RECORD_INTERVAL = getattr(settings, 'ACTIVITY_RECORD_INTERVAL', 30)
+# Intervalo (segundos) entre gravações do buffer local
+FLUSH_INTERVAL = getattr(settings, 'ACTIVITY_FLUSH_INTERVAL', 60)
+# Usuários por UPDATE
+FLUSH_BATCH_SIZE = 500
+# Tempo (segundos) sem tentar o Redis depois de uma falha de conexão
+REDIS_RETRY_AFTER = 30
+
+PENDING_KEY = 'users:activity:pending'
+
+# Lê e remove o hash de pendentes num único passo atômico: acessos
+# registrados depois vão para um hash novo, e uma falha no meio do caminho
+# não deixa dados órfãos no Redis
+DRAIN_SCRIPT = """
+local entries = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return entries
+"""
+
+
+def to_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+class ActivityTracker:
+    """
+    Buffer da última atividade por usuário (seguro entre threads)
+    """
+
+    def __init__(self, redis_url=ACTIVITY_REDIS_URL):
+        self.redis_url = redis_url
+        self._redis = None
+        self._drain_script = None
+        self._redis_down_until = 0.0
+        # Pendentes sem Redis: user_id -> horário (epoch)
+        self._local = {}
+        # Último registro de cada usuário neste processo (monotonic)
+        self._recorded = {}
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def _get_redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            import redis
+
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=1, socket_connect_timeout=1)
+            self._drain_script = self._redis.register_script(DRAIN_SCRIPT)
+        return self._redis
+
+    def _redis_failed(self, error):
+        logger.warning(f"Atividade dos usuários em memória local; Redis indisponível: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+    def _buffer_local(self, entries):
+        with self._lock:
+            for user_id, timestamp in entries:
+                self._local[user_id] = max(timestamp, self._local.get(user_id, 0.0))
+        self._start_flusher()
+
+    def record(self, user_id, now=None):
+        """
+        Registra um acesso do usuário. Retorna False quando ele já tinha sido
+        registrado há menos de RECORD_INTERVAL segundos neste processo.
+        """
+        moment = time.monotonic()
+        with self._lock:
+            last = self._recorded.get(user_id)
+            if last is not None and moment - last < RECORD_INTERVAL:
+                return False
+            self._recorded[user_id] = moment
+            if moment - self._pruned_at > RECORD_INTERVAL:
+                self._recorded = {
+                    key: value for key, value in self._recorded.items() if moment - value < RECORD_INTERVAL
+                }
+                self._pruned_at = moment
+
+        now = time.time() if now is None else now
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.hset(PENDING_KEY, user_id, now)
+                return True
+            except Exception as e:
+                self._redis_failed(e)
+        self._buffer_local([(user_id, now)])
+        return True
+
+    def pending(self, user_ids):
+        """
+        Horários ainda não gravados no banco: ``{user_id: datetime}``
+        """
+        user_ids = list(user_ids)
+        found = {}
+        client = self._get_redis()
+        if client is not None and user_ids:
+            try:
+                for user_id, value in zip(user_ids, client.hmget(PENDING_KEY, user_ids)):
+                    if value is not None:
+                        found[user_id] = float(value)
+            except Exception as e:
+                self._redis_failed(e)
+        with self._lock:
+            for user_id in user_ids:
+                if user_id in self._local:
+                    found[user_id] = max(self._local[user_id], found.get(user_id, 0.0))
+        return {user_id: to_datetime(timestamp) for user_id, timestamp in found.items()}
+
+    def _drain_shared(self):
+        client = self._get_redis()
+        if client is None:
+            return {}
+        try:
+            raw = self._drain_script(keys=[PENDING_KEY])
+        except Exception as e:
+            self._redis_failed(e)
+            return {}
+        # HGETALL no script retorna a lista [campo, valor, campo, valor, ...]
+        return {int(user_id): float(timestamp) for user_id, timestamp in zip(raw[::2], raw[1::2])}
+
+    def _drain(self, shared=True):
+        entries = self._drain_shared() if shared else {}
+        with self._lock:
+            local, self._local = self._local, {}
+        for user_id, timestamp in local.items():
+            entries[user_id] = max(timestamp, entries.get(user_id, 0.0))
+        return entries
+
+    def flush(self, shared=True):
+        """
+        Grava em ``UserProfile.last_activity`` os horários pendentes (do
+        Redis, com ``shared``, e do buffer local). Retorna quantos usuários
+        foram gravados.
+        """
+        from .models import UserProfile
+
+        # Ordem fixa: gravações simultâneas bloqueiam as linhas na mesma ordem
+        entries = sorted(self._drain(shared).items())
+        try:
+            for start in range(0, len(entries), FLUSH_BATCH_SIZE):
+                batch = entries[start:start + FLUSH_BATCH_SIZE]
+                UserProfile.objects.filter(user_id__in=[user_id for user_id, _ in batch]).update(
+                    last_activity=Case(
+                        *[When(user_id=user_id, then=Value(to_datetime(timestamp))) for user_id, timestamp in batch],
+                        output_field=DateTimeField(),
+                    )
+                )
+        except Exception:
+            # Voltam para o buffer local e entram na próxima gravação
+            self._buffer_local(entries)
+            raise
+        return len(entries)
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='activity-flusher', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush(shared=False)
+            except Exception as e:
+                logger.error(f"Erro ao gravar a atividade dos usuários: {e}")
+            finally:
+                # Conexões desta thread; as das requisições não são afetadas
+                connections.close_all()
+
+    def reset(self):
+        with self._lock:
+            self._local.clear()
+            self._recorded.clear()
+
+
+activity_tracker = ActivityTracker()
+
+
+def with_pending_activity(profiles):
+    """
+    Atualiza ``last_activity`` dos perfis com os horários ainda não gravados
+    no banco (uma leitura do buffer para todos)
+    """
+    profiles = list(profiles)
+    pending = activity_tracker.pending(profile.user_id for profile in profiles)
+    for profile in profiles:
+        seen = pending.get(profile.user_id)
+        if seen is not None and (profile.last_activity is None or seen > profile.last_activity):
+            profile.last_activity = seen
+    return profiles
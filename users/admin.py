@@ -3,6 +3,7 @@ from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 
+from .activity import with_pending_activity
 from .models import User, CandidateProfile, RecruiterProfile, UserProfile, Education, Experience, TechnicalSkill, SoftSkill, Certification, Language
 
 User = get_user_model()
@@ -11,10 +12,19 @@ User = get_user_model()
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'get_full_name', 'get_role')
+    list_display = ('user', 'get_full_name', 'get_role', 'last_activity')
+    list_select_related = ('user',)
     search_fields = ('user__email', 'user__first_name', 'user__last_name')
     list_filter = ('user__role', 'user__is_active')
     
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            # Horários ainda no buffer, antes da gravação em lote
+            with_pending_activity(changelist.result_list)
+        return response
+    
     def get_full_name(self, obj):
         return obj.user.get_full_name()
     get_full_name.short_description = 'Nome Completo'
@@ -29,8 +39,9 @@ class UserProfileAdmin(admin.ModelAdmin):
 class CustomUserAdmin(UserAdmin):
     """Configuração do admin para o modelo de usuário customizado."""
     
-    list_display = ('email', 'first_name', 'last_name', 'role', 'is_active', 'is_staff', 'date_joined')
+    list_display = ('email', 'first_name', 'last_name', 'role', 'is_active', 'is_staff', 'date_joined', 'get_last_activity')
     list_filter = ('role', 'is_active', 'is_staff', 'date_joined')
+    list_select_related = ('profile',)
     search_fields = ('email', 'first_name', 'last_name')
     ordering = ('-date_joined',)
     
@@ -49,6 +60,21 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
     
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            # Horários ainda no buffer, antes da gravação em lote
+            with_pending_activity(user.profile for user in changelist.result_list if hasattr(user, 'profile'))
+        return response
+    
+    def get_last_activity(self, obj):
+        if hasattr(obj, 'profile'):
+            return obj.profile.last_activity
+        return None
+    get_last_activity.short_description = _('Última atividade')
+    get_last_activity.admin_order_field = 'profile__last_activity'
+    
     def save_model(self, request, obj, form, change):
         """Override para evitar problemas de logging."""
         if not change:  # Se é um novo usuário
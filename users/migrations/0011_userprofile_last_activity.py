@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_auto_20250910_1111'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='última atividade'),
+        ),
+    ]
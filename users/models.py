@@ -453,6 +453,9 @@ class RecruiterProfile(models.Model):
 class UserProfile(models.Model):
     """Modelo de compatibilidade para integração com o código existente."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
+    # Gravada em lote a partir do buffer de users.activity (pode estar
+    # atrasada em até ACTIVITY_FLUSH_INTERVAL segundos)
+    last_activity = models.DateTimeField(_('última atividade'), blank=True, null=True)
     
     class Meta:
         verbose_name = _('perfil de usuário')
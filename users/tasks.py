@@ -0,0 +1,15 @@
+"""
+Tarefas Celery de usuários
+"""
+from celery import shared_task
+
+from .activity import activity_tracker
+
+
+@shared_task(ignore_result=True)
+def flush_user_activity():
+    """
+    Grava no banco a última atividade registrada no buffer (agendada a cada
+    ACTIVITY_FLUSH_INTERVAL segundos)
+    """
+    return activity_tracker.flush()
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from users.activity import PENDING_KEY, ActivityTracker, activity_tracker, with_pending_activity
+from users.models import UserProfile
+
+User = get_user_model()
+
+
+class ActivityTrackerTests(TestCase):
+    def setUp(self):
+        activity_tracker.reset()
+        self.addCleanup(activity_tracker.reset)
+        self.admin = User.objects.create_superuser(
+            email="admin@teste.com", password="testpass123", first_name="Ana", last_name="Admin"
+        )
+        self.client.login(email="admin@teste.com", password="testpass123")
+        self.url = reverse("admin:users_user_changelist")
+
+    def test_requests_are_buffered_and_flushed_in_bulk(self):
+        """Os acessos ficam no buffer (um por intervalo) e são gravados de uma vez."""
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        self.assertFalse(activity_tracker.record(self.admin.pk))
+        self.assertIsNone(UserProfile.objects.get(user=self.admin).last_activity)
+        pending = activity_tracker.pending([self.admin.pk])[self.admin.pk]
+
+        other = User.objects.create_user(email="maria@teste.com", password="testpass123")
+        activity_tracker.record(other.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(activity_tracker.flush(), 2)
+
+        self.assertEqual(UserProfile.objects.get(user=self.admin).last_activity, pending)
+        self.assertIsNotNone(UserProfile.objects.get(user=other).last_activity)
+        self.assertEqual(activity_tracker.pending([self.admin.pk, other.pk]), {})
+        self.assertEqual(activity_tracker.flush(), 0)
+
+    def test_admin_list_shows_pending_activity(self):
+        """A lista de usuários do admin mostra o horário ainda não gravado."""
+        response = self.client.get(self.url)
+
+        pending = activity_tracker.pending([self.admin.pk])[self.admin.pk]
+        listed = {user.pk: user.profile for user in response.context_data["cl"].result_list}
+        self.assertEqual(listed[self.admin.pk].last_activity, pending)
+        self.assertIsNone(UserProfile.objects.get(user=self.admin).last_activity)
+
+        profile = UserProfile.objects.get(user=self.admin)
+        self.assertEqual(with_pending_activity([profile])[0].last_activity, pending)
+
+    def test_shared_pending_are_read_and_removed_atomically(self):
+        """Os pendentes do Redis são lidos e removidos por um único script."""
+        tracker = ActivityTracker(redis_url='redis://redis:6379/0')
+        tracker._redis = mock.Mock()
+        tracker._drain_script = mock.Mock(return_value=[b'7', b'1700000000.5'])
+
+        self.assertEqual(tracker._drain_shared(), {7: 1700000000.5})
+        tracker._drain_script.assert_called_once_with(keys=[PENDING_KEY])
@@ -0,0 +1,189 @@
+"""
+Camada de cache da aplicação.
+
+O cache ``default`` é o Redis, compartilhado por todos os workers (em
+desenvolvimento, sem Redis configurado, a memória do processo); o cache
+``local`` fica na memória de cada processo e serve de primeiro nível (L1)
+para ``TieredCache``.
+
+Versões por modelo: salvar ou excluir uma instância de um modelo registrado
+com ``track_model_versions`` troca a versão do modelo no cache compartilhado.
+Chaves montadas com ``versioned_key`` incluem as versões dos modelos de que o
+valor depende; depois de uma alteração as leituras passam a usar chaves
+novas, sem invalidação manual, e as entradas antigas expiram sozinhas.
+Alterações feitas com ``update()``/``bulk_create`` não disparam os signals e
+precisam chamar ``bump_model_version``.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+VERSION_KEY_PREFIX = 'model_version'
+# Tempo máximo (segundos) de uma entrada no L1 do processo
+L1_TIMEOUT = getattr(settings, 'CACHE_L1_TIMEOUT', 30)
+
+_MISSING = object()
+
+
+def shared_cache():
+    return caches['default']
+
+
+def local_cache():
+    # Sem o alias 'local' (configurações antigas), o L1 é desativado
+    if 'local' in getattr(settings, 'CACHES', {}):
+        return caches['local']
+    return None
+
+
+class TieredCache:
+    """
+    Cache em dois níveis: memória do processo (L1) e o cache compartilhado.
+
+    Serve para valores com chaves versionadas: o L1 dos outros processos não
+    é avisado de ``delete``, então uma chave não versionada pode ficar
+    desatualizada neles por até ``l1_timeout`` segundos.
+    """
+
+    def __init__(self, l1_timeout=L1_TIMEOUT):
+        self.l1_timeout = l1_timeout
+
+    def get(self, key, default=None):
+        l1 = local_cache()
+        if l1 is not None:
+            value = l1.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        value = shared_cache().get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        if l1 is not None:
+            l1.set(key, value, self.l1_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        shared_cache().set(key, value, timeout)
+        l1 = local_cache()
+        if l1 is not None:
+            l1_timeout = self.l1_timeout
+            if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+                l1_timeout = min(timeout, l1_timeout)
+            l1.set(key, value, l1_timeout)
+
+    def delete(self, key):
+        shared_cache().delete(key)
+        l1 = local_cache()
+        if l1 is not None:
+            l1.delete(key)
+
+    def get_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, timeout)
+        return value
+
+
+tiered_cache = TieredCache()
+
+
+def version_key(model):
+    return f'{VERSION_KEY_PREFIX}:{model._meta.label_lower}'
+
+
+def model_versions(*models):
+    """
+    Versões atuais dos modelos (``label -> versão``), com uma leitura do cache
+    compartilhado. Uma versão ausente (cache reiniciado) é criada na hora.
+    """
+    cache = shared_cache()
+    keys = {version_key(model): model._meta.label_lower for model in models}
+    found = cache.get_many(list(keys))
+    for key in keys.keys() - found.keys():
+        # add(): processos concorrentes acabam com a mesma versão
+        cache.add(key, uuid.uuid4().hex[:12], None)
+        found[key] = cache.get(key)
+    return {label: found[key] for key, label in keys.items()}
+
+
+def bump_model_version(model):
+    """
+    Troca a versão do modelo, invalidando as chaves que dependem dele
+    """
+    shared_cache().set(version_key(model), uuid.uuid4().hex[:12], None)
+
+
+def _bump_on_change(sender, **kwargs):
+    bump_model_version(sender)
+    # De novo após o commit: uma leitura feita antes dele pode ter guardado
+    # dados antigos com a versão nova
+    transaction.on_commit(lambda: bump_model_version(sender))
+
+
+def track_model_versions(*models):
+    """
+    Troca a versão do modelo sempre que uma instância é salva ou excluída
+    """
+    for model in models:
+        dispatch_uid = f'model_version:{model._meta.label_lower}'
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=dispatch_uid)
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=dispatch_uid)
+
+
+def versioned_key(prefix, *parts, models=()):
+    """
+    Chave de cache com as partes informadas e as versões dos ``models``
+    """
+    versions = model_versions(*models)
+    raw = '|'.join(str(part) for part in parts)
+    raw += '|' + '|'.join(f'{label}={version}' for label, version in sorted(versions.items()))
+    return f'{prefix}:{hashlib.md5(raw.encode("utf-8")).hexdigest()}'
+
+
+def cached_versioned(prefix, parts, models, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    Valor de ``compute()`` em cache (L1 + compartilhado) até que algum dos
+    ``models`` seja alterado ou ``timeout`` expire
+    """
+    return tiered_cache.get_or_set(versioned_key(prefix, *parts, models=models), compute, timeout)
+
+
+PAGE_CACHE_STATS_PREFIX = 'page_cache:stats'
+PAGE_CACHE_OUTCOMES = ('hit', 'stale', 'miss', 'not_modified', 'bypass')
+
+
+def record_page_cache(name, outcome):
+    """
+    Incrementa o contador ``outcome`` (hit, stale, miss, not_modified,
+    bypass) da página ``name`` no cache compartilhado
+    """
+    cache = shared_cache()
+    key = f'{PAGE_CACHE_STATS_PREFIX}:{name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def page_cache_stats(*names):
+    """
+    Contadores das páginas: ``{nome: {resultado: total}}``
+    """
+    keys = {
+        f'{PAGE_CACHE_STATS_PREFIX}:{name}:{outcome}': (name, outcome)
+        for name in names
+        for outcome in PAGE_CACHE_OUTCOMES
+    }
+    found = shared_cache().get_many(list(keys))
+    stats = {name: dict.fromkeys(PAGE_CACHE_OUTCOMES, 0) for name in names}
+    for key, value in found.items():
+        name, outcome = keys[key]
+        stats[name][outcome] = value
+    return stats
@@ -0,0 +1,33 @@
+"""
+Leitura de querysets grandes em blocos, compatível com PgBouncer.
+
+``QuerySet.iterator()`` usa um cursor no servidor (PostgreSQL) e lê
+``chunk_size`` linhas por vez. Com DISABLE_SERVER_SIDE_CURSORS (PgBouncer em
+modo transaction pooling) o mesmo ``iterator()`` traz o resultado inteiro
+para a memória; nesse caso ``chunked_iterator`` lê primeiro só os ids, na
+ordem do queryset, e depois os objetos em blocos.
+"""
+from django.db import connections
+
+
+def server_side_cursors_enabled(using='default'):
+    return not connections[using].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS', False)
+
+
+def chunked_iterator(queryset, chunk_size=2000):
+    """
+    Itera ``queryset`` (com select_related, anotações e ordenação) lendo no
+    máximo ``chunk_size`` objetos do banco por vez
+    """
+    if server_side_cursors_enabled(queryset.db):
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+
+    ids = list(queryset.values_list('pk', flat=True))
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        objects = {obj.pk: obj for obj in queryset.filter(pk__in=chunk)}
+        for pk in chunk:
+            # Objetos removidos entre as duas leituras são ignorados
+            if pk in objects:
+                yield objects[pk]
@@ -1,10 +1,16 @@
 from functools import wraps
-from django.http import HttpResponseRedirect, JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed, HttpResponseRedirect, JsonResponse
+from django.shortcuts import resolve_url
 from django.urls import reverse
+from django.contrib.auth.views import redirect_to_login
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def require_ajax(view_func):
@@ -119,46 +125,169 @@ def require_superuser(view_func):
     return wrapper
 
 
-def cache_page_for_user(timeout):
+def cache_page_versioned(timeout, models=(), per_user=True, stale=0, query_params=None, name=None):
     """
-    Decorador que faz cache de uma página por usuário.
+    Decorador que faz cache do HTML de uma página.
+    
+    A chave inclui o caminho, os parâmetros GET normalizados, o papel do
+    usuário (e o próprio usuário, com ``per_user``) e as versões dos
+    ``models`` (utils.cache): alterar uma instância deles invalida a página.
+    Só respostas 200 de GET/HEAD são guardadas, e nada é guardado nem servido
+    quando há mensagens pendentes para o usuário. As respostas levam ETag e
+    Last-Modified, e requisições condicionais recebem 304 sem renderizar.
     
     Args:
-        timeout: Tempo de cache em segundos
+        timeout: Tempo (segundos) em que a página é servida sem renderizar
+        models: Modelos de que a página depende
+        per_user: Cache separado por usuário (páginas com menu, mensagens ou
+            formulários com CSRF); sem ele, a página é compartilhada por papel
+        stale: Segundos após ``timeout`` em que a cópia antiga ainda é
+            servida enquanto a página é renderizada de novo ao fim da resposta
+        query_params: Parâmetros GET usados pela view (os demais são
+            ignorados na chave); None usa todos
+        name: Nome usado nos contadores de acertos (padrão: nome da view)
         
     Returns:
         Decorador
     """
     def decorator(view_func):
+        page_name = name or view_func.__name__
+        
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            from django.utils.cache import patch_response_headers
-            from django.core.cache import cache
+            import hashlib
+            import time
+            from django.contrib.messages import get_messages
+            from django.utils.cache import get_conditional_response, patch_cache_control
+            from django.utils.http import http_date
+            from utils.cache import record_page_cache, shared_cache, tiered_cache, versioned_key
             
-            # Gera uma chave de cache única para o usuário e a URL
-            if request.user.is_authenticated:
-                cache_key = f"user_{request.user.id}_{request.path}"
-            else:
-                cache_key = f"anonymous_{request.path}"
+            user = request.user
+            cacheable = request.method in ('GET', 'HEAD') and not len(get_messages(request))
+            # Sem o cookie de CSRF a página geraria um token que o usuário ainda não tem
+            if per_user and user.is_authenticated and 'CSRF_COOKIE' not in request.META:
+                cacheable = False
+            if not cacheable:
+                record_page_cache(page_name, 'bypass')
+                return view_func(request, *args, **kwargs)
             
-            # Tenta obter a resposta do cache
-            response = cache.get(cache_key)
+            cache_key = versioned_key(
+                f'page:{page_name}',
+                request.path,
+                normalized_query(request, query_params),
+                getattr(user, 'role', '') if user.is_authenticated else 'anonymous',
+                user.pk if per_user and user.is_authenticated else '',
+                request.META.get('CSRF_COOKIE', '') if per_user and user.is_authenticated else '',
+                getattr(request, 'LANGUAGE_CODE', ''),
+                models=models,
+            )
             
-            if response is None:
-                # Se não estiver no cache, gera a resposta
+            def render_and_store():
                 response = view_func(request, *args, **kwargs)
-                
-                # Adiciona cabeçalhos de cache
-                patch_response_headers(response, timeout)
-                
-                # Armazena no cache
-                cache.set(cache_key, response, timeout)
+                if (response.status_code != 200 or response.streaming or response.cookies
+                        or 'no-store' in response.get('Cache-Control', '')
+                        or getattr(get_messages(request), 'used', False) or len(get_messages(request))):
+                    return response, None
+                entry = {
+                    'content': response.content,
+                    'headers': [(header, value) for header, value in response.items() if header != 'Set-Cookie'],
+                    'created': time.time(),
+                    'etag': '"%s"' % hashlib.md5(response.content).hexdigest(),
+                }
+                tiered_cache.set(cache_key, entry, timeout + stale)
+                return response, entry
+            
+            def finish(response, entry):
+                response['ETag'] = entry['etag']
+                response['Last-Modified'] = http_date(entry['created'])
+                patch_cache_control(response, private=per_user, max_age=0, must_revalidate=True)
+                return get_conditional_response(
+                    request, etag=entry['etag'], last_modified=int(entry['created']), response=response
+                )
+            
+            entry = tiered_cache.get(cache_key)
+            if entry is None:
+                record_page_cache(page_name, 'miss')
+                response, entry = render_and_store()
+                return finish(response, entry) if entry else response
+            
+            lock_key = f'{cache_key}:revalidating'
+            
+            def revalidate():
+                try:
+                    render_and_store()
+                except Exception as e:
+                    logger.error(f"Erro ao renderizar de novo a página {page_name}: {e}")
+                finally:
+                    shared_cache().delete(lock_key)
             
+            age = time.time() - entry['created']
+            revalidating = False
+            if age >= timeout:
+                # Cópia vencida: serve a antiga e renderiza de novo depois de enviar a resposta
+                record_page_cache(page_name, 'stale')
+                revalidating = shared_cache().add(lock_key, 1, 30)
+            else:
+                record_page_cache(page_name, 'hit')
+            
+            conditional = get_conditional_response(
+                request, etag=entry['etag'], last_modified=int(entry['created'])
+            )
+            if conditional is not None:
+                # 304 (ou 412) sem montar a página
+                if conditional.status_code == 304:
+                    record_page_cache(page_name, 'not_modified')
+                response = conditional
+            else:
+                response = HttpResponse(entry['content'])
+                for header, value in entry['headers']:
+                    response[header] = value
+                response = finish(response, entry)
+            if revalidating:
+                response._resource_closers.append(revalidate)
             return response
         return wrapper
     return decorator
 
 
+def normalized_query(request, params=None):
+    """
+    Parâmetros GET em ordem, sem valores vazios e sem ``page=1``
+    
+    Args:
+        request: Requisição
+        params: Parâmetros considerados (None = todos)
+        
+    Returns:
+        Query string normalizada
+    """
+    from urllib.parse import urlencode
+    
+    items = []
+    for key in sorted(request.GET):
+        if params is not None and key not in params:
+            continue
+        for value in sorted(value.strip() for value in request.GET.getlist(key)):
+            if value and not (key == 'page' and value == '1'):
+                items.append((key, value))
+    return urlencode(items)
+
+
+def cache_page_for_user(timeout):
+    """
+    Decorador que faz cache de uma página por usuário.
+    
+    Mantido por compatibilidade; equivale a ``cache_page_versioned(timeout)``.
+    
+    Args:
+        timeout: Tempo de cache em segundos
+        
+    Returns:
+        Decorador
+    """
+    return cache_page_versioned(timeout, per_user=True)
+
+
 def log_activity(activity_type):
     """
     Decorador que registra a atividade do usuário.
@@ -310,3 +439,96 @@ def track_page_view(view_func):
         
         return response
     return wrapper
+
+
+async def get_user_async(request):
+    """
+    Usuário da requisição em views assíncronas.
+    
+    ``request.user`` é carregado sob demanda (sessão e usuário no banco), o
+    que não pode acontecer no loop de eventos; aqui ele é resolvido numa
+    thread e fica em cache na requisição.
+    
+    Args:
+        request: Requisição
+        
+    Returns:
+        Usuário (ou AnonymousUser)
+    """
+    def load():
+        user = request.user
+        user.is_authenticated  # força a carga do SimpleLazyObject
+        return user
+    return await sync_to_async(load)()
+
+
+def async_user_passes_test(test_func, login_url=None):
+    """
+    Equivalente assíncrono do ``user_passes_test`` do Django (que no Django
+    4.2 não aceita views ``async def``).
+    
+    Args:
+        test_func: Função que recebe o usuário e retorna True se ele pode acessar
+        login_url: Página de login (padrão: settings.LOGIN_URL)
+        
+    Returns:
+        Decorador
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            user = await get_user_async(request)
+            if test_func(user):
+                return await view_func(request, *args, **kwargs)
+            return redirect_to_login(request.get_full_path(), resolve_url(login_url or settings.LOGIN_URL))
+        return wrapper
+    return decorator
+
+
+def async_login_required(view_func):
+    """
+    ``login_required`` para views assíncronas.
+    
+    Args:
+        view_func: Função de view (``async def``) a ser decorada
+        
+    Returns:
+        Função decorada
+    """
+    return async_user_passes_test(lambda user: user.is_authenticated)(view_func)
+
+
+def async_staff_member_required(view_func):
+    """
+    ``staff_member_required`` para views assíncronas: exige usuário ativo da
+    equipe e redireciona para o login do admin.
+    
+    Args:
+        view_func: Função de view (``async def``) a ser decorada
+        
+    Returns:
+        Função decorada
+    """
+    return async_user_passes_test(
+        lambda user: user.is_active and user.is_staff, login_url='admin:login'
+    )(view_func)
+
+
+def async_require_http_methods(methods):
+    """
+    ``require_http_methods`` para views assíncronas.
+    
+    Args:
+        methods: Lista de métodos HTTP permitidos
+        
+    Returns:
+        Decorador
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return await view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -226,6 +226,99 @@ def export_as_zip(files, filename='export.zip'):
     return response
 
 
+def write_csv_rows(output, headers, rows):
+    """
+    Escreve linhas em CSV (UTF-8 com BOM) em um arquivo binário, linha a linha.
+    
+    Args:
+        output: Arquivo binário aberto para escrita
+        headers: Lista com os cabeçalhos das colunas
+        rows: Iterável de linhas (listas de valores)
+        
+    Returns:
+        Número de linhas escritas (sem o cabeçalho)
+    """
+    text = io.TextIOWrapper(output, encoding='utf-8-sig', newline='')
+    writer = csv.writer(text)
+    writer.writerow(headers)
+    
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    
+    # Libera o arquivo binário sem fechá-lo
+    text.flush()
+    text.detach()
+    return count
+
+
+def write_excel_rows(output, columns, rows, sheet_name='Sheet1', empty_message=None):
+    """
+    Escreve linhas em uma planilha Excel com o xlsxwriter em modo
+    ``constant_memory``: cada linha vai para disco assim que é escrita.
+    
+    Args:
+        output: Caminho ou arquivo binário de destino
+        columns: Lista de tuplas (cabeçalho, largura)
+        rows: Iterável de linhas (listas de valores)
+        sheet_name: Nome da planilha (padrão: Sheet1)
+        empty_message: Texto escrito quando não há linhas (padrão: None)
+        
+    Returns:
+        Número de linhas escritas (sem o cabeçalho)
+    """
+    import xlsxwriter
+    
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet(sheet_name)
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#366092'})
+    
+    for col, (header, width) in enumerate(columns):
+        worksheet.set_column(col, col, width)
+        worksheet.write_string(0, col, header, header_format)
+    
+    row_number = 0
+    for row_number, row in enumerate(rows, start=1):
+        worksheet.write_row(row_number, 0, row)
+    
+    if row_number == 0 and empty_message:
+        worksheet.write_string(1, 0, empty_message)
+    
+    workbook.close()
+    return row_number
+
+
+def write_pdf_rows(output, headers, rows, title='', template_path='exports/table_pdf.html'):
+    """
+    Escreve linhas em uma tabela PDF usando um template.
+    
+    Diferente de CSV e Excel, as linhas são carregadas todas em memória: o
+    WeasyPrint precisa do documento completo para paginar.
+    
+    Args:
+        output: Caminho ou arquivo binário de destino
+        headers: Lista com os cabeçalhos das colunas
+        rows: Iterável de linhas (listas de valores)
+        title: Título do documento (padrão: '')
+        template_path: Caminho para o template HTML
+        
+    Returns:
+        Número de linhas escritas (sem o cabeçalho)
+    """
+    from django.template.loader import get_template
+    from weasyprint import HTML
+    
+    rows = list(rows)
+    html_string = get_template(template_path).render({
+        'title': title,
+        'headers': headers,
+        'rows': rows,
+    })
+    HTML(string=html_string).write_pdf(output)
+    return len(rows)
+
+
 def import_from_csv(file, model_class, fields_mapping=None, unique_field=None):
     """
     Importa dados de um arquivo CSV para um modelo.
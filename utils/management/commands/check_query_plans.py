@@ -0,0 +1,116 @@
+"""
+Comando para verificar os planos de execução das listagens mais usadas
+"""
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from applications.models import Application
+from interviews.models import Interview
+from vacancies.models import Vacancy
+
+
+def canonical_queries():
+    """
+    Consultas das telas do recrutador e das vagas públicas, no formato em que
+    são executadas pelas views (filtros e ordenação).
+    """
+    now = timezone.now()
+    return {
+        'candidaturas_por_status': Application.objects.filter(
+            status='pending'
+        ).order_by('-created_at', '-id')[:10],
+        'candidaturas_por_vaga': Application.objects.filter(
+            vacancy_id=1, status='pending'
+        ).order_by('-created_at', '-id')[:10],
+        'candidaturas_recentes': Application.objects.filter(
+            created_at__gte=now - timedelta(days=30)
+        ).order_by('-created_at', '-id')[:10],
+        'candidaturas_por_score': Application.objects.order_by(
+            F('avg_score').desc(nulls_last=True), '-created_at'
+        )[:10],
+        'vagas_publicadas': Vacancy.objects.filter(
+            status=Vacancy.PUBLISHED
+        ).order_by('-publication_date')[:10],
+        'vagas_por_recrutador': Vacancy.objects.filter(
+            recruiter_id=1, status=Vacancy.PUBLISHED
+        ).order_by('-created_at')[:10],
+        'vagas_por_hospital': Vacancy.objects.filter(
+            hospital_id=1, status=Vacancy.PUBLISHED
+        ).order_by('-created_at')[:10],
+        'entrevistas_proximas': Interview.objects.filter(
+            scheduled_date__range=(now, now + timedelta(days=7))
+        ).order_by('scheduled_date', 'id')[:10],
+        'entrevistas_por_status': Interview.objects.filter(
+            status='scheduled', scheduled_date__gte=now
+        ).order_by('scheduled_date')[:10],
+    }
+
+
+def sequential_scans(plan):
+    """
+    Percorre o plano (formato JSON do PostgreSQL) e retorna as tabelas lidas
+    com Seq Scan.
+    """
+    tables = []
+    if plan.get('Node Type') == 'Seq Scan':
+        tables.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        tables.extend(sequential_scans(child))
+    return tables
+
+
+class Command(BaseCommand):
+    help = 'Executa EXPLAIN nas listagens principais e informa leituras sequenciais (Seq Scan)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--disable-seqscan',
+            action='store_true',
+            help=(
+                'Desabilita Seq Scan no planejador: com poucos dados o PostgreSQL '
+                'prefere leitura sequencial, então só restam as consultas sem índice'
+            )
+        )
+        parser.add_argument(
+            '--fail-on-seq-scan',
+            action='store_true',
+            help='Termina com erro se alguma consulta usar Seq Scan (para CI)'
+        )
+        parser.add_argument(
+            '--verbose-plan',
+            action='store_true',
+            help='Mostra o plano completo de cada consulta'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Este comando requer PostgreSQL.')
+
+        problems = {}
+        with transaction.atomic():
+            if options['disable_seqscan']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in canonical_queries().items():
+                plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+                tables = sequential_scans(plan)
+
+                if tables:
+                    problems[name] = tables
+                    self.stdout.write(self.style.WARNING(f'{name}: Seq Scan em {", ".join(tables)}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+
+                if options['verbose_plan']:
+                    self.stdout.write(queryset.explain())
+
+        if problems and options['fail_on_seq_scan']:
+            raise CommandError(f'{len(problems)} consultas com Seq Scan: {", ".join(problems)}')
+
+        return None
@@ -99,15 +99,17 @@ class RequestTimeMiddleware(MiddlewareMixin):
 class UserActivityMiddleware(MiddlewareMixin):
     """
     Middleware para rastrear a atividade do usuário.
+    
+    O horário vai para o buffer de users.activity (sem consulta ao banco);
+    UserProfile.last_activity é gravado em lote periodicamente.
     """
     
     def process_request(self, request):
         if request.user.is_authenticated:
-            # Atualiza a última atividade do usuário
+            # Registra a última atividade do usuário
             try:
-                from django.utils import timezone
-                request.user.profile.last_activity = timezone.now()
-                request.user.profile.save(update_fields=['last_activity'])
+                from users.activity import activity_tracker
+                activity_tracker.record(request.user.pk)
             except Exception:
                 # Ignora erros para não afetar a requisição
                 pass
@@ -0,0 +1,63 @@
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+# Wrapper IMMUTABLE do unaccent(), necessário para usá-lo em índices
+CREATE_UNACCENT_FUNCTION = """
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+"""
+
+# As expressões precisam ser idênticas às de utils.search
+SEARCH_INDEXES = {
+    'users_user_name_trgm_idx': (
+        'users_user', "f_unaccent(lower((first_name || ' ' || last_name)))"
+    ),
+    'users_user_email_trgm_idx': (
+        'users_user', 'lower(email)'
+    ),
+    'users_user_cpf_trgm_idx': (
+        'users_user', "regexp_replace(cpf, '[^0-9]', '', 'g')"
+    ),
+    'users_technicalskill_nome_trgm_idx': (
+        'users_technicalskill', 'f_unaccent(lower(nome))'
+    ),
+    'vacancies_vacancy_title_trgm_idx': (
+        'vacancies_vacancy', 'f_unaccent(lower(title))'
+    ),
+    'vacancies_skill_name_trgm_idx': (
+        'vacancies_skill', 'f_unaccent(lower(name))'
+    ),
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_UNACCENT_FUNCTION)
+    for name, (table, expression) in SEARCH_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (({expression}) gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+    schema_editor.execute('DROP FUNCTION IF EXISTS f_unaccent(text)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_auto_20250910_1111'),
+        ('vacancies', '0006_query_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
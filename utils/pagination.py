@@ -0,0 +1,236 @@
+"""
+Paginação por keyset (cursor) e contagens em cache para as listagens.
+
+A paginação por OFFSET percorre todas as linhas anteriores à página pedida e
+precisa de um ``COUNT(*)`` completo. Com keyset, cada página continua a partir
+da chave ``(created_at, id)`` (ou ``(scheduled_date, id)``) do último item
+visto, usando os índices compostos dessas colunas.
+"""
+import hashlib
+
+from django.core import signing
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+CURSOR_SALT = 'utils.pagination.cursor'
+
+# Tempo (em segundos) que uma contagem fica em cache
+COUNT_CACHE_TIMEOUT = 60
+
+
+def encode_cursor(values, previous=False):
+    """
+    Gera um cursor opaco e assinado com os valores da chave de ordenação
+    """
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+    return signing.dumps({'v': values, 'p': previous}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    """
+    Retorna ``(values, previous)`` ou ``(None, False)`` para cursores inválidos
+    """
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        return list(data['v']), bool(data['p'])
+    except (signing.BadSignature, KeyError, TypeError):
+        return None, False
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """
+    ``queryset.count()`` em cache, com chave derivada do SQL da consulta
+    """
+    return cached_query_value(queryset, 'count', queryset.count, timeout)
+
+
+def cached_query_value(queryset, name, compute, timeout=COUNT_CACHE_TIMEOUT):
+    """
+    Guarda em cache um valor derivado do queryset (contagens, agregações)
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params}'.encode('utf-8')).hexdigest()
+    key = f'query:{name}:{digest}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator cujo total vem de ``cached_count``
+    """
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+def _ordering_fields(ordering):
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def _keyset_filter(fields, values, backwards):
+    """
+    Condição "depois da chave" (ou "antes", com ``backwards``) para a ordenação.
+
+    O limite sobre o primeiro campo vem à parte para que o índice seja usado
+    como intervalo.
+    """
+    first, first_desc = fields[0]
+    bound = 'lte' if first_desc != backwards else 'gte'
+    condition = Q()
+    for index, (name, descending) in enumerate(fields):
+        lookup = 'lt' if descending != backwards else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[index]})
+        for previous_index, (previous_name, _descending) in enumerate(fields[:index]):
+            term &= Q(**{previous_name: values[previous_index]})
+        condition |= term
+    return Q(**{f'{first}__{bound}': values[0]}) & condition
+
+
+class KeysetPage:
+    """
+    Página de uma listagem por keyset, com a interface usada pelos templates.
+
+    Não há número de página nem total: os templates testam ``keyset`` e
+    navegam por ``previous_cursor``/``next_cursor``.
+    """
+
+    keyset = True
+
+    def __init__(self, object_list, has_next, has_previous, ordering):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.ordering = ordering
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return ''
+        return KeysetPaginator.cursor_for(self.object_list[-1], self.ordering)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return ''
+        return KeysetPaginator.cursor_for(self.object_list[0], self.ordering, previous=True)
+
+
+class KeysetPaginator:
+    """
+    Paginação por keyset sobre campos não nulos, por exemplo
+    ``('-created_at', '-id')`` ou ``('scheduled_date', 'id')``
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    @staticmethod
+    def cursor_for(obj, ordering, previous=False):
+        """
+        Cursor que aponta para depois (ou antes) de ``obj``
+        """
+        values = [getattr(obj, name) for name, _descending in _ordering_fields(ordering)]
+        return encode_cursor(values, previous=previous)
+
+    def get_page(self, cursor=None):
+        values, previous = decode_cursor(cursor) if cursor else (None, False)
+        fields = _ordering_fields(self.ordering)
+        if values is not None and len(values) != len(fields):
+            values, previous = None, False
+
+        if previous:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+        else:
+            ordering = list(self.ordering)
+
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(_keyset_filter(fields, values, backwards=previous))
+
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+
+        if previous:
+            items.reverse()
+            return KeysetPage(items, has_next=True, has_previous=has_more, ordering=self.ordering)
+        return KeysetPage(items, has_next=has_more, has_previous=values is not None, ordering=self.ordering)
+
+
+def paginate(request, queryset, per_page, ordering=('-created_at', '-id'), keyset=True):
+    """
+    Pagina uma listagem HTML.
+
+    Com ``?cursor=`` na URL (usado pelo scroll infinito) a página é obtida por
+    keyset; caso contrário, pela numeração tradicional com contagem em cache.
+    Em ambos os casos a página recebe ``next_cursor`` quando o keyset é
+    aplicável (``keyset=False`` para ordenações que não são por ``ordering``).
+    """
+    cursor = request.GET.get('cursor')
+    if keyset and cursor:
+        return KeysetPaginator(queryset, per_page, ordering).get_page(cursor)
+
+    page = CachedCountPaginator(queryset.order_by(*ordering) if keyset else queryset, per_page).get_page(
+        request.GET.get('page')
+    )
+    page.next_cursor = ''
+    if keyset and page.has_next():
+        objects = list(page.object_list)
+        page.next_cursor = KeysetPaginator.cursor_for(objects[-1], ordering)
+    return page
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginação por cursor da API, ordenada pelo ``keyset_ordering`` da view
+    (padrão ``('-created_at', '-id')``)
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+
+class OptionalKeysetPagination(KeysetCursorPagination):
+    """
+    Como ``KeysetCursorPagination``, mas só pagina quando o cliente pede
+    (``?cursor=`` ou ``?page_size=``), preservando a resposta em lista das
+    APIs que já eram consumidas sem paginação
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (self.cursor_query_param not in request.query_params
+                and self.page_size_query_param not in request.query_params):
+            return None
+        return super().paginate_queryset(queryset, request, view)
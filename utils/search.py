@@ -0,0 +1,199 @@
+"""
+Busca de candidatos compartilhada pelas listagens do recrutador.
+
+No PostgreSQL com ``pg_trgm`` e ``unaccent`` (migração ``utils.0001``), cada
+termo é comparado com ``LIKE`` sobre expressões normalizadas (minúsculas e
+sem acentos) cobertas por índices GIN de trigramas, e os resultados podem ser
+ordenados por relevância (``word_similarity``). Sem as extensões, a busca
+usa ``icontains`` nos mesmos campos.
+"""
+import unicodedata
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import CharField, F, FloatField, Func, Q, Value
+from django.db.models.functions import Greatest, Lower
+
+# Resultado da detecção das extensões, por alias de banco
+_trigram_support = {}
+
+
+class Unaccent(Func):
+    """
+    ``f_unaccent()``: wrapper IMMUTABLE do ``unaccent()``, usado nos índices
+    """
+    function = 'f_unaccent'
+    output_field = CharField()
+
+
+class FullName(Func):
+    """
+    Nome completo (``first_name || ' ' || last_name``), igual à expressão indexada
+    """
+    template = '(%(expressions)s)'
+    arg_joiner = " || ' ' || "
+    output_field = CharField()
+
+
+class Digits(Func):
+    """
+    Apenas os dígitos do campo (CPF com ou sem pontuação)
+    """
+    template = "regexp_replace(%(expressions)s, '[^0-9]', '', 'g')"
+    output_field = CharField()
+
+
+def normalize(text):
+    """
+    Remove acentos e converte para minúsculas (mesma normalização dos índices)
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower().strip()
+
+
+def trigram_search_enabled(using='default'):
+    """
+    Indica se o banco tem ``pg_trgm`` e a função ``f_unaccent`` disponíveis
+    """
+    if using not in _trigram_support:
+        connection = connections[using]
+        enabled = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') "
+                    "AND to_regprocedure('f_unaccent(text)') IS NOT NULL"
+                )
+                enabled = bool(cursor.fetchone()[0])
+        _trigram_support[using] = enabled
+    return _trigram_support[using]
+
+
+class CandidateSearch:
+    """
+    Filtro de busca por candidato (nome, e-mail, CPF e habilidades técnicas),
+    título da vaga e habilidades do talento.
+
+    Os caminhos (``user_path``, ``vacancy_path``, ``skills_path``) indicam como
+    chegar a cada tabela a partir do modelo listado, por exemplo
+    ``candidate__user`` em ``Application`` ou ``application__candidate__user``
+    em ``Interview``.
+    """
+
+    @staticmethod
+    def name_expression(prefix=''):
+        return Unaccent(Lower(FullName(F(f'{prefix}first_name'), F(f'{prefix}last_name'))))
+
+    @staticmethod
+    def title_expression(prefix=''):
+        return Unaccent(Lower(F(f'{prefix}title')))
+
+    @staticmethod
+    def matching_users(term, trigram):
+        """
+        IDs dos usuários cujo nome, e-mail, CPF ou habilidade técnica contém o termo
+        """
+        from users.models import TechnicalSkill
+
+        User = get_user_model()
+        if trigram:
+            users = User.objects.alias(
+                search_name=CandidateSearch.name_expression(),
+                search_email=Lower('email'),
+                search_cpf=Digits('cpf'),
+            )
+            condition = Q(search_name__contains=term) | Q(search_email__contains=term)
+            skills = TechnicalSkill.objects.alias(
+                search_name=Unaccent(Lower('nome'))
+            ).filter(search_name__contains=term)
+        else:
+            users = User.objects.all()
+            condition = (
+                Q(first_name__icontains=term) |
+                Q(last_name__icontains=term) |
+                Q(email__icontains=term)
+            )
+            skills = TechnicalSkill.objects.filter(nome__icontains=term)
+
+        digits = ''.join(char for char in term if char.isdigit())
+        if len(digits) >= 3:
+            condition |= Q(search_cpf__contains=digits) if trigram else Q(cpf__icontains=term)
+
+        condition |= Q(pk__in=skills.values('user_id'))
+        return users.filter(condition).values('pk')
+
+    @staticmethod
+    def matching_vacancies(term, trigram):
+        """
+        IDs das vagas cujo título contém o termo
+        """
+        from vacancies.models import Vacancy
+
+        if trigram:
+            vacancies = Vacancy.objects.alias(
+                search_title=CandidateSearch.title_expression()
+            ).filter(search_title__contains=term)
+        else:
+            vacancies = Vacancy.objects.filter(title__icontains=term)
+        return vacancies.values('pk')
+
+    @staticmethod
+    def matching_skills(term, trigram):
+        """
+        IDs das habilidades (``vacancies.Skill``) cujo nome contém o termo
+        """
+        from vacancies.models import Skill
+
+        if trigram:
+            skills = Skill.objects.alias(
+                search_name=Unaccent(Lower('name'))
+            ).filter(search_name__contains=term)
+        else:
+            skills = Skill.objects.filter(name__icontains=term)
+        return skills.values('pk')
+
+    @staticmethod
+    def filter(queryset, query, user_path, vacancy_path=None, skills_path=None, extra_fields=()):
+        """
+        Aplica a busca ao queryset.
+
+        Todos os termos da busca precisam ser encontrados (em qualquer campo).
+        """
+        trigram = trigram_search_enabled(queryset.db)
+        terms = normalize(query).split() if trigram else (query or '').split()
+        if not terms:
+            return queryset
+
+        for term in terms:
+            condition = Q(**{f'{user_path}__in': CandidateSearch.matching_users(term, trigram)})
+            if vacancy_path:
+                condition |= Q(**{f'{vacancy_path}__in': CandidateSearch.matching_vacancies(term, trigram)})
+            if skills_path:
+                # Subconsulta para não duplicar linhas com várias habilidades encontradas
+                condition |= Q(pk__in=queryset.model.objects.filter(**{
+                    f'{skills_path}__in': CandidateSearch.matching_skills(term, trigram)
+                }).values('pk'))
+            for field in extra_fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+
+        return queryset
+
+    @staticmethod
+    def annotate_rank(queryset, query, user_path, vacancy_path=None):
+        """
+        Anota ``search_rank``: relevância da linha para a busca (0 quando não
+        há suporte a trigramas). Deve ser aplicado só à listagem, e não às contagens.
+        """
+        if not trigram_search_enabled(queryset.db):
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+        query = normalize(query)
+        similarities = [
+            TrigramWordSimilarity(query, CandidateSearch.name_expression(f'{user_path}__')),
+            TrigramWordSimilarity(query, Lower(F(f'{user_path}__email'))),
+        ]
+        if vacancy_path:
+            similarities.append(TrigramWordSimilarity(query, CandidateSearch.title_expression(f'{vacancy_path}__')))
+        return queryset.annotate(search_rank=Greatest(*similarities, output_field=FloatField()))
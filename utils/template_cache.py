@@ -0,0 +1,111 @@
+"""
+Cache em memória de templates de email já compilados.
+
+Compilar um ``django.template.Template`` (tokenizar e montar a árvore de
+nós) custa muito mais que renderizá-lo. Os templates de email guardados no
+banco (``email_system.EmailTemplate`` e ``administration.EmailTemplate``) são
+compilados uma vez por processo e reaproveitados, numa LRU chaveada por
+(modelo, id, updated_at, campo). Salvar ou excluir um template remove suas
+entradas do cache.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.template import Context, Template
+
+# Quantidade máxima de templates compilados (um por campo) mantidos por processo
+TEMPLATE_CACHE_SIZE = getattr(settings, 'EMAIL_TEMPLATE_CACHE_SIZE', 256)
+
+
+class CompiledTemplateCache:
+    """
+    LRU de templates compilados (segura entre threads)
+    """
+
+    def __init__(self, maxsize=TEMPLATE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(instance, field):
+        return (instance._meta.label_lower, instance.pk, getattr(instance, 'updated_at', None), field)
+
+    def get(self, instance, field):
+        """
+        Template compilado do campo ``field`` da instância
+        """
+        source = getattr(instance, field) or ''
+        if instance.pk is None:
+            return Template(source)
+
+        key = self.key(instance, field)
+        with self._lock:
+            entry = self._entries.get(key)
+            # O texto é conferido porque update() em massa não altera updated_at
+            if entry is not None and entry[0] == source:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        compiled = Template(source)
+        with self._lock:
+            self._entries[key] = (source, compiled)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def render(self, instance, fields, context_data):
+        """
+        Renderiza os campos da instância com um único ``Context``.
+
+        Retorna um dicionário campo -> texto; campos vazios resultam em None.
+        """
+        context = Context(context_data)
+        rendered = {}
+        for field in fields:
+            if getattr(instance, field):
+                rendered[field] = self.get(instance, field).render(context)
+            else:
+                rendered[field] = None
+        return rendered
+
+    def invalidate(self, instance):
+        """
+        Remove todas as versões compiladas da instância
+        """
+        prefix = (instance._meta.label_lower, instance.pk)
+        with self._lock:
+            for key in [key for key in self._entries if key[:2] == prefix]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+template_cache = CompiledTemplateCache()
+
+
+def _invalidate_template(sender, instance, **kwargs):
+    template_cache.invalidate(instance)
+
+
+def invalidate_on_change(model):
+    """
+    Limpa o cache quando uma instância de ``model`` é salva ou excluída
+    """
+    dispatch_uid = f'template_cache:{model._meta.label_lower}'
+    post_save.connect(_invalidate_template, sender=model, dispatch_uid=dispatch_uid)
+    post_delete.connect(_invalidate_template, sender=model, dispatch_uid=dispatch_uid)
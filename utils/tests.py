@@ -1,6 +1,12 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
 from django.test import TestCase, RequestFactory
 from django.contrib.auth.models import User, AnonymousUser
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse
 
 from utils.helpers import (
@@ -317,3 +323,205 @@ class ViewsTestCase(TestCase):
         request.headers = {'x-requested-with': 'XMLHttpRequest'}
         response = get_cep_info(request)
         self.assertEqual(response.status_code, 400)
+
+
+class QueryPlansTestCase(TestCase):
+    """
+    Testes para o comando de verificação dos planos de execução.
+    """
+    
+    @skipUnless(connection.vendor == 'postgresql', 'Planos de execução específicos do PostgreSQL')
+    def test_canonical_queries_use_indexes(self):
+        """Todas as listagens principais têm um índice compatível."""
+        out = StringIO()
+        call_command('check_query_plans', '--disable-seqscan', '--fail-on-seq-scan', stdout=out)
+        self.assertNotIn('Seq Scan', out.getvalue())
+
+
+class CandidateSearchTestCase(TestCase):
+    """
+    Testes para a busca de candidatos compartilhada pelas listagens.
+    """
+    
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from applications.models import Application
+        from vacancies.models import Department, Hospital, Vacancy
+        
+        User = get_user_model()
+        recruiter = User.objects.create_user(email='recrutador@teste.com', password='testpass123', role='recruiter')
+        hospital = Hospital.objects.create(name='Hospital Teste', address='Rua Teste, 123', city='São Paulo', state='SP', zip_code='01234-567')
+        department = Department.objects.create(name='UTI', hospital=hospital)
+        nurse = Vacancy.objects.create(
+            title='Enfermeiro', requirements='Requisitos', hospital=hospital, department=department,
+            location='São Paulo, SP', recruiter=recruiter,
+        )
+        doctor = Vacancy.objects.create(
+            title='Médico', requirements='Requisitos', hospital=hospital, department=department,
+            location='São Paulo, SP', recruiter=recruiter,
+        )
+        self.maria = User.objects.create_user(
+            email='maria@teste.com', password='testpass123', first_name='Maria', last_name='Silva', cpf='123.456.789-01'
+        )
+        self.joao = User.objects.create_user(
+            email='joao@teste.com', password='testpass123', first_name='João', last_name='Souza'
+        )
+        self.maria_nurse = Application.objects.create(candidate=self.maria.profile, vacancy=nurse)
+        self.maria_doctor = Application.objects.create(candidate=self.maria.profile, vacancy=doctor)
+        self.joao_nurse = Application.objects.create(candidate=self.joao.profile, vacancy=nurse)
+    
+    def search(self, query):
+        from applications.models import Application
+        from utils.search import CandidateSearch
+        
+        queryset = CandidateSearch.filter(
+            Application.objects.all(), query, user_path='candidate__user', vacancy_path='vacancy'
+        )
+        return set(queryset.values_list('pk', flat=True))
+    
+    def test_normalize(self):
+        """Remove acentos e converte para minúsculas."""
+        from utils.search import normalize
+        self.assertEqual(normalize(' João Conceição '), 'joao conceicao')
+    
+    def test_every_term_must_match_some_field(self):
+        """Cada termo pode casar com um campo diferente (nome, sobrenome ou vaga)."""
+        self.assertEqual(self.search('maria silva'), {self.maria_nurse.pk, self.maria_doctor.pk})
+        self.assertEqual(self.search('maria enfermeiro'), {self.maria_nurse.pk})
+        self.assertEqual(self.search('souza'), {self.joao_nurse.pk})
+        self.assertEqual(self.search(''), {self.maria_nurse.pk, self.maria_doctor.pk, self.joao_nurse.pk})
+    
+    def test_search_by_email_cpf_and_skill(self):
+        """Busca também por e-mail, CPF e habilidades técnicas do candidato."""
+        from users.models import TechnicalSkill
+        TechnicalSkill.objects.create(user=self.joao, nome='Hemodiálise', nivel='avancado')
+        
+        self.assertEqual(self.search('joao@teste'), {self.joao_nurse.pk})
+        self.assertEqual(self.search('456.789'), {self.maria_nurse.pk, self.maria_doctor.pk})
+        self.assertEqual(self.search('Hemodiálise'), {self.joao_nurse.pk})
+
+
+class VersionedCacheTestCase(TestCase):
+    """
+    Testes para as chaves de cache versionadas por modelo.
+    """
+    
+    def setUp(self):
+        from vacancies.models import Hospital
+        
+        self.Hospital = Hospital
+        self.hospital = Hospital.objects.create(
+            name='Hospital Central', address='Rua A, 1', city='Manaus', state='AM', zip_code='69000-000'
+        )
+    
+    def test_saving_a_model_changes_dependent_keys(self):
+        """Salvar uma unidade troca a chave e o valor é recalculado."""
+        from utils.cache import cached_versioned, versioned_key
+        from vacancies.models import Vacancy
+        
+        key = versioned_key('hospitals', 'ativos', models=[self.Hospital])
+        self.assertEqual(key, versioned_key('hospitals', 'ativos', models=[self.Hospital]))
+        unrelated = versioned_key('vagas', models=[Vacancy])
+        
+        names = lambda: list(self.Hospital.objects.values_list('name', flat=True))
+        self.assertEqual(cached_versioned('hospitals', ['ativos'], [self.Hospital], names), ['Hospital Central'])
+        
+        self.hospital.name = 'Hospital Norte'
+        self.hospital.save()
+        
+        self.assertNotEqual(key, versioned_key('hospitals', 'ativos', models=[self.Hospital]))
+        self.assertEqual(unrelated, versioned_key('vagas', models=[Vacancy]))
+        self.assertEqual(cached_versioned('hospitals', ['ativos'], [self.Hospital], names), ['Hospital Norte'])
+    
+    def test_tiered_cache_serves_from_local_tier(self):
+        """Depois da primeira leitura, o valor vem da memória do processo."""
+        from django.core.cache import caches
+        from utils.cache import tiered_cache
+        
+        tiered_cache.set('utils:teste', 42)
+        caches['default'].delete('utils:teste')
+        
+        self.assertEqual(tiered_cache.get('utils:teste'), 42)
+        tiered_cache.delete('utils:teste')
+        self.assertIsNone(tiered_cache.get('utils:teste'))
+
+
+class PageCacheTestCase(TestCase):
+    """
+    Testes para o decorador de cache de páginas.
+    """
+    
+    def setUp(self):
+        from django.core.cache import caches
+        
+        caches['default'].clear()
+        caches['local'].clear()
+        self.factory = RequestFactory()
+        self.renders = 0
+    
+    def get(self, view, path='/vagas/', **extra):
+        request = self.factory.get(path, **extra)
+        request.user = AnonymousUser()
+        response = view(request)
+        # Como o cliente de testes: fecha a resposta sem fechar a conexão do banco
+        request_finished.disconnect(close_old_connections)
+        try:
+            response.close()
+        finally:
+            request_finished.connect(close_old_connections)
+        return response
+    
+    def make_view(self, status=200, **options):
+        from utils.decorators import cache_page_versioned
+        from vacancies.models import Hospital
+        
+        @cache_page_versioned(60, models=(Hospital,), per_user=False, query_params=('cargo', 'page'), **options)
+        def view(request):
+            self.renders += 1
+            return HttpResponse(f'render {self.renders} {request.GET.get("cargo", "")}', status=status)
+        return view
+    
+    def test_query_params_are_normalized_and_part_of_the_key(self):
+        """Filtros diferentes não colidem; ordem, vazios, page=1 e extras são ignorados."""
+        view = self.make_view()
+        
+        first = self.get(view, '/vagas/?cargo=enfermeiro&page=1&utm_source=x')
+        self.assertEqual(self.get(view, '/vagas/?page=1&cargo=enfermeiro&unidade=').content, first.content)
+        self.assertEqual(self.get(view, '/vagas/?cargo=medico').content, b'render 2 medico')
+        self.assertEqual(self.renders, 2)
+    
+    def test_model_change_and_errors(self):
+        """Salvar um modelo invalida a página; respostas de erro não são guardadas."""
+        from utils.cache import page_cache_stats
+        from vacancies.models import Hospital
+        
+        view = self.make_view()
+        self.get(view)
+        self.get(view)
+        Hospital.objects.create(name='Hospital Sul', address='Rua B, 2', city='Manaus', state='AM', zip_code='69000-000')
+        self.get(view)
+        self.assertEqual(self.renders, 2)
+        self.assertEqual(page_cache_stats('view')['view'], {'hit': 1, 'stale': 0, 'miss': 2, 'not_modified': 0, 'bypass': 0})
+        
+        failing = self.make_view(status=500, name='failing')
+        self.get(failing)
+        self.get(failing)
+        self.assertEqual(self.renders, 4)
+    
+    def test_conditional_requests_and_stale_while_revalidate(self):
+        """ETag devolve 304 sem renderizar; a cópia vencida é servida e renovada depois."""
+        from unittest import mock
+        
+        view = self.make_view(stale=60)
+        response = self.get(view)
+        
+        not_modified = self.get(view, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(self.renders, 1)
+        
+        import time
+        with mock.patch('time.time', return_value=time.time() + 90):
+            stale = self.get(view)
+        self.assertEqual(stale.content, b'render 1 ')
+        self.assertEqual(self.renders, 2)
+        self.assertEqual(self.get(view).content, b'render 2 ')
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vacancies', '0005_make_phone_optional'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['status', '-publication_date'], name='vacancy_status_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['recruiter', 'status'], name='vacancy_recruiter_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['hospital', 'status'], name='vacancy_hospital_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-publication_date', '-created_at'], name='vacancy_published_idx'),
+        ),
+    ]
@@ -173,6 +173,17 @@ class Vacancy(models.Model):
         verbose_name = _('vaga')
         verbose_name_plural = _('vagas')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-publication_date'], name='vacancy_status_pub_idx'),
+            models.Index(fields=['recruiter', 'status'], name='vacancy_recruiter_status_idx'),
+            models.Index(fields=['hospital', 'status'], name='vacancy_hospital_status_idx'),
+            # Vagas públicas: só as publicadas, da mais recente para a mais antiga
+            models.Index(
+                fields=['-publication_date', '-created_at'],
+                condition=models.Q(status='published'),
+                name='vacancy_published_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -2,7 +2,13 @@ from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
-from .models import Vacancy
+from utils.cache import track_model_versions
+
+from .models import Department, Hospital, JobCategory, Vacancy
+
+# Páginas e listas em cache com utils.cache.versioned_key deixam de valer
+# quando vagas, unidades, setores ou categorias são alterados
+track_model_versions(Vacancy, Hospital, Department, JobCategory)
 
 
 @receiver(pre_save, sender=Vacancy)
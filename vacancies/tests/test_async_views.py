@@ -0,0 +1,68 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from vacancies.models import Vacancy, Hospital, Department, Skill
+
+User = get_user_model()
+
+
+class AsyncJsonViewsTests(TestCase):
+    def setUp(self):
+        """Configuração inicial para os testes."""
+        self.user = User.objects.create_user(
+            email="maria@teste.com",
+            password="testpass123",
+            first_name="Maria",
+            last_name="Silva",
+            role="recruiter",
+        )
+        self.hospital = Hospital.objects.create(
+            name="Hospital Teste",
+            address="Rua Teste, 123",
+            city="São Paulo",
+            state="SP",
+            zip_code="01234-567",
+            phone="(11) 1234-5678"
+        )
+        self.department = Department.objects.create(name="Centro Cirúrgico", hospital=self.hospital)
+        Department.objects.create(name="Ambulatório", hospital=self.hospital)
+        self.vacancy = Vacancy.objects.create(
+            title="Enfermeiro",
+            requirements="Requisitos",
+            hospital=self.hospital,
+            department=self.department,
+            location="São Paulo, SP",
+            recruiter=self.user,
+        )
+        self.vacancy.skills.add(Skill.objects.create(name="Atendimento ao Paciente"))
+
+    def test_vacancy_detail_api(self):
+        """Testa os detalhes da vaga carregados pelo ORM assíncrono."""
+        url = reverse("vacancies:vacancy_api_detail", kwargs={"vacancy_id": self.vacancy.pk})
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["hospital"], "Hospital Teste")
+        self.assertEqual(data["department"], "Centro Cirúrgico")
+        self.assertEqual(data["recruiter_name"], "Maria Silva")
+        self.assertEqual(data["skills"], ["Atendimento ao Paciente"])
+
+        missing = reverse("vacancies:vacancy_api_detail", kwargs={"vacancy_id": self.vacancy.pk + 1})
+        self.assertEqual(self.client.get(missing).status_code, 404)
+        self.assertEqual(self.client.post(url).status_code, 405)
+
+    def test_load_departments_requires_login(self):
+        """Testa a lista de departamentos, exigindo login."""
+        url = reverse("vacancies:ajax_load_departments") + f"?hospital={self.hospital.pk}"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("users:login"), response["Location"])
+
+        self.client.login(email="maria@teste.com", password="testpass123")
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["name"] for item in response.json()], ["Ambulatório", "Centro Cirúrgico"])
@@ -6,8 +6,8 @@ from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Q
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST, require_http_methods
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_POST
 from django.utils import timezone
 from django.db import IntegrityError, transaction
 from django.forms import ValidationError
@@ -29,6 +29,8 @@ from .serializers import (
     VacancyCreateUpdateSerializer, VacancyAttachmentSerializer
 )
 from .permissions import IsRecruiterOrAdmin, IsVacancyRecruiterOrAdmin, IsHospitalManagerOrAdmin
+from utils.cache import cached_versioned
+from utils.decorators import async_login_required, async_require_http_methods, cache_page_versioned
 
 
 # Views para o frontend (templates)
@@ -393,14 +395,14 @@ class VacancyDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
-@login_required
-def load_departments(request):
+@async_login_required
+async def load_departments(request):
     """
     View para carregar departamentos com base no hospital selecionado (para uso com AJAX).
     """
     hospital_id = request.GET.get('hospital')
     departments = Department.objects.filter(hospital_id=hospital_id).order_by('name')
-    return JsonResponse(list(departments.values('id', 'name')), safe=False)
+    return JsonResponse([department async for department in departments.values('id', 'name')], safe=False)
 
 
 @login_required
@@ -600,6 +602,7 @@ def delete_vacancy(request, pk):
 
 
 @login_required
+@cache_page_versioned(60, models=(Department, Hospital), stale=120, query_params=('search', 'hospital', 'status', 'page'))
 def setores(request):
     """
     Exibe a página de setores/departamentos.
@@ -659,6 +662,7 @@ def setores(request):
 
 
 @login_required
+@cache_page_versioned(60, models=(Vacancy, Hospital, JobCategory), stale=120, query_params=('unidade', 'cargo', 'regiao', 'page'))
 def vagas_disponiveis(request):
     """
     View para exibir vagas disponíveis para candidatos.
@@ -698,13 +702,21 @@ def vagas_disponiveis(request):
                 Q(hospital__state__icontains=regiao_filter)
             )
         
-        # Obtém dados para filtros
-        hospitals = Hospital.objects.filter(is_active=True).order_by('name')
-        categories = JobCategory.objects.filter(is_active=True).order_by('name')
+        # Obtém dados para filtros (em cache, compartilhados entre os usuários)
+        hospitals = cached_versioned(
+            'vagas_disponiveis:hospitals', [], [Hospital],
+            lambda: list(Hospital.objects.filter(is_active=True).order_by('name'))
+        )
+        categories = cached_versioned(
+            'vagas_disponiveis:categories', [], [JobCategory],
+            lambda: list(JobCategory.objects.filter(is_active=True).order_by('name'))
+        )
         
         # Obtém regiões (estados) dinamicamente do banco
-        regions = list(Hospital.objects.filter(is_active=True).values_list('state', flat=True).distinct())
-        regions.sort()
+        regions = cached_versioned(
+            'vagas_disponiveis:regions', [], [Hospital],
+            lambda: sorted(Hospital.objects.filter(is_active=True).values_list('state', flat=True).distinct())
+        )
         
         # Paginação
         from django.core.paginator import Paginator
@@ -744,126 +756,35 @@ def candidatura_view(request, pk):
 		messages.error(request, _('Apenas candidatos podem se candidatar às vagas.'))
 		return redirect('vacancies:vacancy_detail', slug=vacancy.slug)
 	
-	# Verifica se o usuário já se candidatou
-	already_applied = False
+	from applications.models import Application
+	from applications.services import ApplicationSubmissionService
+	from users.models import UserProfile
+	
+	# Garantir que o usuário tenha um UserProfile
 	try:
-		from applications.models import Application
-		from users.models import UserProfile
-		
-		# Tenta obter o UserProfile do usuário logado
-		user_profile = UserProfile.objects.get(user=request.user)
-		already_applied = Application.objects.filter(candidate=user_profile, vacancy=vacancy).exists()
-	except (ImportError, UserProfile.DoesNotExist):
-		# Se não existir UserProfile, assume que não se candidatou
-		already_applied = False
+		user_profile = request.user.profile
+	except UserProfile.DoesNotExist:
+		user_profile = UserProfile.objects.create(user=request.user)
+	
+	# Verifica se o usuário já se candidatou
+	application = Application.objects.filter(candidate=user_profile, vacancy=vacancy).select_related('complementary_info').first()
+	already_applied = application is not None
 	
 	# Se já se candidatou, não processa POST mas continua mostrando a página
 	if already_applied and request.method == 'POST':
 		messages.warning(request, _('Você já se candidatou para esta vaga.'))
 		return redirect('vacancies:vacancy_detail', slug=vacancy.slug)
 	
-	# Processar POST - Envio da candidatura
+	# Processar POST - Envio da candidatura (transação única; e-mail e atestado após o commit)
 	if request.method == 'POST':
 		try:
-			# Garantir que o usuário tenha um UserProfile
-			from users.models import UserProfile
-			user_profile, created = UserProfile.objects.get_or_create(user=request.user)
-			
-			# 1) Atualiza informações do usuário a partir do formulário
-			user = request.user
-			# Nome completo -> first_name/last_name
-			nome_completo = (request.POST.get('nome_completo') or '').strip()
-			if nome_completo:
-				partes = nome_completo.split()
-				user.first_name = ' '.join(partes[:-1]) if len(partes) > 1 else nome_completo
-				user.last_name = partes[-1] if len(partes) > 1 else ''
-			user.nome_social = request.POST.get('nome_social') or ''
-			# Datas
-			data_nascimento = request.POST.get('data_nascimento')
-			user.date_of_birth = data_nascimento or None
-			# Documentos
-			user.cpf = (request.POST.get('cpf') or '').strip()
-			user.pis = (request.POST.get('pis') or '').strip()
-			user.rg = (request.POST.get('rg') or '').strip()
-			rg_emissao = request.POST.get('rg_emissao')
-			user.rg_emissao = rg_emissao or None
-			user.rg_orgao = (request.POST.get('rg_orgao') or '').strip()
-			# Características
-			user.raca_cor = request.POST.get('raca_cor') or ''
-			user.sexo = request.POST.get('sexo') or ''
-			user.genero = request.POST.get('genero') or ''
-			user.estado_civil = request.POST.get('estado_civil') or ''
-			user.bio = request.POST.get('bio') or user.bio
-			# Contato
-			user.email = (request.POST.get('email') or user.email).strip()
-			user.whatsapp = (request.POST.get('whatsapp') or '').strip()
-			# Endereço
-			user.address = request.POST.get('endereco') or ''
-			user.numero = request.POST.get('numero') or ''
-			user.complemento = request.POST.get('complemento') or ''
-			user.bairro = request.POST.get('bairro') or ''
-			user.city = request.POST.get('cidade') or ''
-			user.state = request.POST.get('estado') or ''
-			user.zip_code = (request.POST.get('cep') or '').strip()
-			user.save()
-			
-			# 2) Criar a candidatura
-			# Garantir que o usuário tenha um UserProfile
-			user_profile, created = UserProfile.objects.get_or_create(user=request.user)
-			
-			application = Application.objects.create(
-				candidate=user_profile,
-				vacancy=vacancy,
-				status='pending'
+			application, created = ApplicationSubmissionService.submit(
+				user_profile, vacancy, request.POST, request.FILES
 			)
-			
-			# 3) Salvar informações complementares (inclui PCD e Conselho)
-			from applications.models import ApplicationComplementaryInfo
-			data_desligamento = request.POST.get('data_desligamento') or None
-			validade_registro = request.POST.get('validade_registro') or None
-			
-			complementary_info = ApplicationComplementaryInfo(
-				application=application,
-				trabalha_atualmente=request.POST.get('trabalha_atualmente', ''),
-				funcao_atual=request.POST.get('funcao_atual', ''),
-				experiencia_area=request.POST.get('experiencia_area', ''),
-				descricao_experiencia=request.POST.get('descricao_experiencia', ''),
-				ultima_funcao=request.POST.get('ultima_funcao', ''),
-				tempo_experiencia=request.POST.get('tempo_experiencia', ''),
-				disponibilidade_manha=request.POST.get('disponibilidade_manha') == 'manha',
-				disponibilidade_tarde=request.POST.get('disponibilidade_tarde') == 'tarde',
-				disponibilidade_noite=request.POST.get('disponibilidade_noite') == 'noite',
-				disponibilidade_comercial=request.POST.get('disponibilidade_comercial') == 'comercial',
-				disponibilidade_plantao_dia=request.POST.get('disponibilidade_plantao_dia') == 'plantao_dia',
-				disponibilidade_plantao_noite=request.POST.get('disponibilidade_plantao_noite') == 'plantao_noite',
-				disponibilidade_plantao_12x60_dia=request.POST.get('disponibilidade_plantao_12x60_dia') == 'plantao_12x60_dia',
-				disponibilidade_plantao_12x60_noite=request.POST.get('disponibilidade_plantao_12x60_noite') == 'plantao_12x60_noite',
-				inicio_imediato=request.POST.get('inicio_imediato', ''),
-				trabalhou_acqua=request.POST.get('trabalhou_acqua', ''),
-				area_cargo_acqua=request.POST.get('area_cargo_acqua', ''),
-				data_desligamento=data_desligamento or None,
-				parentes_instituicao=request.POST.get('parentes_instituicao', ''),
-				grau_parentesco=request.POST.get('grau_parentesco') or None,
-				nome_parente_setor=request.POST.get('nome_parente_setor', ''),
-				declaracao_veracidade=request.POST.get('declaracao_veracidade') == 'sim',
-				declaracao_edital=request.POST.get('declaracao_edital') == 'sim',
-				autorizacao_dados=request.POST.get('autorizacao_dados') == 'sim',
-				data_declaracao=f"{request.POST.get('dia_declaracao','')}/{request.POST.get('mes_declaracao','')}/{request.POST.get('ano_declaracao','')}",
-				# Novos campos
-				is_pcd=request.POST.get('is_pcd') or None,
-				cid=request.POST.get('cid') or None,
-				necessita_adaptacoes=request.POST.get('necessita_adaptacoes') or None,
-				descricao_adaptacoes=request.POST.get('descricao_adaptacoes') or None,
-				conselho_regional=request.POST.get('conselho_regional') or None,
-				numero_registro=request.POST.get('numero_registro') or None,
-				validade_registro=validade_registro or None,
-			)
-			# arquivo do atestado
-			if 'atestado_pcd' in request.FILES:
-				complementary_info.atestado_pcd = request.FILES['atestado_pcd']
-			complementary_info.save()
-			
-			messages.success(request, _('Candidatura enviada com sucesso! Aguarde o contato dos recrutadores.'))
+			if created:
+				messages.success(request, _('Candidatura enviada com sucesso! Aguarde o contato dos recrutadores.'))
+			else:
+				messages.warning(request, _('Você já se candidatou para esta vaga.'))
 			return redirect('applications:application_list')
 			
 		except Exception as e:
@@ -878,20 +799,10 @@ def candidatura_view(request, pk):
 	certifications = request.user.certifications.all()
 	languages = request.user.languages.all()
 	
-	# Buscar informações complementares já salvas (se já se candidatou)
+	# Informações complementares já salvas (se já se candidatou)
 	complementary_info = None
 	if already_applied:
-		try:
-			from applications.models import Application
-			from users.models import UserProfile
-			
-			# Garantir que o usuário tenha um UserProfile
-			user_profile, created = UserProfile.objects.get_or_create(user=request.user)
-			
-			application = Application.objects.get(candidate=user_profile, vacancy=vacancy)
-			complementary_info = getattr(application, 'complementary_info', None)
-		except (Application.DoesNotExist, AttributeError):
-			complementary_info = None
+		complementary_info = getattr(application, 'complementary_info', None)
 	
 	context = {
 		'vacancy': vacancy,
@@ -908,6 +819,8 @@ def candidatura_view(request, pk):
 	return render(request, 'vacancies/candidatura.html', context)
 
 
+# Compartilhada por papel; as contagens de candidaturas podem atrasar até o fim do timeout
+@cache_page_versioned(60, models=(Vacancy, Hospital, Department, JobCategory), per_user=False, stale=300)
 def public_vacancy_detail(request, slug):
     """
     vacancy = get_object_or_404(Vacancy, slug=slug)
@@ -1088,14 +1001,21 @@ class VacancyAttachmentViewSet(viewsets.ModelViewSet):
             return VacancyAttachment.objects.filter(vacancy__status=Vacancy.PUBLISHED)
 
 
-@require_http_methods(["GET"])
-def vacancy_detail_api(request, pk):
+@async_require_http_methods(["GET"])
+async def vacancy_detail_api(request, vacancy_id):
     """
     API para retornar detalhes da vaga em formato JSON
     """
+    # Relacionados carregados junto: acessá-los depois consultaria o banco
+    # dentro do loop de eventos
+    try:
+        vacancy = await Vacancy.objects.select_related(
+            'hospital', 'department', 'category', 'recruiter'
+        ).prefetch_related('skills').aget(pk=vacancy_id)
+    except Vacancy.DoesNotExist:
+        raise Http404
+    
     try:
-        vacancy = get_object_or_404(Vacancy, pk=pk)
-        
         data = {
             'id': vacancy.pk,
             'title': vacancy.title,